@@ -5,13 +5,18 @@ from typing import List
 from enum import Enum
 import tempfile
 import json
-import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
 import os
 
 from imc_agents.agents.state import State
+from imc_agents.utils.csv_dialect import sniff_csv_dialect
 from imc_agents.utils.custom_llm_model import CustomChatModel
-from imc_agents.utils.data_checker import DataChecker
+from imc_agents.utils.data_checker import DataChecker, set_cell, streaming_threshold_bytes
+from imc_agents.utils.instrumentation import MetricsRecorder
+from imc_agents.utils.parse_cache import ParsedFileCache
+from imc_agents.utils.validation_rules import ValidationReport
 
 # Lade Umgebungsvariablen (z. B. API-Schlüssel)
 load_dotenv()
@@ -22,8 +27,129 @@ API_URL = os.getenv("API_URL_NORM")
 
 llm = CustomChatModel(model="GPT-4o")
 
+# Cache für geparste Dateien (Feather, nach Inhalts-Hash), damit Wiederholungen nicht neu parsen
+parse_cache = ParsedFileCache(
+    cache_dir=os.getenv("PARSE_CACHE_DIR"),
+    max_bytes=int(os.getenv("PARSE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+)
+
 # Initialisiere DataChecker, um CSV-Daten mit Checks und API zu prüfen
-data_checker = DataChecker(api_url=API_URL, client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
+data_checker = DataChecker(api_url=API_URL, client_id=CLIENT_ID, client_secret=CLIENT_SECRET, parse_cache=parse_cache)
+
+# Ab dieser Dateigröße wird im Streaming-Modus (blockweise) geprüft
+STREAMING_THRESHOLD_BYTES = streaming_threshold_bytes()
+STREAMING_CHUNK_SIZE = int(os.getenv("VALIDATION_CHUNK_SIZE", "100000"))
+
+# Einträge in check_results, die Metadaten statt Prüfergebnisse enthalten
+CHECK_METADATA_KEYS = {"dialect", "date_ranges", "metrics", "validation_mode", "mlfb_unchecked", "mlfb_prefilter"}
+
+# Dateien über STREAMING_THRESHOLD_BYTES als Pipeline prüfen (Einlesen, lokale Checks und MLFB-Anfragen
+# überlappend); 0 = blockweise nacheinander
+VALIDATION_PIPELINE = os.getenv("VALIDATION_PIPELINE", "1") == "1"
+
+# Anzahl Prozesse für die lokalen Checks (1 = ohne Prozess-Pool)
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(os.cpu_count() or 1)))
+
+# Prüfmodus: full, capped (erste N Verstöße je Regel) oder sample (hochgerechnete Fehlerquoten).
+# Nach einer Schnellprüfung läuft die vollständige Prüfung im Hintergrund.
+VALIDATION_MODE = os.getenv("VALIDATION_MODE", "full")
+QUICK_MAX_VIOLATIONS = int(os.getenv("VALIDATION_MAX_VIOLATIONS", "1000"))
+QUICK_MAX_ROWS = int(os.getenv("VALIDATION_QUICK_MAX_ROWS", "500000"))
+QUICK_SAMPLE_ROWS = int(os.getenv("VALIDATION_SAMPLE_ROWS", "20000"))
+
+# Fertige, noch nicht abgeholte Hintergrundprüfungen, die höchstens im Speicher bleiben (älteste werden verworfen)
+MAX_BACKGROUND_CHECKS = int(os.getenv("VALIDATION_MAX_BACKGROUND_CHECKS", "4"))
+
+_background_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="full-validation")
+_background_checks: dict = {}
+
+
+def _file_signature(file_path: str) -> list:
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _stored_report(state: State, file_path: str):
+
+    """
+    Liefert den im State abgelegten Report, wenn er zu genau dieser Datei (Pfad, Größe, Änderungszeit) gehört.
+    """
+
+    validation_state = state.get("validation_state") or {}
+    if validation_state.get("file_path") != file_path or not os.path.exists(file_path):
+        return None
+    if validation_state.get("signature") != _file_signature(file_path):
+        return None
+    return ValidationReport.from_state(data_checker.plan, validation_state["report"])
+
+
+def _full_report(file_path: str):
+
+    """
+    Vollständige Prüfung einer Datei (große Dateien blockweise bzw. als Pipeline). None bei einer leeren Datei.
+    """
+
+    if os.path.exists(file_path) and os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES:
+        if VALIDATION_PIPELINE:
+            # Neue Nummern gehen schon während des Einlesens an die Norm-API, die Blöcke in den Parse-Cache
+            return data_checker.validate_file_pipelined(file_path, chunk_size=STREAMING_CHUNK_SIZE,
+                                                        workers=VALIDATION_WORKERS)
+        # Große Dateien blockweise prüfen, damit der Speicherbedarf konstant bleibt
+        return data_checker.validate_file_streaming(file_path, chunk_size=STREAMING_CHUNK_SIZE)
+    df = data_checker.read_csv_file(file_path)
+    # Starte alle definierten Checks (lokale Checks in einem gemeinsamen Durchlauf)
+    return data_checker.validate_frame(df, workers=VALIDATION_WORKERS) if len(df) else None
+
+
+def _quick_report(file_path: str, mode: str):
+    if mode == "capped":
+        return data_checker.validate_file_streaming(file_path, chunk_size=STREAMING_CHUNK_SIZE,
+                                                    max_violations=QUICK_MAX_VIOLATIONS, max_rows=QUICK_MAX_ROWS)
+    return data_checker.validate_file_sample(file_path, sample_rows=QUICK_SAMPLE_ROWS)
+
+
+def _is_partial(report: ValidationReport) -> bool:
+    mode = report.metadata.get("validation_mode") or {}
+    return mode.get("complete") is False or mode.get("exact") is False
+
+
+def _start_background_check(file_path: str):
+    future = _background_checks.get(file_path)
+    if future is not None and not future.done():
+        return
+    _background_checks.pop(file_path, None)
+    # Laufende Prüfungen bleiben, von den fertigen nur die neuesten (Dict in Startreihenfolge)
+    finished = [path for path, future in _background_checks.items() if future.done()]
+    for path in finished[:max(0, len(finished) - MAX_BACKGROUND_CHECKS + 1)]:
+        _background_checks.pop(path, None)
+    signature = _file_signature(file_path)
+    _background_checks[file_path] = _background_pool.submit(lambda: (signature, _full_report(file_path)))
+
+
+def _background_report(file_path: str):
+
+    """
+    Ergebnis der vollständigen Hintergrundprüfung, falls fertig und die Datei seitdem unverändert ist.
+    Eine fertige Prüfung wird dabei entfernt: der Report landet im validation_state, bzw. ist veraltet.
+    """
+
+    future: Future = _background_checks.get(file_path)
+    if future is None or not future.done():
+        return None
+    _background_checks.pop(file_path, None)
+    if future.exception() is not None:
+        return None
+    signature, report = future.result()
+    return report if os.path.exists(file_path) and signature == _file_signature(file_path) else None
+
+
+def _validation_state(file_path: str, report: ValidationReport, revalidated: bool = False) -> dict:
+    return {
+        "file_path": file_path,
+        "signature": _file_signature(file_path),
+        "report": report.to_state(),
+        "revalidated": revalidated,
+    }
 
 
 def check_data_node(state: State):
@@ -37,43 +163,55 @@ def check_data_node(state: State):
             "__routing__": "end"
         }
 
-    file_path = state.get("file_path")
+    file_path = state.get("improved_file_path") or state.get("file_path")
     if not file_path:
         return {
             "messages": state["messages"] + [AIMessage(content="Ich habe keine Datei zum Prüfen. Bitte laden Sie zuerst eine Datei hoch.")],
             "__routing__": "end"
         }
 
-    try:
-        df = data_checker.read_csv_file(file_path)
-    except RuntimeError as e:
-        return {
-            "messages": state["messages"] + [AIMessage(content=f"❌ Fehler beim Einlesen der Datei: {str(e)}")],
-            "__routing__": "end"
-        }
-
-    if df.empty:
+    # Nach Korrekturen wurde der Report bereits inkrementell nachgeführt: kein erneutes Einlesen nötig
+    report = _stored_report(state, file_path)
+    metrics = MetricsRecorder()
+    if report is not None and (state.get("validation_state") or {}).get("revalidated"):
+        print(f"[DEBUG] Verwende nachgeführten Prüfbericht für {file_path}")
+    else:
+        mode = state.get("validation_mode") or VALIDATION_MODE
+        report = _background_report(file_path) if mode != "full" else None
+        try:
+            # Zeit, Speicher und API-Aufrufe je Stufe landen in check_results["metrics"]
+            with metrics:
+                if report is not None:
+                    print(f"[DEBUG] Verwende vollständige Hintergrundprüfung für {file_path}")
+                elif mode in ("capped", "sample"):
+                    # Schnelle erste Antwort, die vollständige Prüfung folgt im Hintergrund
+                    report = _quick_report(file_path, mode)
+                    if report is not None and _is_partial(report):
+                        _start_background_check(file_path)
+                else:
+                    report = _full_report(file_path)
+        except RuntimeError as e:
+            return {
+                "messages": state["messages"] + [AIMessage(content=f"❌ Fehler beim Einlesen der Datei: {str(e)}")],
+                "__routing__": "end"
+            }
+
+    if report is None or report.n_rows == 0:
         return {
             "messages": state["messages"] + [AIMessage(content="❌ Fehler: Die Datei ist leer.")],
             "__routing__": "end"
         }
 
-    # Starte alle definierten Checks
-    general_results = data_checker.check_general_data(df)
-    mlfb_results = data_checker.check_mlfb_numbers(df)
-    distributor_results = data_checker.check_distributor_data(df)
-    customer_results = data_checker.check_customer_data(df)
-    financial_results = data_checker.check_financial_data(df)
-
-    # Sammle alle Ergebnisse
-    all_results = {
-        "general": general_results,
-        "mlfb": mlfb_results,
-        "distributor": distributor_results,
-        "customer": customer_results,
-        "financial": financial_results
-    }
-    
+    all_results = data_checker.report_results(report)
+    if metrics.stages:
+        all_results["metrics"] = metrics.to_dict()
+
+    general_results = all_results["general"]
+    mlfb_results = all_results["mlfb"]
+    distributor_results = all_results["distributor"]
+    customer_results = all_results["customer"]
+    financial_results = all_results["financial"]
+
     summary = []
 
     if mlfb_results:
@@ -108,13 +246,20 @@ def check_data_node(state: State):
     if not summary:
         summary.append("✅ Alle Daten sind gültig.")
 
+    partial = _is_partial(report)
+    if partial:
+        summary.append("⏳ Schnellprüfung (gekappt bzw. Stichprobe). Die vollständige Prüfung läuft im Hintergrund "
+                       "und steht bei der nächsten Prüfung dieser Datei bereit.")
+
     summary_text = "\n".join(summary)
 
     return {
         "check_results": all_results,
+        # Unvollständige Reports eignen sich nicht für die inkrementelle Nachprüfung
+        "validation_state": None if partial else _validation_state(file_path, report),
         "last_action": "CHECK",
         "technical_summary": summary_text,
-        "file_checked": True,
+        "file_checked": not partial,
         "__routing__": "generate_response"
     }
 
@@ -235,11 +380,19 @@ def apply_updates_node(state: State):
             "__routing__": "end"
         }
 
-    df = pd.read_csv(file_path)
+    try:
+        df = data_checker.read_csv_file(file_path)
+    except RuntimeError as e:
+        return {
+            "messages": state["messages"] + [AIMessage(content=f"❌ Fehler beim Einlesen der Datei: {str(e)}")],
+            "__routing__": "end"
+        }
 
     check_results = state.get("check_results", {})
     summary = "Hier sind die gefundenen Probleme:\n"
     for category, results in check_results.items():
+        if category in CHECK_METADATA_KEYS:
+            continue
         summary += f"🛠 {category.capitalize()}:\n"
         if isinstance(results, dict):
             for key, values in results.items():
@@ -286,12 +439,22 @@ Erstelle eine Liste von Aktualisierungen **AUSSCHLIESSLICH** basierend auf der B
             ]
         }
     print(updates)
+    # Vorherigen Prüfstand holen, bevor df verändert wird (gehört zur gelesenen Datei)
+    report = _stored_report(state, file_path)
+
+    touched = {}
+    previous = {}
     for update in updates:
         row_idx = update.row
         column = update.column
         new_value = update.new_value
-        if column in df.columns and 0 <= row_idx < len(df):
-            df.at[row_idx, column] = new_value
+        if column in df.columns and row_idx in df.index:
+            if column == "VENDOR_ITEM_NUMBER":
+                # Alte Nummer für die dateiweiten MLFB-Zähler im Report
+                previous.setdefault(row_idx, df.at[row_idx, column])
+            # Leere Werte stehen nach dem Schreiben/Einlesen als NaN in der Datei, also auch hier
+            set_cell(df, row_idx, column, new_value if new_value != "" else np.nan)
+            touched.setdefault(row_idx, set()).add(column)
 
     original_path = state.get("file_path")
     dir_name, file_name = os.path.split(original_path)
@@ -301,7 +464,19 @@ Erstelle eine Liste von Aktualisierungen **AUSSCHLIESSLICH** basierend auf der B
     # Schreibe die CSV-Datei mit den korrekten Parametern, um die Konsistenz zu gewährleisten
     df.to_csv(new_file_path, index=False, sep=";", encoding="utf-8-sig")
 
+    result = {}
+    if report is not None:
+        # Nur geänderte Zellen neu prüfen; die neue Datei ist ohne Index geschrieben, Zeilen laufen also ab 0
+        with MetricsRecorder() as metrics:
+            report = data_checker.revalidate(report, df, touched, previous).relabel(df.index)
+        report.metadata["dialect"] = sniff_csv_dialect(new_file_path).to_dict()
+        result = {
+            "check_results": {**data_checker.report_results(report), "metrics": metrics.to_dict()},
+            "validation_state": _validation_state(new_file_path, report, revalidated=True),
+        }
+
     return {
+        **result,
         "last_action": "IMPROVE",
         "messages": state["messages"] + [
             AIMessage(content=f"✅ Verbesserungen angewendet und neue Datei gespeichert unter: {new_file_path}")
@@ -23,6 +23,8 @@ class State(TypedDict):
     # 3. Validation Results
     check_results: Optional[Dict[str, Any]]  # Results from data checks
     technical_summary: Optional[str]  # Technical summary from data check
+    validation_state: Optional[Dict[str, Any]]  # Compact check state of the last checked/fixed file (for delta re-validation)
+    validation_mode: Optional[str]  # 'full', 'capped' (first N violations per rule) or 'sample' (estimated error rates)
 
     # 4. Action Control
     next_action: Optional[str]  # Next action from determine_next_step
@@ -0,0 +1,340 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.resilient_batching import is_error_result
+
+from imc_agents.utils.data_checker import (DEFAULT_CHUNK_SIZE, DataChecker, MlfbLookupPipeline, lookup_mlfb_numbers,
+                                           mlfb_outcome_from_results, streaming_threshold_bytes)
+from imc_agents.utils.instrumentation import MetricsRecorder
+from imc_agents.utils.parallel_validation import process_context
+from imc_agents.utils.row_sets import Violation
+from imc_agents.utils.validation_rules import RuleOutcome, ValidationReport
+
+# Nummern je API-Anfrage (wie im ProductNumberCheckServiceImpl)
+API_BATCH_SIZE = 100
+# Parallele API-Anfragen, damit die Norm-API ausgelastet bleibt
+DEFAULT_API_THREADS = int(os.getenv("BATCH_API_THREADS", "8"))
+
+SUMMARY_FILE_NAME = "summary.json"
+
+
+class SharedMlfbCache:
+
+    """
+    Gemeinsamer MLFB-Cache für alle Dateien eines Batch-Laufs (Nummer -> System laut Norm-API).
+
+    Fehlende Nummern werden in Batches parallel nachgeschlagen. Wird eine Nummer bereits für eine
+    andere Datei abgefragt, wartet der Aufrufer auf diese Anfrage statt sie erneut zu senden.
+    Nicht prüfbare Nummern (API-Fehler) werden nicht gecacht, spätere Dateien fragen sie erneut an.
+    """
+
+    def __init__(self, service: ProductNumberCheckService, executor: ThreadPoolExecutor,
+                 batch_size: int = API_BATCH_SIZE):
+        self.service = service
+        self.executor = executor
+        self.batch_size = batch_size
+        self.systems: Dict[str, Optional[str]] = {}
+        self.errors: Dict[str, Dict[str, Any]] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.api_batches = 0
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, numbers: List[str]):
+        try:
+            results = self.service.validate_product_numbers_batch(numbers)
+            with self._lock:
+                for number, result in zip(numbers, results):
+                    if is_error_result(result):
+                        self.errors[number] = result["error"]
+                    else:
+                        self.systems[number] = (result.get("output") or {}).get("system")
+                        self.errors.pop(number, None)
+        finally:
+            with self._lock:
+                for number in numbers:
+                    self._pending.pop(number, None)
+
+    def lookup(self, numbers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+
+        """
+        API-Ergebnis je Nummer in der Form der API-Antwort (bei Fehlern mit 'error').
+        """
+
+        numbers = list(numbers)
+        with self._lock:
+            self.lookups += len(numbers)
+            missing = [number for number in numbers if number not in self.systems and number not in self._pending]
+            self.hits += len(numbers) - len(missing)
+            for i in range(0, len(missing), self.batch_size):
+                batch = missing[i:i + self.batch_size]
+                future = self.executor.submit(self._fetch, batch)
+                self.api_batches += 1
+                for number in batch:
+                    self._pending[number] = future
+            waiting = {self._pending[number] for number in numbers if number in self._pending}
+
+        for future in waiting:
+            future.result()
+        with self._lock:
+            return {number: {"output": {"system": self.systems[number]}} if number in self.systems
+                    else {"output": {"system": None}, "error": self.errors.get(number)}
+                    for number in numbers}
+
+    def stats(self) -> Dict[str, int]:
+        return {"lookups": self.lookups, "hits": self.hits, "api_batches": self.api_batches,
+                "cached_numbers": len(self.systems), "unchecked_numbers": len(self.errors)}
+
+
+class _OfflineProductService(ProductNumberCheckService):
+
+    """
+    Platzhalter in den Worker-Prozessen: MLFB-Nummern werden dort nur gesammelt, nie abgefragt.
+    """
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        raise RuntimeError("MLFB-Abfragen laufen im Batch-Modus nur im Hauptprozess")
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        raise RuntimeError("MLFB-Abfragen laufen im Batch-Modus nur im Hauptprozess")
+
+
+_worker_checker: Optional[DataChecker] = None
+
+
+def _init_worker():
+    global _worker_checker
+    _worker_checker = DataChecker("", "", "", product_service=_OfflineProductService())
+
+
+def _validate_local(file_path: str, streaming_threshold: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+
+    """
+    Worker: liest die Datei, führt die lokalen Checks aus und sammelt die MLFB-Nummern
+    (faktorisiert: eindeutige Nummern plus Code je Zeile), damit der Hauptprozess sie gesammelt prüft.
+    Dateien über streaming_threshold Bytes werden wie im Agenten blockweise gelesen und geprüft.
+    """
+
+    try:
+        with MetricsRecorder() as metrics:
+            if os.path.getsize(file_path) > streaming_threshold:
+                collector = MlfbLookupPipeline(None)
+                report = _worker_checker.validate_file_pipelined(file_path, chunk_size, mlfb_lookup=collector)
+                items = collector.items()
+            else:
+                df = _worker_checker.read_csv_file(file_path)
+                report = _worker_checker.validate_frame(df, mlfb=False) if len(df) else None
+                items = _worker_checker.mlfb_items(df)
+                if items is not None:
+                    codes, uniques = pd.factorize(items.to_numpy(dtype=object))
+                    items = (items.index.to_numpy(dtype=np.int64), codes, [str(u) for u in uniques])
+            if report is None or not report.n_rows:
+                return {"file_path": file_path, "error": "Die Datei ist leer."}
+    except Exception as e:
+        return {"file_path": file_path, "error": str(e)}
+
+    return {
+        "file_path": file_path,
+        "n_rows": report.n_rows,
+        "outcomes": report.raw_outcomes(),
+        "metadata": report.metadata,
+        "metrics": metrics.to_dict(),
+        "items": items,
+    }
+
+
+def _mlfb_outcome(items, cache: SharedMlfbCache, metadata: Dict[str, Any]) -> Optional[RuleOutcome]:
+    if items is None:
+        return None
+    labels, codes, uniques = items
+    if not len(labels):
+        return RuleOutcome(Violation.empty(), 0)
+
+    def validate(numbers: List[str]) -> List[Dict[str, Any]]:
+        results = cache.lookup(numbers)
+        return [results[number] for number in numbers]
+
+    return mlfb_outcome_from_results(labels, codes, uniques, lookup_mlfb_numbers(uniques, validate), metadata)
+
+
+def issue_counts(report: ValidationReport) -> Dict[str, Dict[str, int]]:
+
+    """
+    Betroffene Zeilen je Kategorie und Regel (für die Übersicht über alle Dateien).
+    """
+
+    counts = {}
+    for category, entries in report.outcomes.items():
+        for rule, outcome in entries:
+            if isinstance(outcome, RuleOutcome):
+                n = len(outcome.violation)
+            elif hasattr(outcome, "duplicates"):
+                n = len(outcome.duplicates())
+            else:
+                continue
+            if n:
+                counts.setdefault(category, {})[rule.key or category] = n
+    return counts
+
+
+def _report_name(file_path: str, root: str) -> str:
+    relative = os.path.relpath(os.path.abspath(file_path), root)
+    return os.path.splitext(relative)[0].replace(os.sep, "__") + ".json"
+
+
+def _write_json(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def _finalize(checker: DataChecker, local: Dict[str, Any], cache: SharedMlfbCache, output_path: str) -> Dict[str, Any]:
+    entry = {"file": local["file_path"], "report": output_path}
+    if "error" in local:
+        entry.update(status="error", error=local["error"])
+        _write_json(output_path, {"file": local["file_path"], "status": "error", "error": local["error"]})
+        return entry
+
+    start = time.perf_counter()
+    report = ValidationReport.from_outcomes(checker.plan, local["n_rows"], local["outcomes"])
+    report.metadata.update(local["metadata"])
+    try:
+        report.add(checker.plan.rule("mlfb", None), _mlfb_outcome(local["items"], cache, report.metadata))
+    except Exception as e:
+        entry.update(status="error", error=f"MLFB-Prüfung fehlgeschlagen: {e}")
+        _write_json(output_path, {"file": local["file_path"], "status": "error", "error": entry["error"]})
+        return entry
+
+    counts = issue_counts(report)
+    entry.update(status="issues" if counts else "ok", rows=report.n_rows, issues=counts,
+                 mlfb_seconds=round(time.perf_counter() - start, 4))
+    if "mlfb_unchecked" in report.metadata:
+        entry["mlfb_unchecked"] = report.metadata["mlfb_unchecked"]["numbers"]
+    _write_json(output_path, {
+        "file": local["file_path"],
+        "status": entry["status"],
+        "rows": report.n_rows,
+        "issues": counts,
+        "check_results": checker.report_results(report),
+        "metrics": local["metrics"],
+    })
+    return entry
+
+
+def _persistent_cache_stats(service: ProductNumberCheckService) -> Optional[Dict[str, int]]:
+    stats = getattr(service, "stats", None)
+    return stats() if callable(stats) else None
+
+
+def collect_files(inputs: Iterable[str], pattern: str = "*.csv", recursive: bool = False) -> List[str]:
+
+    """
+    Verzeichnisse (Dateien nach pattern, optional rekursiv) und Glob-Muster zu einer sortierten Dateiliste.
+    """
+
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            search = os.path.join(item, "**", pattern) if recursive else os.path.join(item, pattern)
+            files.update(glob.glob(search, recursive=recursive))
+        else:
+            files.update(glob.glob(item, recursive=recursive))
+    return sorted(os.path.abspath(path) for path in files if os.path.isfile(path))
+
+
+def run_batch(files: List[str], output_dir: str, checker: DataChecker, workers: Optional[int] = None,
+              api_threads: int = DEFAULT_API_THREADS, streaming_threshold: Optional[int] = None,
+              chunk_size: Optional[int] = None) -> Dict[str, Any]:
+
+    """
+    Prüft alle Dateien: Einlesen und lokale Checks in einem Prozess-Pool (alle Kerne), die MLFB-Nummern
+    aller Dateien über einen gemeinsamen Cache mit parallelen API-Anfragen. Schreibt je Datei einen
+    JSON-Report nach output_dir sowie eine Übersicht (summary.json) und gibt die Übersicht zurück.
+    Dateien über streaming_threshold Bytes lesen die Worker in Blöcken zu chunk_size Zeilen (Standard jeweils wie
+    im Agenten: VALIDATION_STREAMING_THRESHOLD_MB, VALIDATION_CHUNK_SIZE).
+    """
+
+    workers = workers or os.cpu_count() or 1
+    if streaming_threshold is None:
+        streaming_threshold = streaming_threshold_bytes()
+    chunk_size = chunk_size or int(os.getenv("VALIDATION_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+    os.makedirs(output_dir, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(path) for path in files]) if files else output_dir
+
+    start = time.perf_counter()
+    entries = []
+    with ThreadPoolExecutor(api_threads, thread_name_prefix="mlfb-api") as api_pool, \
+            ThreadPoolExecutor(workers, thread_name_prefix="finalize") as finalize_pool, \
+            ProcessPoolExecutor(workers, mp_context=process_context(), initializer=_init_worker) as process_pool:
+        cache = SharedMlfbCache(checker.product_service, api_pool)
+        local_futures = [process_pool.submit(_validate_local, path, streaming_threshold, chunk_size)
+                         for path in files]
+        finalize_futures = []
+        # Sobald eine Datei lokal geprüft ist, laufen ihre MLFB-Abfragen, während die Worker weiterlesen
+        for future in as_completed(local_futures):
+            local = future.result()
+            output_path = os.path.join(output_dir, _report_name(local["file_path"], root))
+            finalize_futures.append(finalize_pool.submit(_finalize, checker, local, cache, output_path))
+        for future in finalize_futures:
+            entry = future.result()
+            print(f"[DEBUG] {entry['file']}: {entry['status']}")
+            entries.append(entry)
+
+    entries.sort(key=lambda entry: entry["file"])
+    statuses = [entry["status"] for entry in entries]
+    summary = {
+        "files": len(entries),
+        "ok": statuses.count("ok"),
+        "with_issues": statuses.count("issues"),
+        "errors": statuses.count("error"),
+        "rows": sum(entry.get("rows", 0) for entry in entries),
+        "seconds": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "api_threads": api_threads,
+        "mlfb_cache": cache.stats(),
+        "mlfb_persistent_cache": _persistent_cache_stats(checker.product_service),
+        "results": entries,
+    }
+    _write_json(os.path.join(output_dir, SUMMARY_FILE_NAME), summary)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prüft viele POS-Dateien ohne Chat/LLM (Batch-Modus)")
+    parser.add_argument("inputs", nargs="+", help="Verzeichnisse oder Glob-Muster (z. B. 'drops/*.csv')")
+    parser.add_argument("-o", "--output-dir", default="validation_reports")
+    parser.add_argument("--pattern", default="*.csv", help="Dateimuster innerhalb von Verzeichnissen")
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse für Einlesen/Prüfen (Standard: alle Kerne)")
+    parser.add_argument("--api-threads", type=int, default=DEFAULT_API_THREADS, help="Parallele Anfragen an die Norm-API")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.pattern, args.recursive)
+    if not files:
+        print("[ERROR] Keine Dateien gefunden")
+        return 2
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    checker = DataChecker(api_url=os.getenv("API_URL_NORM"), client_id=os.getenv("CLIENT_ID_NORM"),
+                          client_secret=os.getenv("CLIENT_SECRET_NORM"))
+    summary = run_batch(files, args.output_dir, checker, args.workers, args.api_threads)
+    print(f"[DEBUG] {summary['files']} Dateien, {summary['with_issues']} mit Befunden, "
+          f"{summary['errors']} Fehler, {summary['seconds']} s")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.product_number_check_service_impl import ProductNumberCheckServiceImpl
+from imc_norm.token_manager import OidcTokenManager
+
+from imc_agents.benchmarks.norm_api_stub import NormApiStub, NormApiStubConfig
+from imc_agents.benchmarks.run_benchmarks import parse_size
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService, build_profile
+from imc_agents.utils.data_checker import DataChecker
+
+DEFAULT_CONCURRENCY = "1,4,8,16"
+DEFAULT_BATCH_SIZES = "25,50,100"
+
+
+def synthetic_numbers(n: int, known_numbers: List[str], seed: int = 0) -> List[str]:
+
+    """
+    n unterschiedliche Nummern: zuerst bekannte (gültige), dann zufällige MLFB im gültigen Schema
+    (bestehen die Offline-Vorprüfung, sind der Norm-API aber unbekannt).
+    """
+
+    rng = np.random.default_rng(seed)
+    numbers = list(dict.fromkeys(sorted(known_numbers)))[:n]
+    seen = set(numbers)
+    letters = np.array(list("ABCDEFGHJKLMNPQRSTUVWXYZ"))
+    while len(numbers) < n:
+        d = rng.integers(0, 10, 8)
+        a = letters[rng.integers(0, len(letters), 4)]
+        number = f"6ES7{d[0]}{d[1]}{d[2]}-{d[3]}{a[0]}{a[1]}{d[4]}{d[5]}-{d[6]}{a[2]}{a[3]}{d[7]}"
+        if number not in seen:
+            seen.add(number)
+            numbers.append(number)
+    return numbers
+
+
+def make_service(stub: NormApiStub, concurrency: int, batch_size: int) -> ProductNumberCheckService:
+    token_manager = OidcTokenManager("load-test", "load-test", token_url=stub.token_url)
+    if concurrency <= 1:
+        return ProductNumberCheckServiceImpl(stub.api_url, "load-test", "load-test",
+                                             token_manager=token_manager, batch_size=batch_size)
+    from imc_norm.async_product_number_check_service_impl import AsyncProductNumberCheckServiceImpl
+    return AsyncProductNumberCheckServiceImpl(stub.api_url, "load-test", "load-test", max_concurrency=concurrency,
+                                              batch_size=batch_size, token_manager=token_manager)
+
+
+def run_scenario(stub: NormApiStub, df: pd.DataFrame, concurrency: int, batch_size: int,
+                 runs: int = 3) -> Dict[str, Any]:
+
+    """
+    Misst DataChecker.check_mlfb_numbers gegen den Stand-in (runs Durchläufe nach einem Token-Abruf).
+    Durchsatz in Nummern (nach Deduplizierung) bzw. Zeilen je Sekunde, Antwortzeiten serverseitig.
+    """
+
+    service = make_service(stub, concurrency, batch_size)
+    checker = DataChecker("", "", "", product_service=service)
+    distinct = int(df["VENDOR_ITEM_NUMBER"].nunique())
+    try:
+        service.validate_product_numbers_batch([str(df["VENDOR_ITEM_NUMBER"].iloc[0])])
+        stub.reset_stats()
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            checker.check_mlfb_numbers(df)
+            durations.append(time.perf_counter() - start)
+    finally:
+        close = getattr(service, "close", None)
+        if close is not None:
+            close()
+
+    server = stub.stats()
+    total = sum(durations)
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "rows": len(df),
+        "distinct_numbers": distinct,
+        "seconds": {"min": round(min(durations), 4), "median": round(float(np.median(durations)), 4),
+                    "max": round(max(durations), 4)},
+        "numbers_per_second": round(distinct * runs / total, 1),
+        "rows_per_second": round(len(df) * runs / total, 1),
+        "requests_per_run": round(server["requests"] / runs, 1),
+        "statuses": server["statuses"],
+        "max_in_flight": server["max_in_flight"],
+        "request_latency_seconds": server["latency_seconds"],
+    }
+
+
+def run(rows: int, distinct: int, concurrency: List[int], batch_sizes: List[int], config: NormApiStubConfig,
+        runs: int = 3, seed: int = 0) -> Dict[str, Any]:
+    known_numbers = sorted(SyntheticProductNumberService.from_profiles(build_profile()).known_numbers)
+    numbers = synthetic_numbers(distinct, known_numbers, seed)
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": np.asarray(numbers, dtype=object)[rng.integers(0, len(numbers), rows)]})
+
+    scenarios = []
+    with NormApiStub(known_numbers, config) as stub:
+        for batch_size in batch_sizes:
+            for workers in concurrency:
+                print(f"[DEBUG] Szenario: {workers} gleichzeitig, Batches à {batch_size}")
+                scenarios.append(run_scenario(stub, df, workers, batch_size, runs))
+    return {"stub": config.to_dict(), "rows": rows, "distinct_numbers": distinct, "runs": runs,
+            "scenarios": scenarios}
+
+
+def format_table(result: Dict[str, Any]) -> str:
+    lines = [f"{'gleichz.':>8} {'Batch':>6} {'Median s':>9} {'Nr./s':>9} {'Anfr./Lauf':>10} "
+             f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7}  Status"]
+    for scenario in result["scenarios"]:
+        latency = scenario["request_latency_seconds"]
+        lines.append(f"{scenario['concurrency']:>8} {scenario['batch_size']:>6} {scenario['seconds']['median']:>9} "
+                     f"{scenario['numbers_per_second']:>9} {scenario['requests_per_run']:>10} "
+                     f"{latency['p50']:>7} {latency['p95']:>7} {latency['p99']:>7}  {scenario['statuses']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lasttest der MLFB-Prüfung gegen den lokalen Norm-API-Stand-in")
+    parser.add_argument("--rows", default="100k", help="Zeilen der geprüften Spalte (z. B. 100k)")
+    parser.add_argument("--distinct", default="20k", help="Unterschiedliche Nummern darin")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="Gleichzeitige Anfragen, kommagetrennt")
+    parser.add_argument("--batch-sizes", default=DEFAULT_BATCH_SIZES, help="Max. Nummern je Anfrage, kommagetrennt")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--latency-per-item-ms", type=float, default=0.5)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil der Anfragen mit 503")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Anfragen je Sekunde (0 = unbegrenzt)")
+    parser.add_argument("--max-batch-size", type=int, default=100, help="Größere Anfragen beantwortet der Stand-in mit 413")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON schreiben")
+    args = parser.parse_args(argv)
+
+    config = NormApiStubConfig(args.latency_ms / 1000, args.latency_per_item_ms / 1000, args.jitter_ms / 1000,
+                               args.error_rate, args.rate_limit or None, args.max_batch_size, seed=args.seed)
+    result = run(parse_size(args.rows), parse_size(args.distinct),
+                 [int(value) for value in args.concurrency.split(",") if value],
+                 [int(value) for value in args.batch_sizes.split(",") if value], config, args.runs, args.seed)
+    print(format_table(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
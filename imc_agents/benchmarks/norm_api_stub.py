@@ -0,0 +1,254 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService, build_profile
+
+TOKEN_PATH = "/oauth2/v2.0/token"
+VALIDATE_PATH = "/validate"
+
+
+class NormApiStubConfig:
+
+    """
+    Verhalten des Stand-ins: Antwortzeit (fix + je Nummer + zufälliger Jitter), Anteil fehlschlagender
+    Anfragen (503), Ratenlimit (429 mit Retry-After), maximale Batch-Größe (413) und Token-Laufzeit.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, latency_per_item_seconds: float = 0.0005,
+                 jitter_seconds: float = 0.01, error_rate: float = 0.0, rate_limit_per_second: Optional[float] = None,
+                 max_batch_size: int = 100, token_ttl_seconds: int = 3600, seed: Optional[int] = None):
+        self.latency_seconds = latency_seconds
+        self.latency_per_item_seconds = latency_per_item_seconds
+        self.jitter_seconds = jitter_seconds
+        self.error_rate = error_rate
+        self.rate_limit_per_second = rate_limit_per_second
+        self.max_batch_size = max_batch_size
+        self.token_ttl_seconds = token_ttl_seconds
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class _RateLimiter:
+
+    # Token-Bucket: rate Anfragen je Sekunde, Bursts bis rate
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class NormApiStub:
+
+    """
+    Lokaler Ersatz für Token-Endpunkt (Client Credentials) und Batch-Prüfung der Norm-API, z. B. für
+    Lasttests ohne Siemens-/Azure-AD-Zugriff. Nummern aus known_numbers gelten als gültig ('MLFB').
+    Läuft in einem Hintergrund-Thread: 'with NormApiStub(...) as stub:' und stub.api_url/stub.token_url
+    an die Clients übergeben.
+    """
+
+    def __init__(self, known_numbers: Iterable[str], config: Optional[NormApiStubConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.config = config or NormApiStubConfig()
+        self.lookup = SyntheticProductNumberService(known_numbers)
+        self.rng = random.Random(self.config.seed)
+        self.limiter = _RateLimiter(self.config.rate_limit_per_second) if self.config.rate_limit_per_second else None
+        self.tokens: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.status_counts: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.items = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return self.base_url + VALIDATE_PATH
+
+    @property
+    def token_url(self) -> str:
+        return self.base_url + TOKEN_PATH
+
+    def start(self) -> "NormApiStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="norm-api-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "NormApiStub":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+
+        """
+        Zähler seit dem Start bzw. letzten reset_stats(): Anfragen je Status, geprüfte Nummern,
+        maximale gleichzeitige Anfragen und serverseitige Antwortzeiten (Perzentile in Sekunden).
+        """
+
+        with self.lock:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "requests": sum(self.status_counts.values()),
+                "statuses": dict(self.status_counts),
+                "items": self.items,
+                "max_in_flight": self.max_in_flight,
+                "latency_seconds": {f"p{p}": round(float(np.percentile(latencies, p)), 4) for p in (50, 95, 99)},
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.status_counts = {}
+            self.latencies = []
+            self.items = 0
+            self.max_in_flight = 0
+
+    def _record(self, status: int, seconds: float, items: int = 0):
+        with self.lock:
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+            self.latencies.append(seconds)
+            self.items += items
+
+    def _token(self) -> Dict[str, Any]:
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.time() + self.config.token_ttl_seconds
+        return {"token_type": "Bearer", "access_token": token, "expires_in": self.config.token_ttl_seconds}
+
+    def _authorized(self, header: Optional[str]) -> bool:
+        token = (header or "").removeprefix("Bearer ")
+        with self.lock:
+            return self.tokens.get(token, 0) > time.time()
+
+    def _validate(self, authorization: Optional[str], body: bytes) -> tuple:
+        if not self._authorized(authorization):
+            return 401, {"error": "invalid_token"}, {}
+        if self.limiter is not None and not self.limiter.acquire():
+            return 429, {"error": "rate limit exceeded"}, {"Retry-After": "1"}
+        try:
+            numbers = json.loads(body)
+        except ValueError:
+            return 400, {"error": "invalid JSON"}, {}
+        if not isinstance(numbers, list) or not all(isinstance(number, str) for number in numbers):
+            return 400, {"error": "expected a JSON list of strings"}, {}
+        if len(numbers) > self.config.max_batch_size:
+            return 413, {"error": f"at most {self.config.max_batch_size} numbers per request"}, {}
+
+        config = self.config
+        time.sleep(max(0.0, config.latency_seconds + config.latency_per_item_seconds * len(numbers)
+                       + self.rng.uniform(-config.jitter_seconds, config.jitter_seconds)))
+        if config.error_rate and self.rng.random() < config.error_rate:
+            return 503, {"error": "service unavailable"}, {}
+        return 200, self.lookup.validate_product_numbers_batch(numbers), {}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                start = time.perf_counter()
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                status, items, headers = 500, 0, {}
+                try:
+                    body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                    if self.path == TOKEN_PATH:
+                        form = parse_qs(body.decode())
+                        if form.get("grant_type") == ["client_credentials"] and form.get("client_id"):
+                            status, data = 200, stub._token()
+                        else:
+                            status, data = 400, {"error": "invalid_request"}
+                    elif self.path == VALIDATE_PATH:
+                        status, data, headers = stub._validate(self.headers.get("Authorization"), body)
+                        items = len(data) if status == 200 else 0
+                    else:
+                        status, data = 404, {"error": "not found"}
+                    self._send(status, data, headers)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+                    stub._record(status, time.perf_counter() - start, items)
+
+            def _send(self, status: int, data: Any, headers: Dict[str, str]):
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Kein Zugriffs-Log je Anfrage (würde Lasttests ausbremsen)
+                pass
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Lokaler Stand-in für Token-Endpunkt und Norm-API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--latency-per-item-ms", type=float, default=0.5)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil der Anfragen mit 503")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Anfragen je Sekunde (0 = unbegrenzt)")
+    parser.add_argument("--max-batch-size", type=int, default=100)
+    parser.add_argument("--token-ttl", type=int, default=3600, help="Token-Laufzeit in Sekunden")
+    args = parser.parse_args(argv)
+
+    config = NormApiStubConfig(args.latency_ms / 1000, args.latency_per_item_ms / 1000, args.jitter_ms / 1000,
+                               args.error_rate, args.rate_limit or None, args.max_batch_size, args.token_ttl)
+    known_numbers = SyntheticProductNumberService.from_profiles(build_profile()).known_numbers
+    stub = NormApiStub(known_numbers, config, args.host, args.port)
+    print(f"[DEBUG] Norm-API-Stand-in läuft: API_URL_NORM={stub.api_url} NORM_TOKEN_URL={stub.token_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
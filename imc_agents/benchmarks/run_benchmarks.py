@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService, build_profile, write_pos_file
+from imc_agents.utils.data_checker import DataChecker
+
+DEFAULT_SIZES = [10_000, 100_000]
+# Zeilenzahlen mit Suffix, z. B. 20k oder 1m
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "imc_benchmarks")
+
+# Regression erst, wenn beide Schwellen überschritten sind (relativ und absolut, gegen Messrauschen)
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_BYTES = 8 * 1024 * 1024
+
+CHECK_STEPS = ["check_general_data", "check_mlfb_numbers", "check_distributor_data",
+               "check_customer_data", "check_financial_data"]
+
+
+def parse_size(text: str) -> int:
+    text = text.lower().replace("_", "").strip()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _measure_time(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _measure_memory(func: Callable[[], Any]) -> int:
+
+    """
+    Spitzenbedarf eines Aufrufs: Python/NumPy-Allokationen (tracemalloc) plus zusätzlich
+    belegter Arrow-Speicher (pyarrow-Strings liegen außerhalb von tracemalloc).
+    """
+
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    arrow_delta = max(pa.total_allocated_bytes() - arrow_before, 0)
+    del result
+    return int(peak + arrow_delta)
+
+
+def benchmark_file(checker: DataChecker, file_path: str, repeat: int = 3, memory: bool = True) -> Dict[str, Dict[str, float]]:
+
+    """
+    Misst read_csv_file und jede check_*-Methode einzeln. Zeit ist das Minimum aus repeat Läufen,
+    der Speicher wird in einem eigenen Lauf gemessen (tracemalloc verfälscht die Laufzeit).
+    """
+
+    steps: Dict[str, Callable[[], Any]] = {"read_csv_file": lambda: checker.read_csv_file(file_path)}
+    df = checker.read_csv_file(file_path)
+    for name in CHECK_STEPS:
+        steps[name] = lambda method=getattr(checker, name): method(df)
+
+    results = {}
+    for name, func in steps.items():
+        results[name] = {"seconds": round(_measure_time(func, repeat), 4)}
+        if memory:
+            results[name]["peak_bytes"] = _measure_memory(func)
+        print(f"[DEBUG] {name}: {results[name]}")
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE,
+            with_seconds: bool = True) -> List[str]:
+
+    """
+    Vergleicht zwei Benchmark-Ergebnisse und liefert eine Meldung je Regression.
+    Größen oder Schritte, die nur in einem der beiden vorkommen, werden übersprungen.
+    Mit with_seconds=False nur der Speicher (z. B. bei einer Baseline von anderer Hardware).
+    """
+
+    regressions = []
+    for size, steps in current.get("results", {}).items():
+        for step, metrics in steps.items():
+            base = baseline.get("results", {}).get(size, {}).get(step)
+            if not base:
+                continue
+            for metric, minimum in (("seconds", MIN_REGRESSION_SECONDS), ("peak_bytes", MIN_REGRESSION_BYTES)):
+                if metric not in metrics or metric not in base or (metric == "seconds" and not with_seconds):
+                    continue
+                if metrics[metric] > base[metric] * (1 + tolerance) and metrics[metric] - base[metric] > minimum:
+                    regressions.append(f"{size} Zeilen, {step}: {metric} {base[metric]} -> {metrics[metric]}")
+    return regressions
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(sizes: List[int], data_dir: str = DEFAULT_DATA_DIR, error_rates: Optional[Dict[str, float]] = None,
+        repeat: int = 3, memory: bool = True, seed: int = 0) -> Dict[str, Any]:
+
+    """
+    Erzeugt (falls noch nicht vorhanden) die synthetischen Dateien und misst sie der Größe nach.
+    """
+
+    error_rates = error_rates or {}
+    profiles = build_profile()
+    checker = DataChecker("", "", "", product_service=SyntheticProductNumberService.from_profiles(profiles))
+
+    results = {}
+    for size in sizes:
+        tag = "_".join(f"{col}-{rate}" for col, rate in sorted(error_rates.items())) or "clean"
+        file_path = os.path.join(data_dir, f"pos_{size}_seed{seed}_{tag}.csv".replace("*", "all"))
+        if not os.path.exists(file_path):
+            print(f"[DEBUG] Erzeuge {file_path}")
+            write_pos_file(file_path, size, profiles, error_rates, seed)
+        results[str(size)] = benchmark_file(checker, file_path, repeat, memory)
+
+    return {"environment": _environment(), "error_rates": error_rates, "seed": seed, "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks für Einlesen und Prüfung synthetischer POS-Dateien")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Zeilenzahlen, kommagetrennt (z. B. 10k,100k,1m,10m)")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fehleranteil je Spalte")
+    parser.add_argument("--column-error", action="append", default=[], metavar="SPALTE=ANTEIL",
+                        help="Fehleranteil für eine einzelne Spalte (mehrfach möglich)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.001, help="Anteil doppelter Rechnungspositionen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Speichermessung überspringen")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON schreiben")
+    parser.add_argument("--update-baseline", action="store_true", help="Ergebnis als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    error_rates = {"*": args.error_rate, "DUPLICATES": args.duplicate_rate}
+    for item in args.column_error:
+        column, rate = item.split("=", 1)
+        error_rates[column.upper().strip()] = float(rate)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size]
+    result = run(sizes, args.data_dir, error_rates, args.repeat, not args.no_memory, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"[DEBUG] Baseline gespeichert: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[DEBUG] Keine Baseline unter {args.baseline}, Vergleich übersprungen")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("error_rates") != result["error_rates"]:
+        print("[DEBUG] Baseline wurde mit anderen Fehlerraten erzeugt, Vergleich übersprungen")
+        return 0
+
+    # Laufzeiten sind nur auf gleicher Hardware vergleichbar
+    hardware = ("machine", "cpu_count")
+    same_hardware = all(baseline.get("environment", {}).get(key) == result["environment"][key] for key in hardware)
+    if not same_hardware:
+        print(f"[DEBUG] Baseline auf anderer Hardware erzeugt ({baseline.get('environment')}), nur Speicher verglichen")
+    regressions = compare(result, baseline, args.tolerance, with_seconds=same_hardware)
+    for line in regressions:
+        print(f"[REGRESSION] {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
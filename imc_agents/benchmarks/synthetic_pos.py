@@ -0,0 +1,201 @@
+import codecs
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_agents.utils.csv_dialect import sniff_csv_dialect
+
+# Beispieldateien, aus denen Header und Werteverteilungen übernommen werden
+_ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "assets")
+DEFAULT_PROFILE_FILES = [os.path.join(_ASSETS_DIR, "GB_F_headerneu.csv"), os.path.join(_ASSETS_DIR, "US_F_headerneu.csv")]
+
+# Ungültige Werte, die je Spaltenart als Fehler eingestreut werden
+ERROR_VALUES = {
+    "date": ["2025-13-01", "2025-02-30", "26-06-2024", ""],
+    "numeric": ["LONDON", "1,5", "n/a", ""],
+    "code": ["XX", "???", ""],
+    "item": ["INVALID-MLFB", "6ES7131-4BD0X-0AA0", ""],
+    "text": [""],
+}
+
+DATE_COLUMNS = {"DISTRIBUTOR_SHIP_DATE", "DISTRIBUTOR_INVOICE_DATE"}
+NUMERIC_COLUMNS = {"QUANTITY", "UNIT_REPLENISHMENT_COST", "EXTENDED_REPLENISHMENT_COST",
+                   "UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD"}
+CODE_COLUMNS = {"CURRENCY_CODE", "BILL_TO_CUSTOMER_COUNTRY", "SHIP_TO_CUSTOMER_COUNTRY",
+                "BILL_TO_CUSTOMER_STATE", "SHIP_TO_CUSTOMER_STATE"}
+
+# Positionen je Rechnung (bestimmt, wie Rechnungsnummer und Positionsnummer erzeugt werden)
+LINES_PER_INVOICE = 4
+
+
+class ColumnProfile:
+
+    """
+    Werteverteilung einer Spalte aus den Beispieldateien (Werte und relative Häufigkeiten).
+    """
+
+    def __init__(self, name: str, values: np.ndarray, probabilities: np.ndarray):
+        self.name = name
+        self.values = values
+        self.probabilities = probabilities
+
+    @property
+    def kind(self) -> str:
+        if self.name in DATE_COLUMNS:
+            return "date"
+        if self.name in NUMERIC_COLUMNS:
+            return "numeric"
+        if self.name in CODE_COLUMNS:
+            return "code"
+        if self.name == "VENDOR_ITEM_NUMBER":
+            return "item"
+        return "text"
+
+    def sample_codes(self, rng: np.random.Generator, n_rows: int) -> np.ndarray:
+        return rng.choice(len(self.values), size=n_rows, p=self.probabilities)
+
+    def numeric_values(self, default: float) -> np.ndarray:
+        return pd.to_numeric(pd.Series(self.values), errors="coerce").fillna(default).to_numpy(dtype=float)
+
+
+def build_profile(paths: Iterable[str] = DEFAULT_PROFILE_FILES) -> List[ColumnProfile]:
+
+    """
+    Liest die Beispieldateien und erstellt je Spalte des (gemeinsamen) POS-Headers eine Werteverteilung.
+    """
+
+    frames = []
+    for path in paths:
+        dialect = sniff_csv_dialect(path)
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, **dialect.read_csv_kwargs())
+        df.columns = [col.upper().strip() for col in df.columns]
+        frames.append(df.loc[:, ~df.columns.str.startswith("UNNAMED")])
+
+    columns = [col for col in frames[0].columns if all(col in df.columns for df in frames)]
+    combined = pd.concat([df[columns] for df in frames], ignore_index=True)
+    combined = combined[(combined.apply(lambda col: col.str.strip() != "")).any(axis=1)]
+
+    profiles = []
+    for col in columns:
+        counts = combined[col].value_counts()
+        profiles.append(ColumnProfile(col, counts.index.to_numpy(dtype=object),
+                                      (counts / counts.sum()).to_numpy()))
+    return profiles
+
+
+def generate_pos_table(profiles: List[ColumnProfile], n_rows: int, error_rates: Optional[Dict[str, float]] = None,
+                       seed: int = 0, row_offset: int = 0) -> pa.Table:
+
+    """
+    Erzeugt n_rows synthetische POS-Zeilen als Arrow-Tabelle (vektorisiert, ohne Python-Objekte je Zelle).
+
+    Rechnungsnummer und Positionsnummer werden fortlaufend vergeben (eindeutige Schlüssel), der Gesamtpreis
+    wird aus Menge × Einzelpreis berechnet. Danach werden Fehler eingestreut.
+
+    :param error_rates: Fehleranteil je Spalte (0..1). Der Schlüssel '*' gilt für alle übrigen Spalten,
+        'DUPLICATES' ist der Anteil doppelt eingereichter Zeilen.
+    :param row_offset: Laufende Nummer der ersten Zeile (für blockweises Schreiben).
+    """
+
+    error_rates = dict(error_rates or {})
+    duplicate_rate = error_rates.pop("DUPLICATES", 0.0)
+    default_rate = error_rates.pop("*", 0.0)
+    rng = np.random.default_rng([seed, row_offset])
+
+    codes = {profile.name: profile.sample_codes(rng, n_rows) for profile in profiles}
+    columns = {profile.name: pa.array(profile.values, pa.string()).take(codes[profile.name]) for profile in profiles}
+
+    rows = np.arange(row_offset, row_offset + n_rows)
+    if duplicate_rate > 0:
+        # Schlüssel einer früheren Zeile übernehmen (doppelt eingereichte Position)
+        hit = np.flatnonzero(rng.random(n_rows) < duplicate_rate)
+        hit = hit[hit > 0]
+        rows[hit] = rows[rng.integers(0, hit, len(hit))]
+    if "DISTRIBUTOR_INVOICE_NUMBER" in columns:
+        columns["DISTRIBUTOR_INVOICE_NUMBER"] = pc.cast(pa.array(1_000_000 + rows // LINES_PER_INVOICE), pa.string())
+    if "DISTRIBUTOR_INVOICE_LINE_ITEM" in columns:
+        columns["DISTRIBUTOR_INVOICE_LINE_ITEM"] = pc.cast(pa.array(rows % LINES_PER_INVOICE + 1), pa.string())
+
+    by_name = {profile.name: profile for profile in profiles}
+    for unit_col, extended_col in (("UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD"),
+                                   ("UNIT_REPLENISHMENT_COST", "EXTENDED_REPLENISHMENT_COST")):
+        if {"QUANTITY", unit_col, extended_col} <= columns.keys():
+            quantity = by_name["QUANTITY"].numeric_values(default=1.0)[codes["QUANTITY"]]
+            unit = by_name[unit_col].numeric_values(default=0.0)[codes[unit_col]]
+            columns[extended_col] = pc.cast(pa.array(np.round(quantity * unit, 2)), pa.string())
+
+    for profile in profiles:
+        rate = error_rates.get(profile.name, default_rate)
+        if rate <= 0:
+            continue
+        hit = pa.array(rng.random(n_rows) < rate)
+        bad_values = pa.array(ERROR_VALUES[profile.kind], pa.string())
+        replacement = bad_values.take(rng.integers(0, len(bad_values), n_rows))
+        columns[profile.name] = pc.if_else(hit, replacement, columns[profile.name])
+
+    return pa.table(columns)
+
+
+def generate_pos_frame(profiles: List[ColumnProfile], n_rows: int, error_rates: Optional[Dict[str, float]] = None,
+                       seed: int = 0, row_offset: int = 0) -> pd.DataFrame:
+    return generate_pos_table(profiles, n_rows, error_rates, seed, row_offset).to_pandas()
+
+
+def _csv_bytes(table: pa.Table, delimiter: str = ";") -> bytes:
+
+    """
+    Verbindet die Spalten zeilenweise mit dem Trennzeichen (ohne Quoting, wie die Beispieldateien).
+    """
+
+    separator = pa.scalar(delimiter, pa.large_string())
+    columns = [pc.cast(column, pa.large_string()) for column in table.columns]
+    lines = pc.binary_join_element_wise(*columns, separator, null_handling="replace", null_replacement="")
+    return "\n".join(lines.to_pylist()).encode("utf-8") + b"\n"
+
+
+def write_pos_file(path: str, n_rows: int, profiles: Optional[List[ColumnProfile]] = None,
+                   error_rates: Optional[Dict[str, float]] = None, seed: int = 0,
+                   chunk_rows: int = 500_000) -> str:
+
+    """
+    Schreibt eine synthetische POS-Datei (';', UTF-8 mit BOM wie die Beispieldateien) blockweise,
+    damit auch 10M Zeilen ohne die ganze Tabelle im Speicher erzeugt werden können.
+    """
+
+    profiles = profiles or build_profile()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(codecs.BOM_UTF8 + ";".join(profile.name for profile in profiles).encode("utf-8") + b"\n")
+        for offset in range(0, n_rows, chunk_rows):
+            table = generate_pos_table(profiles, min(chunk_rows, n_rows - offset), error_rates, seed, offset)
+            f.write(_csv_bytes(table))
+    os.replace(tmp_path, path)
+    return path
+
+
+class SyntheticProductNumberService(ProductNumberCheckService):
+
+    """
+    Offline-Ersatz für den MLFB-API-Client: Nummern aus dem Profil gelten als gültig ('MLFB'),
+    alle anderen (z. B. eingestreute Fehler) als unbekannt.
+    """
+
+    def __init__(self, known_numbers: Iterable[str]):
+        self.known_numbers = {str(number).strip() for number in known_numbers}
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        system = "MLFB" if product_number in self.known_numbers else None
+        return {"input": product_number, "output": {"system": system}}
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        return [self.validate_product_number(number) for number in product_numbers]
+
+    @classmethod
+    def from_profiles(cls, profiles: List[ColumnProfile]) -> "SyntheticProductNumberService":
+        items = [profile.values for profile in profiles if profile.name == "VENDOR_ITEM_NUMBER"]
+        return cls(items[0] if items else [])
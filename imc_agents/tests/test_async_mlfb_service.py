@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import httpx
+
+from imc_norm.async_product_number_check_service_impl import AsyncProductNumberCheckServiceImpl
+from imc_norm.resilient_batching import RetryPolicy, is_error_result
+from imc_norm.token_manager import OidcTokenManager
+
+
+def make_transport(state):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["Authorization"] != f"Bearer token{state['token_requests']}":
+            return httpx.Response(401)
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        numbers = json.loads(request.content)
+        return httpx.Response(200, json=[{"input": n, "output": {"system": "MLFB"}} for n in numbers])
+
+    return httpx.MockTransport(handler)
+
+
+def test_batches_run_concurrently_and_keep_order():
+    state = {"token_requests": 0, "active": 0, "peak": 0}
+
+    def fetch_token(payload):
+        state["token_requests"] += 1
+        return {"access_token": f"token{state['token_requests']}", "expires_in": 3600}
+
+    service = AsyncProductNumberCheckServiceImpl("https://norm.example/api", "id", "secret",
+                                                 max_concurrency=4, transport=make_transport(state),
+                                                 token_manager=OidcTokenManager("id", "secret", fetch_token=fetch_token))
+    numbers = [f"N{i}" for i in range(2000)]
+    try:
+        results = service.validate_product_numbers_batch(numbers)
+        assert [r["input"] for r in results] == numbers
+        assert service.request_count == 21
+        # Widerrufenes Token: 401, ein neues Token, Wiederholung
+        state["token_requests"] += 1
+        assert service.validate_product_number("X")[0]["input"] == "X"
+    finally:
+        service.close()
+
+    assert state["peak"] == 4
+    # 2 Anmeldungen + 20 Batches + Einzelabfrage (abgewiesen und wiederholt)
+    assert service.request_count == 24
+
+
+def test_non_json_response_is_a_gateway_error():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<html>Wartungsarbeiten</html>"))
+    service = AsyncProductNumberCheckServiceImpl("https://norm.example/api", "id", "secret", transport=transport,
+                                                 token_manager=OidcTokenManager("id", "secret", fetch_token=lambda payload: {"access_token": "t"}),
+                                                 retry_policy=RetryPolicy(max_attempts=1))
+    try:
+        results = service.validate_product_numbers_batch(["A", "B"])
+    finally:
+        service.close()
+
+    assert [result["error"]["status"] for result in results if is_error_result(result)] == [502, 502]
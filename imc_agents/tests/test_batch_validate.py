@@ -0,0 +1,73 @@
+import json
+import shutil
+
+import pandas as pd
+
+from imc_agents.batch_validate import collect_files, run_batch
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+
+
+class CountingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.requested.extend(product_numbers)
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_batch_matches_single_file_checks_and_shares_mlfb_cache(tmp_path):
+    drops = tmp_path / "drops"
+    (drops / "gb").mkdir(parents=True)
+    shutil.copy("assets/US_F_headerneu.csv", drops / "us.csv")
+    shutil.copy("assets/US_F_headerneu.csv", drops / "us_copy.csv")
+    shutil.copy("assets/GB_F_headerneu.csv", drops / "gb" / "gb.csv")
+    (drops / "empty.csv").write_text("A;B\n")
+
+    service = CountingService(["6ES71936BP000BA0", "3SU1051-0AB20-0AA0"])
+    checker = DataChecker("", "", "", product_service=service)
+    files = collect_files([str(drops)], recursive=True)
+    summary = run_batch(files, str(tmp_path / "out"), checker, workers=2, api_threads=2)
+
+    assert (summary["files"], summary["errors"]) == (4, 1)
+    # Jede Nummer wird über alle Dateien hinweg nur einmal angefragt
+    assert len(service.requested) == len(set(service.requested))
+
+    expected = checker.report_results(checker.validate_frame(checker.read_csv_file(str(drops / "us.csv"))))
+    report = json.loads((tmp_path / "out" / "us.json").read_text())
+    assert report["check_results"] == json.loads(json.dumps(expected, default=str))
+    assert report["issues"]["mlfb"]["mlfb"] > 0
+    assert json.loads((tmp_path / "out" / "gb__gb.json").read_text())["status"] == "issues"
+
+
+def test_mlfb_check_requests_each_distinct_number_once():
+    service = CountingService(["6ES7131-4BD01-0AA0"])
+    checker = DataChecker("", "", "", product_service=service)
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": [" 6ES7131-4BD01-0AA0", "0", "6ES7131-4BD01-0AA0 ", "0", None, "6"]})
+
+    result = checker.check_mlfb_numbers(df)
+    # "0" und "6" verwirft schon die Offline-Vorprüfung
+    assert service.requested == ["6ES7131-4BD01-0AA0"]
+    assert result == ["Ungültige MLFB-Nummern:\nZeilen 2, 4: 0\nZeile 6: 6"]
+
+
+def test_large_files_are_streamed_with_the_same_results(tmp_path):
+    drops = tmp_path / "drops"
+    drops.mkdir()
+    shutil.copy("assets/US_F_headerneu.csv", drops / "us.csv")
+    shutil.copy("assets/GB_F_headerneu.csv", drops / "gb.csv")
+    files = collect_files([str(drops)])
+    checker = DataChecker("", "", "", product_service=CountingService(["6ES71936BP000BA0", "3SU1051-0AB20-0AA0"]))
+
+    run_batch(files, str(tmp_path / "whole"), checker, workers=2, api_threads=2)
+    # Schwelle 0: jede Datei wird in Blöcken zu 50 Zeilen gelesen und geprüft
+    run_batch(files, str(tmp_path / "streamed"), checker, workers=2, api_threads=2, streaming_threshold=0, chunk_size=50)
+
+    for name in ["us.json", "gb.json"]:
+        whole = json.loads((tmp_path / "whole" / name).read_text())
+        streamed = json.loads((tmp_path / "streamed" / name).read_text())
+        assert streamed["rows"] > 50
+        assert streamed["check_results"] == whole["check_results"]
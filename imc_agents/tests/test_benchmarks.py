@@ -0,0 +1,43 @@
+import pandas as pd
+
+from imc_agents.benchmarks.run_benchmarks import compare
+from imc_agents.benchmarks.synthetic_pos import (
+    SyntheticProductNumberService, build_profile, generate_pos_frame, write_pos_file,
+)
+from imc_agents.utils.data_checker import DataChecker
+
+
+def test_synthetic_frame_keeps_header_and_injects_errors():
+    profiles = build_profile()
+    clean = generate_pos_frame(profiles, 2_000, seed=1)
+    broken = generate_pos_frame(profiles, 2_000, {"CURRENCY_CODE": 0.5}, seed=1)
+
+    assert list(clean.columns) == [profile.name for profile in profiles]
+    assert not clean.duplicated(["DISTRIBUTOR_INVOICE_NUMBER", "DISTRIBUTOR_INVOICE_LINE_ITEM"]).any()
+    quantity = pd.to_numeric(clean["QUANTITY"], errors="coerce")
+    extended = pd.to_numeric(clean["EXTENDED_COST_OF_GOODS_SOLD"])
+    assert ((quantity * pd.to_numeric(clean["UNIT_COST"]) - extended).abs() < 0.01)[quantity.notna()].all()
+
+    changed = (broken["CURRENCY_CODE"] != clean["CURRENCY_CODE"]).mean()
+    assert 0.3 < changed < 0.7
+    assert broken.drop(columns="CURRENCY_CODE").equals(clean.drop(columns="CURRENCY_CODE"))
+
+
+def test_synthetic_file_runs_through_checker(tmp_path):
+    profiles = build_profile()
+    path = write_pos_file(str(tmp_path / "pos.csv"), 1_000, profiles, {"VENDOR_ITEM_NUMBER": 0.1}, chunk_rows=300)
+    checker = DataChecker("", "", "", product_service=SyntheticProductNumberService.from_profiles(profiles))
+
+    df = checker.read_csv_file(path)
+    assert len(df) == 1_000
+    assert checker.check_mlfb_numbers(df)[0] != "Alle MLFB-Nummern sind gültig"
+
+
+def test_compare_reports_only_relevant_regressions():
+    baseline = {"results": {"1000": {"read_csv_file": {"seconds": 1.0, "peak_bytes": 100}}}}
+    current = {"results": {"1000": {"read_csv_file": {"seconds": 2.0, "peak_bytes": 200}},
+                           "5000": {"read_csv_file": {"seconds": 9.0}}}}
+
+    assert compare(current, baseline) == ["1000 Zeilen, read_csv_file: seconds 1.0 -> 2.0"]
+    assert compare(current, baseline, tolerance=1.5) == []
+    assert compare(current, baseline, with_seconds=False) == []
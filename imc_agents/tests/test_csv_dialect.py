@@ -0,0 +1,34 @@
+import codecs
+
+from imc_agents.utils.csv_dialect import sniff_csv_dialect
+
+
+def write(tmp_path, name, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_sniffs_bom_crlf_and_semicolon(tmp_path):
+    path = write(tmp_path, "bom.csv", codecs.BOM_UTF8 + "A;B;C\r\n1;2;3\r\n".encode("utf-8"))
+    dialect = sniff_csv_dialect(path)
+
+    assert dialect.to_dict() == {"encoding": "utf-8-sig", "bom": True, "line_terminator": "CRLF", "delimiter": ";"}
+
+
+def test_sniffs_latin1_with_cr_only_line_endings(tmp_path):
+    path = write(tmp_path, "mx.csv", "A;B\rLog\xedstica;1\r".encode("latin-1"))
+    dialect = sniff_csv_dialect(path)
+
+    assert dialect.encoding == "ISO-8859-1"
+    assert dialect.line_terminator == "\r"
+    assert dialect.read_csv_kwargs()["lineterminator"] == "\r"
+
+
+def test_truncated_multibyte_char_at_sample_end_is_still_utf8(tmp_path):
+    data = ("A,B\n" + "ä" * 10).encode("utf-8")
+    path = write(tmp_path, "utf8.csv", data)
+    dialect = sniff_csv_dialect(path, sample_size=len(data) - 1)
+
+    assert dialect.encoding == "utf-8"
+    assert dialect.delimiter == ","
@@ -0,0 +1,52 @@
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+
+
+def test_ingest_skips_unnamed_columns_and_blank_rows(tmp_path):
+    path = tmp_path / "pos.csv"
+    path.write_text(
+        "DISTRIBUTOR_SENDER_ID;CURRENCY_CODE;ITEM_DESCRIPTION;;;\n"
+        "ACME;USD;Relais;;;\n"
+        ";;;;;\n"
+        " ; ;  ;;;\n"
+        ";EUR;;;;\n"
+        "ACME; ;Schütz;;;\n",
+        encoding="utf-8",
+    )
+    checker = DataChecker("", "", "", product_service=SyntheticProductNumberService([]))
+
+    df = checker.read_csv_file(str(path))
+    assert list(df.columns) == ["DISTRIBUTOR_SENDER_ID", "CURRENCY_CODE", "ITEM_DESCRIPTION"]
+    # Zeilen-Labels bleiben erhalten (Zeilennummern in den Meldungen)
+    assert df.index.tolist() == [0, 3, 4]
+    assert df["CURRENCY_CODE"].tolist()[:2] == ["USD", "EUR"]
+
+
+class CountingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.requested.extend(product_numbers)
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_invalid_byte_after_sniff_sample_is_decoded_without_reparse(tmp_path):
+    path = tmp_path / "mixed.csv"
+    rows = "".join(f"N{i:05d};Grüße\n" for i in range(20_000))
+    # Einzelnes Latin-1-Byte weit hinter der 64-KB-Stichprobe
+    path.write_bytes(("VENDOR_ITEM_NUMBER;ITEM_DESCRIPTION\n" + rows).encode("utf-8") + b"X100;M\xfcller\n")
+    service = CountingService([])
+    checker = DataChecker("", "", "", product_service=service)
+
+    df = checker.read_csv_file(str(path))
+    assert df["ITEM_DESCRIPTION"].tolist()[-2:] == ["Grüße", "Müller"]
+    assert df.attrs["dialect"]["encoding"] == "utf-8"
+
+    service.requested.clear()
+    report = checker.validate_file_streaming(str(path), chunk_size=5_000)
+    assert report.n_rows == 20_001
+    # Kein zweiter Durchlauf: jede Nummer genau einmal angefragt
+    assert len(service.requested) == len(set(service.requested)) == 20_001
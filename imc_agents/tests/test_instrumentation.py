@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+from imc_agents.utils.instrumentation import MetricsRecorder
+
+
+class CountingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.request_count = 0
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.request_count += (len(product_numbers) + 99) // 100
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_recorder_collects_stages_and_external_calls(tmp_path):
+    checker = DataChecker("", "", "", product_service=CountingService(["6ES7131-4BD01-0AA0"]))
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": ["6ES7131-4BD01-0AA0"] * 150 + [f"X{i:03d}" for i in range(100)]})
+    log_path = tmp_path / "metrics.jsonl"
+
+    with MetricsRecorder(trace_memory=True, log_path=str(log_path)) as metrics:
+        checker.check_mlfb_numbers(df)
+        checker.check_customer_data(df)
+
+    stages = {stage["name"]: stage for stage in metrics.to_dict()["stages"]}
+    mlfb = stages["DataChecker.check_mlfb_numbers"]
+    assert mlfb["rows"] == 250
+    # 101 unterschiedliche Nummern -> 2 Anfragen à 100
+    assert (mlfb["external_calls"], mlfb["external_items"], mlfb["http_requests"]) == (1, 101, 2)
+    assert stages["CountingService.validate_product_numbers_batch"]["parent"] == "DataChecker.check_mlfb_numbers"
+    assert stages["DataChecker.check_customer_data"]["external_calls"] == 0
+    assert mlfb["peak_memory_delta_bytes"] > 0
+
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [entry["name"] for entry in logged] == [stage.name for stage in metrics.stages]
+    assert {entry["run_id"] for entry in logged} == {metrics.run_id}
+
+
+def test_instrumented_methods_are_transparent_without_recorder():
+    checker = DataChecker("", "", "", product_service=CountingService([]))
+
+    assert checker.check_mlfb_numbers(pd.DataFrame({"A": [1]}))
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+from imc_agents.utils.instrumentation import MetricsRecorder
+from imc_norm.cached_product_number_check_service import CachedProductNumberCheckService
+
+
+class CountingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.request_count = 0
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.request_count += (len(product_numbers) + 99) // 100
+        self.requested.extend(product_numbers)
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_warm_cache_needs_no_service_across_sessions(tmp_path):
+    db_path = str(tmp_path / "mlfb.sqlite")
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": ["6ES7131-4BD01-0AA0", "3XX9999-9ZZ99", "6ES7131-4BD01-0AA0"]})
+
+    cold = CachedProductNumberCheckService(CountingService(["6ES7131-4BD01-0AA0"]), db_path=db_path)
+    expected = DataChecker("", "", "", product_service=cold).check_mlfb_numbers(df)
+    assert cold.stats()["misses"] == 2
+
+    # Neue "Sitzung": der eigentliche Dienst (inkl. Anmeldung) wird nie erzeugt
+    def factory():
+        raise AssertionError("Dienst sollte bei warmem Cache nicht gebraucht werden")
+
+    warm = CachedProductNumberCheckService(factory, db_path=db_path)
+    checker = DataChecker("", "", "", product_service=warm)
+    with MetricsRecorder() as metrics:
+        assert checker.check_mlfb_numbers(df) == expected
+    assert warm.stats()["hits"] == 2 and warm.stats()["misses"] == 0
+    stage = next(s for s in metrics.to_dict()["stages"] if s["name"] == "DataChecker.check_mlfb_numbers")
+    assert stage["http_requests"] == 0
+
+
+def test_ttl_per_result_class_and_lru_bound(tmp_path):
+    inner = CountingService(["VALID"])
+    cache = CachedProductNumberCheckService(inner, db_path=str(tmp_path / "mlfb.sqlite"),
+                                            valid_ttl_seconds=3600, invalid_ttl_seconds=0, max_entries=3)
+
+    results = cache.validate_product_numbers_batch(["VALID", "BAD", "VALID"])
+    assert [r["input"] for r in results] == ["VALID", "BAD", "VALID"]
+    assert inner.requested == ["VALID", "BAD"]
+
+    # Ungültige Ergebnisse sind sofort abgelaufen, gültige nicht
+    cache.validate_product_numbers_batch(["VALID", "BAD"])
+    assert inner.requested == ["VALID", "BAD", "BAD"]
+    assert cache.stats()["expired"] == 1
+
+    cache.validate_product_numbers_batch(["A", "B", "C"])
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evicted"] == 2
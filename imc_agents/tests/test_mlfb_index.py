@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+from imc_norm.local_product_number_index import LocalProductNumberIndex
+
+
+class CountingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.requested.extend(product_numbers)
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_build_save_and_update_from_exports(tmp_path):
+    csv_export = tmp_path / "export.csv"
+    csv_export.write_text("Input;System\n6ES7131-4BD01-0AA0;MLFB\nA5E00123456;TNS\n3XX9999-9ZZ99;\n", encoding="utf-8")
+    jsonl_export = tmp_path / "update.jsonl"
+    jsonl_export.write_text("\n".join(json.dumps(result) for result in [
+        {"input": "A5E00123456", "output": {"system": None}},
+        {"input": "6SL3210-1KE11-8UF2", "output": {"system": "MLFB"}},
+    ]), encoding="utf-8")
+
+    path = str(tmp_path / "index.npz")
+    LocalProductNumberIndex.build([str(csv_export)]).save(path)
+    index = LocalProductNumberIndex.load(path)
+    assert index.lookup(["A5E00123456", "3XX9999-9ZZ99", "6ES7131-4BD01-0AA0"]) == ["TNS", None, "MLFB"]
+
+    # Spätere Exporte haben Vorrang: ungültig gewordene Nummern fallen heraus
+    updated = LocalProductNumberIndex.build([str(jsonl_export)], base=index)
+    assert updated.to_systems() == {"6ES7131-4BD01-0AA0": "MLFB", "6SL3210-1KE11-8UF2": "MLFB"}
+
+
+def test_only_unknown_numbers_reach_fallback():
+    index_numbers = {"6ES7131-4BD01-0AA0": "MLFB", "6SL3210-1KE11-8UF2": "MLFB"}
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": ["6ES7131-4BD01-0AA0", "6ES7214-1AG40-0XB0", "3XX9999-9ZZ99",
+                                              "6SL3210-1KE11-8UF2", "6ES7131-4BD01-0AA0"]})
+    api = CountingService(["6ES7214-1AG40-0XB0"])
+    index = LocalProductNumberIndex.from_systems(index_numbers, fallback=lambda: api)
+
+    expected = DataChecker("", "", "", product_service=SyntheticProductNumberService(
+        [*index_numbers, "6ES7214-1AG40-0XB0"])).check_mlfb_numbers(df)
+    assert DataChecker("", "", "", product_service=index).check_mlfb_numbers(df) == expected
+    assert api.requested == ["6ES7214-1AG40-0XB0", "3XX9999-9ZZ99"]
+    assert index.stats() == {"index_entries": 2, "index_hits": 2, "index_misses": 2}
+
+    # Vollständiger Index: komplett lokal, unbekannte Nummern sind ungültig
+    complete = LocalProductNumberIndex.from_systems(index_numbers, fallback=lambda: 1 / 0, complete=True)
+    results = complete.validate_product_numbers_batch(["6ES7214-1AG40-0XB0", "6SL3210-1KE11-8UF2"])
+    assert [r["output"]["system"] for r in results] == [None, "MLFB"]
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker
+from imc_norm.resilient_batching import error_result
+from imc_agents.utils.mlfb_syntax import (SYNTAX_MLFB_STRUCTURE, SYNTAX_NO_DIGIT, SYNTAX_TOO_SHORT,
+                                          mlfb_syntax_errors)
+
+
+def test_only_obviously_malformed_numbers_are_rejected():
+    numbers = ["0", "6", "", "INVALID-MLFB", "6ES7131-4BD0X-0AA0",
+               "6ES7131-4BD01-0AA0", "6ES71936BP000BA0", "1FK22032AK002MA0Z", "3RV2901-1E", "3TX7144-1E4",
+               "7MF4812-3MK09-Z+M1Y+C11", "1PC1423-2BC69-0AC4-Z-B02+M2Y+Y99", "FDK:087L4213", "A5E36563512",
+               "HHED63B100L", "3RV2711-1JD10 10A 600V BRK"]
+    assert mlfb_syntax_errors(numbers).tolist() == [
+        SYNTAX_TOO_SHORT, SYNTAX_TOO_SHORT, SYNTAX_TOO_SHORT, SYNTAX_NO_DIGIT, SYNTAX_MLFB_STRUCTURE,
+    ] + [None] * 11
+
+
+def test_sample_files_have_no_false_positives():
+    for path in ["assets/US_F_headerneu.csv", "assets/GB_F_headerneu_correct.csv"]:
+        numbers = pd.read_csv(path, sep=";", dtype=str, encoding="utf-8-sig")["VENDOR_ITEM_NUMBER"].dropna().unique()
+        assert not any(mlfb_syntax_errors(numbers))
+
+
+class RecordingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.requested.extend(product_numbers)
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_malformed_numbers_are_not_sent_to_the_api():
+    service = RecordingService(["6ES7131-4BD01-0AA0"])
+    checker = DataChecker("", "", "", product_service=service)
+    df = pd.read_csv("assets/test_mlfb_data.csv", dtype=str)
+    report = checker.validate_frame(df)
+
+    assert service.requested == ["6ES7131-4BD01-0AA0", "6ES7131-4BD02-0AA0"]
+    assert report.outcome(checker.plan.rule("mlfb", None)).violation.rows.labels().tolist() == [1, 2, 3]
+    assert report.metadata["mlfb_prefilter"] == {"numbers": 2, "rows": 2, "sent_numbers": 2}
+
+
+def test_streaming_looks_up_each_number_once_per_file(tmp_path):
+    path = tmp_path / "pos.csv"
+    numbers = ["6ES7131-4BD01-0AA0", "INVALID-MLFB", "6ES7131-4BD02-0AA0"] * 4
+    path.write_text("VENDOR_ITEM_NUMBER\n" + "\n".join(numbers) + "\n", encoding="utf-8")
+    service = RecordingService(["6ES7131-4BD01-0AA0"])
+    checker = DataChecker("", "", "", product_service=service)
+
+    # Blöcke zu 5 Zeilen: jede Nummer kommt in mehreren Blöcken vor
+    report = checker.validate_file_streaming(str(path), chunk_size=5)
+
+    assert service.requested == ["6ES7131-4BD01-0AA0", "6ES7131-4BD02-0AA0"]
+    assert report.outcome(checker.plan.rule("mlfb", None)).violation.rows.labels().tolist() == [1, 2, 4, 5, 7, 8, 10, 11]
+    assert report.metadata["mlfb_prefilter"] == {"numbers": 1, "rows": 4, "sent_numbers": 2}
+
+
+def test_mlfb_metadata_matches_full_validation_in_every_mode(tmp_path):
+    # Offline verworfene Nummer nur im ersten Block, neue gesendete Nummern auch in den übrigen Blöcken
+    numbers = ["INVALID-MLFB"] + [f"6ES7131-4BD{i:02d}-0AA0" for i in range(11)]
+    for name, rows in [("prefilter.csv", numbers), ("clean.csv", numbers[1:])]:
+        path = tmp_path / name
+        path.write_text("VENDOR_ITEM_NUMBER\n" + "\n".join(rows) + "\n", encoding="utf-8")
+        checker = DataChecker("", "", "", product_service=RecordingService(["6ES7131-4BD01-0AA0"]))
+        reports = [checker.validate_frame(checker.read_csv_file(str(path))),
+                   checker.validate_file_streaming(str(path), chunk_size=5),
+                   checker.validate_file_pipelined(str(path), chunk_size=5)]
+
+        metadata = [{key: report.metadata.get(key) for key in ("mlfb_prefilter", "mlfb_unchecked")} for report in reports]
+        expected = {"numbers": 1, "rows": 1, "sent_numbers": 11} if name == "prefilter.csv" else None
+        assert metadata == [{"mlfb_prefilter": expected, "mlfb_unchecked": None}] * 3
+
+
+class PartlyUnreachableService(RecordingService):
+
+    def validate_product_numbers_batch(self, product_numbers):
+        results = super().validate_product_numbers_batch(product_numbers)
+        return [error_result(number, 503, "unavailable") if number.startswith("3RT") else result
+                for number, result in zip(product_numbers, results)]
+
+
+def test_revalidate_keeps_file_wide_mlfb_metadata():
+    numbers = ["INVALID-MLFB", "3RT2015-1AP01"] + [f"6ES7131-4BD{i:02d}-0AA0" for i in range(6)] * 2
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": numbers})
+    checker = DataChecker("", "", "", product_service=PartlyUnreachableService(["6ES7131-4BD01-0AA0"]))
+    report = checker.validate_frame(df)
+
+    # Nummer verschwindet / kommt neu hinzu / bleibt in anderer Zeile erhalten / wird nicht prüfbar / wird leer
+    edits = [(0, "6ES7131-4BD07-0AA0"), (1, "6ES7131-4BD08-0AA0"), (2, "0"), (3, "3RT2016-1AP01"),
+             (3, "6ES7131-4BD00-0AA0"), (9, "")]
+    for row, value in edits:
+        previous = {row: df.at[row, "VENDOR_ITEM_NUMBER"]}
+        df.at[row, "VENDOR_ITEM_NUMBER"] = value if value else None
+        report = checker.revalidate(report, df, {row: {"VENDOR_ITEM_NUMBER"}}, previous)
+
+        full = checker.validate_frame(df)
+        for key in ("mlfb_prefilter", "mlfb_unchecked"):
+            assert report.metadata.get(key) == full.metadata.get(key), (row, value, key)
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from imc_agents.benchmarks.norm_api_load_test import make_service, run_scenario, synthetic_numbers
+from imc_agents.benchmarks.norm_api_stub import NormApiStub, NormApiStubConfig
+from imc_norm.resilient_batching import RetryPolicy, is_error_result
+
+
+def test_client_validates_against_stub_despite_limits_and_errors():
+    known = ["6ES7131-4BD01-0AA0"]
+    numbers = synthetic_numbers(300, known)
+    config = NormApiStubConfig(latency_seconds=0, latency_per_item_seconds=0, jitter_seconds=0,
+                               error_rate=0.2, max_batch_size=30, seed=1)
+    with NormApiStub(known, config) as stub:
+        service = make_service(stub, concurrency=1, batch_size=100)
+        service.retry_policy = RetryPolicy(max_attempts=6, base_delay=0.001, bisect_attempts=6)
+        results = service.validate_product_numbers_batch(numbers)
+        stats = stub.stats()
+
+    assert [r["input"] for r in results] == numbers
+    assert not any(is_error_result(r) for r in results)
+    assert [r["input"] for r in results if r["output"]["system"] == "MLFB"] == known
+    # Zu große Batches (413) werden geteilt, 503 wiederholt
+    assert stats["statuses"]["413"] >= 1 and stats["statuses"]["503"] >= 1
+    assert stats["items"] == 300
+
+
+def test_load_scenario_reports_throughput_and_latency():
+    known = ["6ES7131-4BD01-0AA0"]
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": synthetic_numbers(500, known) * 2})
+    config = NormApiStubConfig(latency_seconds=0.001, latency_per_item_seconds=0, jitter_seconds=0)
+    with NormApiStub(known, config) as stub:
+        result = run_scenario(stub, df, concurrency=1, batch_size=100, runs=2)
+
+    assert result["distinct_numbers"] == 500
+    assert result["requests_per_run"] == 5
+    assert result["statuses"] == {"200": 10}
+    assert result["numbers_per_second"] > 0
+    assert set(result["request_latency_seconds"]) == {"p50", "p95", "p99"}
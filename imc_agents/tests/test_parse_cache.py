@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from imc_agents.utils.parse_cache import ParsedFileCache
+
+
+def make_df():
+    df = pd.DataFrame({"A": ["1", None, "x"], "B": ["a", "b", "c"]}, index=[0, 2, 5])
+    df.attrs["dialect"] = {"encoding": "utf-8", "delimiter": ";"}
+    return df
+
+
+def test_roundtrip_keeps_index_values_and_attrs(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("A;B\n1;a\n")
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+
+    key = cache.key(str(source), {"reader": "read_csv_file"})
+    assert cache.get(key) is None
+
+    cache.put(key, make_df())
+    cached = cache.get(key)
+    assert cached.index.tolist() == [0, 2, 5]
+    assert cached["B"].tolist() == ["a", "b", "c"]
+    assert cached["A"].isna().tolist() == [False, True, False]
+    assert cached.attrs["dialect"]["delimiter"] == ";"
+
+
+def test_key_depends_on_content_and_options(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("A;B\n1;a\n")
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+
+    key = cache.key(str(source))
+    assert cache.key(str(source), {"typed": True}) != key
+    source.write_text("A;B\n2;a\n")
+    assert cache.key(str(source)) != key
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+    cache.put("old", make_df())
+    old_path = os.path.join(cache.cache_dir, "old.feather")
+    os.utime(old_path, (1, 1))
+
+    cache.max_bytes = os.path.getsize(old_path) + 1
+    cache.put("new", make_df())
+
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
@@ -0,0 +1,80 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService, build_profile, write_pos_file
+from imc_agents.utils.data_checker import DataChecker, prefetch
+from imc_agents.utils.parse_cache import ParsedFileCache
+
+
+class SignallingService(SyntheticProductNumberService):
+
+    def __init__(self, known_numbers):
+        super().__init__(known_numbers)
+        self.called = threading.Event()
+        self.requested = []
+
+    def validate_product_numbers_batch(self, product_numbers):
+        self.requested.extend(product_numbers)
+        self.called.set()
+        return super().validate_product_numbers_batch(product_numbers)
+
+
+def test_lookups_overlap_parsing_and_match_full_validation(tmp_path):
+    profiles = build_profile()
+    path = write_pos_file(str(tmp_path / "pos.csv"), 3_000, profiles, {"VENDOR_ITEM_NUMBER": 0.1, "CURRENCY_CODE": 0.05})
+    service = SignallingService(SyntheticProductNumberService.from_profiles(profiles).known_numbers)
+    checker = DataChecker("", "", "", product_service=service)
+    expected = checker.report_results(checker.validate_frame(checker.read_csv_file(path)))
+    service.requested.clear()
+
+    # Der letzte Block wird erst gelesen, wenn die API schon angefragt wurde
+    overlapped = []
+    read_chunks = checker.iter_csv_chunks
+
+    def chunks(*args):
+        blocks = list(read_chunks(*args))
+        for block in blocks[:-1]:
+            yield block
+        overlapped.append(service.called.wait(timeout=5))
+        yield blocks[-1]
+
+    checker.iter_csv_chunks = chunks
+    service.called.clear()
+    report = checker.validate_file_pipelined(path, chunk_size=500)
+
+    assert overlapped == [True]
+    assert report.n_rows == 3_000
+    assert checker.report_results(report) == expected
+    assert len(service.requested) == len(set(service.requested))
+
+
+def test_pipeline_fills_parse_cache_like_read_csv_file(tmp_path):
+    profiles = build_profile()
+    path = write_pos_file(str(tmp_path / "pos.csv"), 2_000, profiles, {"VENDOR_ITEM_NUMBER": 0.1, "CURRENCY_CODE": 0.05})
+    service = SignallingService(SyntheticProductNumberService.from_profiles(profiles).known_numbers)
+    expected_df = DataChecker("", "", "", product_service=service).read_csv_file(path)
+
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+    checker = DataChecker("", "", "", product_service=service, parse_cache=cache)
+    report = checker.validate_file_pipelined(path, chunk_size=300)
+
+    # Späteres Einlesen (z. B. für Korrekturen) parst die Datei nicht erneut
+    checker._sniff_file = None
+    cached = checker.read_csv_file(path)
+    pd.testing.assert_frame_equal(cached, expected_df)
+    assert cached.attrs == expected_df.attrs
+    assert checker.report_results(checker.validate_file_pipelined(path)) == checker.report_results(report)
+
+
+def test_prefetch_forwards_producer_errors():
+    def items():
+        yield 1
+        raise ValueError("kaputt")
+
+    seen = []
+    with pytest.raises(ValueError):
+        for item in prefetch(items()):
+            seen.append(item)
+    assert seen == [1]
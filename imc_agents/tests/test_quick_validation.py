@@ -0,0 +1,71 @@
+import numpy as np
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService, build_profile, write_pos_file
+from imc_agents.utils.data_checker import DataChecker
+from imc_agents.utils.sampling import clustered_wilson_interval, sample_csv_lines, wilson_interval
+
+
+def make_checker(profiles):
+    return DataChecker("", "", "", product_service=SyntheticProductNumberService.from_profiles(profiles))
+
+
+def test_wilson_interval_and_line_sampling(tmp_path):
+    low, high = wilson_interval(10, 100)
+    assert round(low, 4) == 0.0552 and round(high, 4) == 0.1744
+    assert wilson_interval(0, 50)[0] < 1e-12
+
+    path = tmp_path / "lines.csv"
+    path.write_bytes(b"A;B\r\n" + b"".join(b"%d;x\r\n" % i for i in range(10_000)))
+    header, body, estimated, bounds = sample_csv_lines(str(path), 500, seed=3)
+    rows = body.splitlines()
+    assert header == b"A;B\r\n"
+    assert len(rows) == len(set(rows)) >= 400
+    assert 9_000 < estimated < 11_000
+    assert bounds[0] == 0 and bounds[-1] == len(rows) and (np.diff(bounds) <= 20).all()
+
+
+def test_line_sampling_of_cr_only_files_matches_lf(tmp_path):
+    # Header länger als ein Leseblock beim Suchen des Zeilenendes
+    header = b"A;" + b"B" * 20_000
+    lines = [b"%d;%s" % (i, b"x" * (i % 50)) for i in range(3_000)]
+    samples = []
+    for terminator in [b"\n", b"\r"]:
+        path = tmp_path / "lines.csv"
+        path.write_bytes(header + terminator + b"".join(line + terminator for line in lines))
+        samples.append(sample_csv_lines(str(path), 400, line_terminator=terminator, seed=5))
+
+    (lf_header, lf_body, lf_estimated, lf_bounds), (cr_header, cr_body, cr_estimated, cr_bounds) = samples
+    assert cr_header == header + b"\r" and cr_body.replace(b"\r", b"\n") == lf_body
+    assert cr_estimated == lf_estimated and (cr_bounds == lf_bounds).all()
+
+
+def test_clustered_interval_widens_for_clustered_hits():
+    rows = np.full(50, 20)
+    low, high = wilson_interval(100, 1_000)
+    # Gleichmäßig verteilt: wie unabhängige Zeilen; nur ganze Blöcke betroffen: wie 5 von 50 Blöcken
+    assert np.allclose(clustered_wilson_interval(np.full(50, 2), rows), (low, high))
+    clustered = clustered_wilson_interval(np.r_[np.full(5, 20), np.zeros(45)], rows)
+    assert np.allclose(clustered, wilson_interval(5, 50), atol=0.005)
+    assert clustered[0] < low / 1.5 and clustered[1] > high * 1.5
+    # Ohne Treffer zählt jeder Block einmal
+    assert clustered_wilson_interval(np.zeros(50), rows) == wilson_interval(0, 50)
+
+
+def test_sample_estimate_covers_full_rate_and_capped_mode_stops_early(tmp_path):
+    profiles = build_profile()
+    checker = make_checker(profiles)
+    path = write_pos_file(str(tmp_path / "pos.csv"), 60_000, profiles, {"CURRENCY_CODE": 0.05}, seed=2)
+
+    full = checker.validate_frame(checker.read_csv_file(path)).outcome(checker.plan.rule("financial", "invalid_currencies"))
+    sampled = checker.validate_file_sample(path, sample_rows=5_000, seed=4)
+    results = checker.report_results(sampled)
+    estimate = results["validation_mode"]["estimates"]["financial"]["invalid_currencies"]
+    assert estimate["ci_low"] <= len(full) / full.n_rows <= estimate["ci_high"]
+    assert results["financial"]["invalid_currencies"][0].startswith("Stichprobe:")
+
+    capped = checker.validate_file_streaming(path, chunk_size=10_000, max_violations=20, max_rows=30_000)
+    results = checker.report_results(capped)
+    assert results["validation_mode"]["rows_scanned"] == 30_000
+    assert results["validation_mode"]["complete"] is False
+    assert len(capped.outcome(checker.plan.rule("financial", "invalid_currencies"))) == 20
+    assert results["financial"]["invalid_currencies"][-1].startswith("… nur die ersten 20 von mindestens")
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from imc_agents.benchmarks.synthetic_pos import SyntheticProductNumberService
+from imc_agents.utils.data_checker import DataChecker, lookup_mlfb_numbers
+from imc_norm.resilient_batching import (AdaptiveBatchSizer, BatchError, RetryPolicy, dispatch_batches,
+                                         error_result, is_error_result)
+
+
+class FlakyApi:
+
+    def __init__(self, failures=0, bad=(), status=503):
+        self.failures = failures
+        self.bad = set(bad)
+        self.status = status
+        self.batches = []
+
+    def send(self, batch):
+        self.batches.append(list(batch))
+        if self.failures:
+            self.failures -= 1
+            raise BatchError(self.status, "Service Unavailable")
+        if self.bad & set(batch):
+            raise BatchError(400, "Bad Request")
+        return [{"input": number, "output": {"system": "MLFB"}} for number in batch]
+
+
+def dispatch(api, numbers, sizer=None, policy=None):
+    return dispatch_batches(numbers, api.send, sizer or AdaptiveBatchSizer(max_size=10),
+                            policy or RetryPolicy(max_attempts=3), sleep=lambda seconds: None)
+
+
+def test_transient_errors_are_retried():
+    api = FlakyApi(failures=2)
+    results = dispatch(api, [f"N{i}" for i in range(25)])
+    assert [r["input"] for r in results] == [f"N{i}" for i in range(25)]
+    assert not any(is_error_result(r) for r in results)
+
+
+def test_bad_input_is_isolated_by_bisection():
+    numbers = [f"N{i}" for i in range(10)]
+    sizer = AdaptiveBatchSizer(max_size=10)
+    results = dispatch(FlakyApi(bad=["N3"]), numbers, sizer)
+    assert [r["input"] for r in results] == numbers
+    assert [r["input"] for r in results if is_error_result(r)] == ["N3"]
+    assert results[3]["error"]["status"] == 400
+    # Einmal halbiert (10 -> 5), nicht für jeden Teil-Batch erneut; der erfolgreiche Teil-Batch vergrößert wieder
+    assert sizer.size == 6
+
+
+def test_persistent_outage_returns_partial_results():
+    api = FlakyApi(failures=3)
+    results = dispatch(api, [f"N{i}" for i in range(15)])
+    # Erster Batch scheitert nach allen Versuchen, der Rest wird trotzdem geprüft
+    assert sum(is_error_result(r) for r in results) == 10
+    assert not any(is_error_result(r) for r in results[10:])
+
+
+def test_outage_fails_remaining_batches_fast():
+    # 500 wird wiederholt, aber nicht halbiert; nach zwei gescheiterten Batches wird nichts mehr gesendet
+    api = FlakyApi(failures=100, status=500)
+    results = dispatch(api, [f"N{i}" for i in range(50)], policy=RetryPolicy(max_attempts=3, max_failed_batches=2))
+    assert len(api.batches) == 6 and all(len(batch) >= 5 for batch in api.batches)
+    assert all(is_error_result(r) and r["error"]["status"] == 500 for r in results)
+    assert len(results) == 50
+
+
+def test_batch_size_follows_latency_and_payload_limit():
+    sizer = AdaptiveBatchSizer(max_size=100, target_seconds=1.0, max_payload_bytes=60)
+    assert sizer.next_end([f"NUMBER{i:04d}" for i in range(100)], 0) == 4
+    sizer.record(100, 5.0)
+    assert sizer.size == 50
+    sizer.record(50, 0.1)
+    assert sizer.size == 62
+
+
+class PartiallyFailingService(SyntheticProductNumberService):
+
+    def validate_product_numbers_batch(self, product_numbers):
+        return [error_result(number, 503, "down") if number.startswith("X") else self.validate_product_number(number)
+                for number in product_numbers]
+
+
+def test_unchecked_numbers_are_reported_not_flagged():
+    checker = DataChecker("", "", "", product_service=PartiallyFailingService(["6ES7131-4BD01-0AA0"]))
+    df = pd.DataFrame({"VENDOR_ITEM_NUMBER": ["6ES7131-4BD01-0AA0", "X100", "X100", "3XX9999-9ZZ99"]})
+    report = checker.validate_frame(df)
+    assert report.outcome(checker.plan.rule("mlfb", None)).violation.rows.labels().tolist() == [3]
+    assert report.metadata["mlfb_unchecked"] == {"numbers": 1, "rows": 2, "statuses": {"503": 1}, "examples": ["X100"]}
+
+
+def test_results_are_matched_by_input_if_the_service_returns_too_few_or_too_many():
+    numbers = ["6ES7131-4BD01-0AA0", "6ES7214-1AG40-0XB0", "6SL3210-1KE11-8UF2"]
+
+    def too_few(batch):
+        return [{"input": number, "output": {"system": "MLFB"}} for number in reversed(batch[1:])]
+
+    def too_many(batch):
+        return [{"input": number, "output": {"system": "MLFB"}} for number in batch + ["6ES7000-0AA00-0AA0"]]
+
+    results = lookup_mlfb_numbers(numbers, too_few)
+    assert [r["input"] for r in results] == numbers
+    assert is_error_result(results[0]) and not any(is_error_result(r) for r in results[1:])
+    assert [r["input"] for r in lookup_mlfb_numbers(numbers, too_many)] == numbers
@@ -0,0 +1,47 @@
+import numpy as np
+
+from imc_agents.utils.row_sets import RowSet, Violation
+
+
+def test_row_set_ranges_and_set_operations():
+    rows = RowSet.from_labels([7, 2, 3, 4, 9, 3])
+    assert rows.to_list() == [[2, 5], [7, 8], [9, 10]]
+    assert len(rows) == 5
+    assert rows.format() == "3-5, 8, 10"
+
+    assert rows.union(RowSet.from_labels([5, 6])).to_list() == [[2, 8], [9, 10]]
+    assert rows.difference(RowSet.from_labels([3, 9])).labels().tolist() == [2, 4, 7]
+    assert rows.contains([1, 2, 8, 9]).tolist() == [False, True, False, True]
+
+
+def test_violation_groups_rows_by_value():
+    violation = Violation.from_rows([0, 1, 2, 5], ["x", "x", "y", "x"])
+
+    assert len(violation) == 4
+    assert violation.n_values == 2
+    assert violation.render_values() == ["Zeilen 1-2, 6: x", "Zeile 3: y"]
+    assert violation.render_rows() == ["Zeilen 1-3", "Zeile 6"]
+
+
+def test_violation_merge_and_roundtrip():
+    merged = Violation.from_rows([0, 1], ["a", "b"]).merge(Violation.from_rows([2, 3], ["a", "a"]))
+
+    assert merged.render_values() == ["Zeilen 1, 3-4: a", "Zeile 2: b"]
+    assert Violation.from_dict(merged.to_dict()).render_values() == merged.render_values()
+
+
+def test_rendering_is_capped_for_many_rows():
+    labels = np.arange(0, 800_000, 2)
+    violation = Violation.from_rows(labels, np.where(labels % 4 == 0, "abc", "def"))
+
+    lines = violation.render_values(max_lines=1, max_ranges=3)
+    assert lines == ["Zeilen 1, 5, 9, … (insgesamt 200000 Zeilen): abc", "… 1 weitere Werte in 200000 Zeilen"]
+    assert len(violation.to_dict()["values"]) == 2
+
+
+def test_violation_remove_rows_splits_only_hit_ranges():
+    violation = Violation.from_rows([0, 1, 2, 3, 7, 8], ["a", "a", "a", "b", "a", "a"])
+
+    removed = violation.remove_rows(RowSet.from_labels([1, 3, 20]))
+    assert removed.render_values() == ["Zeilen 1, 3, 8-9: a"]
+    assert removed.relabel(np.array([0, 2, 5, 7, 8])).render_values() == ["Zeilen 1-2, 4-5: a"]
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from imc_norm import product_number_check_service_impl
+from imc_norm.product_number_check_service_impl import ProductNumberCheckServiceImpl
+from imc_norm.resilient_batching import RetryPolicy, is_error_result
+from imc_norm.token_manager import OidcTokenManager
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, data=None, text=""):
+        self.status_code = status_code
+        self.data = data
+        self.text = text
+
+    def json(self):
+        if self.data is None:
+            raise ValueError("no JSON")
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+def test_token_is_lazy_cached_and_refreshed_before_expiry():
+    issued = []
+
+    def fetch_token(payload):
+        time.sleep(0.05)
+        issued.append(payload["client_id"])
+        return {"access_token": f"token{len(issued)}", "expires_in": 3600}
+
+    manager = OidcTokenManager("id", "secret", refresh_margin_seconds=120, fetch_token=fetch_token)
+    assert issued == []
+
+    # Gleichzeitige Zugriffe lösen nur eine Anfrage aus
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tokens == ["token1"] * 8 and manager.request_count == 1
+
+    # Innerhalb der Sicherheitsmarge vor Ablauf wird erneuert
+    manager._expires_at = time.time() + 60
+    assert manager.get_token() == "token2"
+
+    # Nur das aktuelle Token verwerfen (veraltete 401 lösen keine weitere Erneuerung aus)
+    manager.invalidate("token1")
+    assert manager.get_token() == "token2"
+    manager.invalidate("token2")
+    assert manager.get_token() == "token3"
+
+
+def test_service_does_not_authenticate_on_init_and_retries_on_401(monkeypatch):
+    fetch_calls = []
+    manager = OidcTokenManager("id", "secret",
+                               fetch_token=lambda payload: fetch_calls.append(1) or {"access_token": f"t{len(fetch_calls)}"})
+    service = ProductNumberCheckServiceImpl("https://norm.example/api", "id", "secret", token_manager=manager)
+    assert service.request_count == 0
+
+    def post(url, json, headers, timeout):
+        if headers["Authorization"] != "Bearer t2":
+            return FakeResponse(401)
+        return FakeResponse(200, [{"input": number, "output": {"system": "MLFB"}} for number in json])
+
+    monkeypatch.setattr(product_number_check_service_impl.requests, "post", post)
+    results = service.validate_product_numbers_batch(["A", "B"])
+    assert [r["input"] for r in results] == ["A", "B"]
+    # Token 1 abgewiesen, Token 2 akzeptiert: 2 Anmeldungen + 2 API-Anfragen
+    assert service.request_count == 4
+
+
+def test_service_sends_with_timeout_and_treats_non_json_as_gateway_error(monkeypatch):
+    monkeypatch.setenv("NORM_API_TIMEOUT_SECONDS", "7.5")
+    manager = OidcTokenManager("id", "secret", fetch_token=lambda payload: {"access_token": "t"})
+    service = ProductNumberCheckServiceImpl("https://norm.example/api", "id", "secret", token_manager=manager,
+                                            retry_policy=RetryPolicy(max_attempts=1))
+    timeouts = []
+
+    def post(url, json, headers, timeout):
+        timeouts.append(timeout)
+        return FakeResponse(200, text="<html>Wartungsarbeiten</html>")
+
+    monkeypatch.setattr(product_number_check_service_impl.requests, "post", post)
+    results = service.validate_product_numbers_batch(["A"])
+    assert is_error_result(results[0]) and results[0]["error"]["status"] == 502
+    assert timeouts == [7.5]
+
+
+def test_token_url_is_read_when_the_manager_is_created(monkeypatch):
+    # Variable erst nach dem Import gesetzt (z. B. per load_dotenv im Agenten)
+    monkeypatch.setenv("NORM_TOKEN_URL", "http://127.0.0.1:8080/token")
+    assert OidcTokenManager("id", "secret").token_url == "http://127.0.0.1:8080/token"
+    assert OidcTokenManager("id", "secret", token_url="http://idp/token").token_url == "http://idp/token"
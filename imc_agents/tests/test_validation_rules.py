@@ -0,0 +1,175 @@
+import json
+
+import pandas as pd
+
+from imc_agents.utils.parallel_validation import evaluate_parallel, shard_ranges, validation_pool
+from imc_agents.utils.validation_rules import build_default_plan, ColumnView, FutureDate, POS_SCHEMA, ValidationReport
+
+
+def make_df():
+    return pd.DataFrame({
+        "DISTRIBUTOR_INVOICE_NUMBER": ["123", " A42 ", "", "x-1"],
+        "BILL_TO_CUSTOMER_COUNTRY": ["GB", "de", "MEX", "XX"],
+        "BILL_TO_CUSTOMER_STATE": ["TX", "", "TEXAS", "ca"],
+        "QUANTITY": ["2", "LONDON", "1", "3"],
+    })
+
+
+def test_column_view_normalizes_once():
+    view = ColumnView(pd.Series([" a ", None]))
+    assert view.stripped is view.stripped
+    assert view.text.tolist() == [" a ", "nan"]
+    assert view.empty.tolist() == [False, True]
+
+
+def test_plan_results_keep_result_shape():
+    results = build_default_plan().evaluate(make_df()).all_results()
+
+    assert results["general"]["missing_values_in_DISTRIBUTOR_INVOICE_NUMBER"] == ["1 Zeilen betroffen"]
+    assert results["general"]["invalid_invoice_numbers"] == ["Zeile 3: ", "Zeile 4: x-1"]
+    assert "DISTRIBUTOR_SENDER_ID" in results["general"]["missing_columns"]
+    assert results["distributor"]["missing_sender_id"] == ["Spalte 'DISTRIBUTOR_SENDER_ID' fehlt"]
+    assert results["customer"]["invalid_bill_to_countries"] == ["Zeile 3: MEX", "Zeile 4: XX"]
+    assert results["customer"]["missing_bill_to_state"] == ["1 Zeilen betroffen"]
+    assert results["customer"]["invalid_bill_to_state"] == ["Alle Zeilen enthalten nur 'TEXAS' als ungültigen Wert"]
+    assert results["financial"]["invalid_quantity"] == ["Zeile 2: LONDON"]
+
+
+def test_plan_evaluates_selected_categories_only():
+    report = build_default_plan().evaluate(make_df(), ["financial"])
+    assert list(report.all_results()) == ["financial"]
+
+
+def test_merged_chunk_reports_match_full_report():
+    df = make_df()
+    plan = build_default_plan()
+    merged = plan.evaluate(df.iloc[:2]).merge(plan.evaluate(df.iloc[2:]))
+
+    assert merged.n_rows == len(df)
+    assert merged.all_results() == plan.evaluate(df).all_results()
+
+
+def test_parallel_evaluation_matches_serial():
+    df = pd.concat([make_df()] * 5, ignore_index=True)
+    plan = build_default_plan()
+    report = evaluate_parallel(plan, df, workers=2, min_rows_per_shard=4)
+
+    assert shard_ranges(20, 3) == [(0, 7), (7, 14), (14, 20)]
+    assert report.all_results() == plan.evaluate(df).all_results()
+
+    # Der Prozess-Pool wird wiederverwendet, nicht je Aufruf neu gestartet
+    pool = validation_pool(2)
+    assert evaluate_parallel(plan, df, workers=2, min_rows_per_shard=4).all_results() == report.all_results()
+    assert validation_pool(2) is pool
+
+
+def test_revalidate_patches_only_touched_cells():
+    df = pd.concat([make_df()] * 3, ignore_index=True)
+    df.index = df.index * 2
+    plan = build_default_plan()
+    report = ValidationReport.from_state(plan, json.loads(json.dumps(plan.evaluate(df).to_state())))
+
+    df.loc[2, "QUANTITY"] = "5"
+    df.loc[4, "BILL_TO_CUSTOMER_COUNTRY"] = "ZZ"
+    df.loc[22, "BILL_TO_CUSTOMER_STATE"] = "TX"
+    touched = {2: {"QUANTITY"}, 4: {"BILL_TO_CUSTOMER_COUNTRY"}, 22: {"BILL_TO_CUSTOMER_STATE"}}
+    plan.revalidate(report, df, touched)
+
+    assert report.all_results() == plan.evaluate(df).all_results()
+    relabeled = report.relabel(df.index)
+    assert relabeled.all_results() == plan.evaluate(df.reset_index(drop=True)).all_results()
+
+
+def test_typed_columns_give_same_results_as_object_columns():
+    df = make_df()
+    typed = df.astype({col: POS_SCHEMA[col] for col in df.columns})
+    typed.loc[1, "BILL_TO_CUSTOMER_STATE"] = None
+    df.loc[1, "BILL_TO_CUSTOMER_STATE"] = None
+    plan = build_default_plan()
+
+    assert isinstance(ColumnView(typed["BILL_TO_CUSTOMER_COUNTRY"]).upper.dtype, pd.CategoricalDtype)
+    assert plan.evaluate(typed).all_results() == plan.evaluate(df).all_results()
+
+
+def make_date_df():
+    return pd.DataFrame({
+        "DISTRIBUTOR_SENDER_ID": ["A", "A", "B", "B", "A"],
+        "DISTRIBUTOR_INVOICE_DATE": ["2025-05-30", "2025-13-01", "2025-02-30", "2024-01-15", "2025-01-02"],
+        "DISTRIBUTOR_SHIP_DATE": ["2025-06-02", None, "2025-02-28", "2024-01-10", "2099-01-01"],
+    })
+
+
+def test_date_checks_detect_impossible_and_late_dates():
+    df = make_date_df()
+    view = ColumnView(df["DISTRIBUTOR_INVOICE_DATE"].astype("category"))
+    assert view.dates[1:3].tolist() == [None, None]
+    assert FutureDate(pd.Timestamp("2025-01-01"))(view).tolist() == [True, False, False, False, True]
+
+    results = build_default_plan().evaluate(df).all_results()
+    assert results["distributor"]["invalid_distributor_invoice_dates"] == ["Zeile 2: 2025-13-01", "Zeile 3: 2025-02-30"]
+    assert "invalid_distributor_ship_dates" not in results["distributor"]
+    assert results["distributor"]["future_ship_dates"] == ["Zeile 5: 2099-01-01"]
+    assert results["distributor"]["ship_date_after_invoice_date"] == [
+        "Zeile 1: 2025-06-02 nach 2025-05-30", "Zeile 5: 2099-01-01 nach 2025-01-02"]
+
+
+def test_date_ranges_per_distributor_merge_across_chunks():
+    df = make_date_df()
+    plan = build_default_plan()
+    merged = plan.evaluate(df.iloc[:3]).merge(plan.evaluate(df.iloc[3:]))
+
+    expected = {"A": {"first": "2025-01-02", "last": "2025-05-30", "rows": 2},
+                "B": {"first": "2024-01-15", "last": "2024-01-15", "rows": 1}}
+    assert merged.results("date_ranges") == expected
+    assert ValidationReport.from_state(plan, merged.to_state()).results("date_ranges") == expected
+
+
+def test_duplicate_invoice_lines_are_found_across_chunks():
+    df = pd.DataFrame({
+        "DISTRIBUTOR_INVOICE_NUMBER": ["1", "1", "2", " 1", "3", ""],
+        "DISTRIBUTOR_INVOICE_LINE_ITEM": ["10", "20", "10", "10", "10", "10"],
+        "DISTRIBUTOR_SENDER_ID": ["A", "A", "A", "A", "A", "A"],
+    })
+    df = pd.concat([df, df.iloc[[2]]], ignore_index=True)
+    plan = build_default_plan()
+
+    full = plan.evaluate(df).results("general")["duplicate_invoice_lines"]
+    assert full == ["1 / 10 / A: 2× (Zeilen 1, 4)", "2 / 10 / A: 2× (Zeilen 3, 7)"]
+
+    # "2 / 10 / A" liegt in beiden Chunks: der Schlüssel kommt nach dem Zusammenführen aus dem zweiten
+    merged = plan.evaluate(df.iloc[:4]).merge(plan.evaluate(df.iloc[4:])).resolve(df.iloc[4:])
+    assert merged.results("general")["duplicate_invoice_lines"] == full
+    assert ValidationReport.from_state(plan, merged.to_state()).all_results() == merged.all_results()
+
+    parallel = evaluate_parallel(plan, df, workers=2, min_rows_per_shard=2)
+    assert parallel.results("general")["duplicate_invoice_lines"] == full
+
+
+def test_extended_cost_is_checked_in_minor_units():
+    df = pd.DataFrame({
+        "QUANTITY": ["2", "3", "3", "2", "-1", "1000", "4", "x"],
+        "UNIT_COST": ["10.05", "0.1", "1.005", "10", "-285", "1250", "1000", "1"],
+        "EXTENDED_COST_OF_GOODS_SOLD": ["20.1", "0.3", "3.02", "25", "-285", "1250000.5", "4005", "1"],
+        "CURRENCY_CODE": ["GBP", "USD", "USD", "EUR", "USD", "USD", "JPY", "USD"],
+    })
+    results = build_default_plan().evaluate(df).results("financial")
+
+    assert results["inconsistent_extended_cost_of_goods_sold"] == [
+        "Zeilen 4, 7: Abweichung 1–10", "Zeile 6: Abweichung < 1"]
+    assert "inconsistent_extended_replenishment_cost" not in results
+
+
+def test_extended_cost_keeps_signs_and_fractional_quantities_exact():
+    df = pd.DataFrame({
+        "QUANTITY": ["2", "-2", "-1", "2.5", "0.333", "3000000", "3000000", "1000000.5"],
+        "UNIT_COST": ["10", "10", "-285", "0.07", "0.05", "1234567.891234", "1234567.891234", "12345.67"],
+        "EXTENDED_COST_OF_GOODS_SOLD": ["-20", "-20", "-285", "0.18", "0.02", "3703703673702", "3703703673700",
+                                        "12345676172.84"],
+        "CURRENCY_CODE": ["EUR"] * 8,
+    })
+    results = build_default_plan().evaluate(df).results("financial")
+
+    # Zeile 1: Vorzeichenfehler (bisher über die Beträge verdeckt); Zeilen 4/5 gebrochene Mengen (0,175 bzw.
+    # 0,01665 kaufmännisch gerundet); Zeilen 6/8 exakt (int64 bzw. Decimal); Zeile 7 weicht um 2,00 ab
+    assert results["inconsistent_extended_cost_of_goods_sold"] == ["Zeile 1: Abweichung 10–100",
+                                                                   "Zeile 7: Abweichung 1–10"]
@@ -0,0 +1,106 @@
+import codecs
+import os
+from typing import Dict, Optional, Tuple
+
+# Größe der Stichprobe, aus der Kodierung, Zeilenende und Trennzeichen bestimmt werden
+SNIFF_SAMPLE_BYTES = 64 * 1024
+
+# Fallback, wenn die Stichprobe kein gültiges UTF-8 ist (dekodiert jedes Byte)
+FALLBACK_ENCODING = "ISO-8859-1"
+
+# Fehlerbehandlung beim UTF-8-Dekodieren: ungültige Bytes hinter der Stichprobe werden einzeln mit
+# FALLBACK_ENCODING dekodiert, statt die ganze Datei (samt aller Prüfungen) erneut zu parsen
+DECODE_ERRORS = "imc_fallback"
+
+
+def _decode_fallback(error: UnicodeDecodeError) -> Tuple[str, int]:
+    return error.object[error.start:error.end].decode(FALLBACK_ENCODING), error.end
+
+
+codecs.register_error(DECODE_ERRORS, _decode_fallback)
+
+CANDIDATE_DELIMITERS = [";", ",", "\t", "|"]
+
+LINE_TERMINATOR_NAMES = {"\r\n": "CRLF", "\n": "LF", "\r": "CR"}
+
+
+class CsvDialect:
+
+    """
+    Ermittelte Eigenschaften einer CSV-Datei: Kodierung, BOM, Zeilenende und Trennzeichen.
+    """
+
+    def __init__(self, encoding: str, bom: bool, line_terminator: str, delimiter: str):
+        self.encoding = encoding
+        self.bom = bom
+        self.line_terminator = line_terminator
+        self.delimiter = delimiter
+
+    def read_csv_kwargs(self) -> Dict[str, str]:
+
+        """
+        Parameter für pd.read_csv (C-Engine). Reine CR-Dateien bekommen das Zeilenende explizit,
+        ungültige UTF-8-Bytes werden mit FALLBACK_ENCODING dekodiert (siehe DECODE_ERRORS).
+        """
+
+        kwargs = {"delimiter": self.delimiter, "encoding": self.encoding, "encoding_errors": DECODE_ERRORS}
+        if self.line_terminator == "\r":
+            kwargs["lineterminator"] = "\r"
+        return kwargs
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "encoding": self.encoding,
+            "bom": self.bom,
+            "line_terminator": LINE_TERMINATOR_NAMES[self.line_terminator],
+            "delimiter": self.delimiter,
+        }
+
+    def __repr__(self):
+        return f"CsvDialect({self.to_dict()})"
+
+
+def _detect_encoding(sample: bytes, complete: bool) -> Tuple[str, bool]:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", True
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        # final=False: ein am Stichprobenende abgeschnittenes Multibyte-Zeichen ist kein Fehler
+        decoder.decode(sample, final=complete)
+        return "utf-8", False
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING, False
+
+
+def _detect_line_terminator(text: str) -> str:
+    crlf = text.count("\r\n")
+    counts = {"\r\n": crlf, "\r": text.count("\r") - crlf, "\n": text.count("\n") - crlf}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else "\n"
+
+
+def _detect_delimiter(header: str) -> str:
+    counts = {delimiter: header.count(delimiter) for delimiter in CANDIDATE_DELIMITERS}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else ";"
+
+
+def sniff_csv_dialect(file_path: str, sample_size: int = SNIFF_SAMPLE_BYTES,
+                      sample: Optional[bytes] = None) -> CsvDialect:
+
+    """
+    Bestimmt Kodierung, BOM, Zeilenende (CR/LF/CRLF) und Trennzeichen aus einer Stichprobe
+    am Dateianfang, damit die Datei anschließend genau einmal geparst werden kann.
+    """
+
+    if sample is None:
+        with open(file_path, "rb") as f:
+            sample = f.read(sample_size)
+    complete = len(sample) >= os.path.getsize(file_path)
+
+    encoding, bom = _detect_encoding(sample, complete)
+    text = sample.decode(encoding, errors="ignore")
+    line_terminator = _detect_line_terminator(text)
+    header = text.split(line_terminator, 1)[0]
+
+    return CsvDialect(encoding, bom, line_terminator, _detect_delimiter(header))
@@ -1,6 +1,354 @@
+import io
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-import re
+from imc_norm.cached_product_number_check_service import CachedProductNumberCheckService
+from imc_norm.local_product_number_index import LocalProductNumberIndex
+from imc_norm.product_number_check_service import ProductNumberCheckService
 from imc_norm.product_number_check_service_impl import ProductNumberCheckServiceImpl
+from imc_norm.resilient_batching import error_result
+from imc_agents.utils.csv_dialect import CsvDialect, SNIFF_SAMPLE_BYTES, sniff_csv_dialect
+from imc_agents.utils.instrumentation import InstrumentedProductNumberService, instrumented, record_external_call
+from imc_agents.utils.mlfb_syntax import mlfb_syntax_errors
+from imc_agents.utils.parallel_validation import evaluate_parallel
+from imc_agents.utils.parse_cache import ParsedFileCache
+from imc_agents.utils.row_sets import RowSet, Violation
+from imc_agents.utils.sampling import clustered_wilson_interval, sample_csv_lines, wilson_interval
+from imc_agents.utils.validation_rules import POS_SCHEMA, RuleOutcome, ValidationReport, build_default_plan
+
+# Zeilen pro Block im Streaming-Modus
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Standardwerte der Schnellmodi: Zeilen je Regel (gekappt) bzw. Stichprobengröße
+DEFAULT_MAX_VIOLATIONS = 1_000
+DEFAULT_SAMPLE_ROWS = 20_000
+
+# Systeme, unter denen die Norm-API eine Nummer als gültig zurückmeldet
+VALID_MLFB_SYSTEMS = ["MLFB", "TNS", "SFC", "SSN"]
+# Beispiel-Nummern in metadata["mlfb_unchecked"]
+MLFB_UNCHECKED_EXAMPLES = 20
+# Pipeline-Modus: Blöcke, die der Einlese-Thread höchstens vorausliest
+PIPELINE_PREFETCH_CHUNKS = 2
+
+
+def set_cell(df: pd.DataFrame, label, column: str, value):
+
+    """
+    Setzt einen Zellwert. Neue Werte in kategorialen Spalten werden vorher als Kategorie ergänzt.
+    """
+
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype) and not pd.isna(value) and value not in series.cat.categories:
+        df[column] = series.cat.add_categories([value])
+    df.at[label, column] = value
+
+def mlfb_outcome(labels: np.ndarray, codes: np.ndarray, numbers: List[str], systems: List[Optional[str]],
+                 unchecked: Optional[np.ndarray] = None) -> RuleOutcome:
+
+    """
+    Überträgt das API-Ergebnis je eindeutiger Nummer (numbers/systems) über codes auf die Zeilen (labels).
+    Nummern mit unchecked=True (API-Fehler) gelten nicht als ungültig.
+    """
+
+    invalid = np.array([system not in VALID_MLFB_SYSTEMS for system in systems], dtype=bool)
+    if unchecked is not None:
+        invalid &= ~unchecked
+    rows = invalid[codes]
+    return RuleOutcome(Violation.from_rows(labels[rows], np.asarray(numbers, dtype=object)[codes[rows]]), len(labels))
+
+
+def mlfb_unchecked_summary(codes: np.ndarray, numbers: List[str], errors: List[Optional[Dict[str, Any]]],
+                           counted: Optional[np.ndarray] = None) -> Optional[dict]:
+
+    """
+    Metadaten zu Nummern, die wegen API-Fehlern nicht geprüft werden konnten (None, wenn alle geprüft wurden).
+    Nummernbezogene Zähler nur für counted (z. B. im Streaming-Modus: erstmals in diesem Block gesehen).
+    """
+
+    unchecked = np.array([error is not None for error in errors], dtype=bool)
+    if not unchecked.any():
+        return None
+    counted_unchecked = unchecked & counted if counted is not None else unchecked
+    statuses = {}
+    for error, flag in zip(errors, counted_unchecked):
+        if flag:
+            status = str(error.get("status") or "connection")
+            statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "numbers": int(counted_unchecked.sum()),
+        "rows": int(unchecked[codes].sum()),
+        "statuses": statuses,
+        "examples": [number for number, flag in zip(numbers, counted_unchecked) if flag][:MLFB_UNCHECKED_EXAMPLES],
+    }
+
+
+def lookup_mlfb_numbers(numbers: List[str], validate: Callable[[List[str]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+
+    """
+    API-Ergebnis je Nummer; offensichtlich fehlerhafte Nummern (mlfb_syntax_errors) werden nicht gesendet,
+    sondern erhalten lokal ein Ergebnis ohne System mit 'syntax_error'. Liefert der Dienst nicht genau ein
+    Ergebnis je Nummer, werden die Ergebnisse über 'input' zugeordnet; Nummern ohne Ergebnis gelten als
+    nicht prüfbar (error_result), nicht als ungültig.
+    """
+
+    reasons = mlfb_syntax_errors(numbers)
+    candidates = [number for number, reason in zip(numbers, reasons) if reason is None]
+    if len(candidates) < len(numbers):
+        print(f"[DEBUG] MLFB-Vorprüfung: {len(numbers) - len(candidates)} von {len(numbers)} Nummern offline verworfen")
+    api_results = validate(candidates) if candidates else []
+    if len(api_results) != len(candidates):
+        print(f"[ERROR] MLFB-Prüfung: {len(api_results)} Ergebnisse für {len(candidates)} Nummern, Zuordnung über 'input'")
+        by_input = {result.get("input"): result for result in api_results}
+        api_results = [by_input.get(number) or error_result(number, None, "kein Ergebnis der Norm-API für diese Nummer")
+                       for number in candidates]
+    api_results = iter(api_results)
+    return [next(api_results) if reason is None else {"input": number, "output": {"system": None}, "syntax_error": reason}
+            for number, reason in zip(numbers, reasons)]
+
+
+def mlfb_outcome_from_results(labels: np.ndarray, codes: np.ndarray, numbers: List[str],
+                              results: List[Dict[str, Any]], metadata: Optional[dict] = None,
+                              counted: Optional[np.ndarray] = None) -> RuleOutcome:
+
+    """
+    RuleOutcome aus den Ergebnissen von lookup_mlfb_numbers. Offline verworfene bzw. wegen API-Fehlern
+    nicht geprüfte Nummern werden in metadata["mlfb_prefilter"] bzw. metadata["mlfb_unchecked"] vermerkt;
+    nummernbezogene Zähler nur für counted (Standard: alle Nummern), Zeilen immer vollständig.
+    Mit counted (blockweise Prüfung) steht mlfb_prefilter immer in metadata, auch mit Nullen, damit die
+    Summe über alle Blöcke (v. a. sent_numbers) der Prüfung in einem Stück entspricht.
+    """
+
+    systems = [(result.get("output") or {}).get("system") for result in results]
+    errors = [result.get("error") for result in results]
+    unchecked = mlfb_unchecked_summary(codes, numbers, errors, counted)
+    if unchecked is not None:
+        print(f"[DEBUG] MLFB-Prüfung unvollständig: {unchecked['numbers']} Nummern nicht prüfbar ({unchecked['statuses']})")
+        if metadata is not None:
+            metadata["mlfb_unchecked"] = unchecked
+    prefiltered = np.array([bool(result.get("syntax_error")) for result in results], dtype=bool)
+    if metadata is not None and (prefiltered.any() or counted is not None):
+        counted = counted if counted is not None else np.ones(len(numbers), dtype=bool)
+        metadata["mlfb_prefilter"] = {
+            "numbers": int((prefiltered & counted).sum()),
+            "rows": int(prefiltered[codes].sum()),
+            "sent_numbers": int((~prefiltered & counted).sum()),
+        }
+    return mlfb_outcome(labels, codes, numbers, systems, np.array([error is not None for error in errors], dtype=bool))
+
+
+def merge_mlfb_metadata(first: Optional[dict], second: Optional[dict]) -> Optional[dict]:
+
+    """
+    Fasst mlfb_unchecked- bzw. mlfb_prefilter-Einträge zweier Chunks zusammen (Zähler addiert).
+    """
+
+    if first is None or second is None:
+        return first or second
+    merged = {}
+    for key, value in first.items():
+        other = second[key]
+        if isinstance(value, dict):
+            merged[key] = {k: value.get(k, 0) + other.get(k, 0) for k in {**value, **other}}
+        elif isinstance(value, list):
+            merged[key] = (value + other)[:MLFB_UNCHECKED_EXAMPLES]
+        else:
+            merged[key] = value + other
+    return merged
+
+
+def prefetch(items: Iterable, depth: int = PIPELINE_PREFETCH_CHUNKS) -> Iterator:
+
+    """
+    Liefert die Elemente von items, erzeugt sie aber in einem Hintergrund-Thread (höchstens depth im Voraus).
+    Ausnahmen des Erzeugers werden beim Verbraucher ausgelöst; bricht dieser ab, hört auch der Erzeuger auf.
+    """
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name="csv-prefetch", daemon=True).start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _cached_chunks(chunks, cache: ParsedFileCache, key: str, attrs: Dict[str, Any]):
+
+    """
+    Reicht die Blöcke durch und schreibt sie dabei in den Parse-Cache (im Thread, der die Blöcke erzeugt).
+    Der Eintrag wird erst nach dem letzten Block sichtbar, bei einem Abbruch verworfen.
+    """
+
+    writer = cache.writer(key, attrs)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            yield chunk
+        writer.commit()
+    finally:
+        writer.close()
+
+
+class MlfbLookupPipeline:
+
+    """
+    Sammelt die VENDOR_ITEM_NUMBER-Einträge blockweise und fragt jede neue (noch nicht angefragte) Nummer
+    sofort im Hintergrund an, während der Aufrufer weiterliest bzw. lokal prüft. outcome() wartet auf die
+    ausstehenden Anfragen und überträgt die Ergebnisse auf alle Zeilen (wie _mlfb_outcome für die ganze Datei).
+    Ohne validate werden die Nummern nur gesammelt (items(), z. B. für den Batch-Modus).
+    """
+
+    def __init__(self, validate: Optional[Callable[[List[str]], List[Dict[str, Any]]]], threads: int = 1):
+        self.validate = validate
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="mlfb-lookup")
+        self.futures: List[Future] = []
+        self.positions: Dict[str, int] = {}
+        self.numbers: List[str] = []
+        self.labels: List[np.ndarray] = []
+        self.codes: List[np.ndarray] = []
+        self.has_column = False
+
+    def add(self, items: Optional[pd.Series]):
+        if items is None:
+            return
+        self.has_column = True
+        if not len(items):
+            return
+        codes, uniques = pd.factorize(items.to_numpy(dtype=object))
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        new = []
+        for i, number in enumerate(uniques):
+            number = str(number)
+            position = self.positions.get(number)
+            if position is None:
+                position = self.positions[number] = len(self.numbers)
+                self.numbers.append(number)
+                new.append(number)
+            mapping[i] = position
+        self.labels.append(items.index.to_numpy(dtype=np.int64))
+        self.codes.append(mapping[codes])
+        if new and self.validate is not None:
+            self.futures.append(self.executor.submit(lookup_mlfb_numbers, new, self.validate))
+
+    def items(self) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        # Zeilen-Labels, Nummer je Zeile (Code) und Nummern, wie mlfb_outcome_from_results sie erwartet
+        if not self.has_column:
+            return None
+        if not self.labels:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), []
+        return np.concatenate(self.labels), np.concatenate(self.codes), self.numbers
+
+    def outcome(self, metadata: Optional[dict] = None) -> Optional[RuleOutcome]:
+        if not self.has_column:
+            return None
+        if not self.labels:
+            return RuleOutcome(Violation.empty(), 0)
+        results = [result for future in self.futures for result in future.result()]
+        labels, codes = np.concatenate(self.labels), np.concatenate(self.codes)
+        print(f"[DEBUG] MLFB-Prüfung: {len(labels)} Zeilen, {len(self.numbers)} unterschiedliche Nummern")
+        return mlfb_outcome_from_results(labels, codes, self.numbers, results, metadata)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _blank_mask(series: pd.Series) -> np.ndarray:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Nur die Kategorien prüfen, Zeilen über die Codes zuordnen (Code -1 = fehlender Wert)
+        blank_categories = np.r_[series.cat.categories.astype(str).str.strip() == "", True]
+        return blank_categories[series.cat.codes.to_numpy()]
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        # Fehlende Werte liefern je nach String-Dtype NaN, NA oder False, daher isna separat
+        return series.isna().to_numpy() | series.str.fullmatch(r"\s*").fillna(False).to_numpy(dtype=bool)
+    return series.isna().to_numpy()
+
+
+def _blank_rows(df: pd.DataFrame) -> np.ndarray:
+
+    """
+    Zeilen, in denen jede Zelle fehlt oder nur Leerzeichen enthält. Spaltenweise ohne Textkopie des
+    ganzen Frames; jede weitere Spalte wird nur noch für die bisher leeren Zeilen geprüft.
+    """
+
+    candidates = np.arange(len(df))
+    for i in range(df.shape[1]):
+        if not len(candidates):
+            break
+        column = df.iloc[:, i]
+        if len(candidates) < len(df):
+            column = column.iloc[candidates]
+        candidates = candidates[_blank_mask(column)]
+    blank = np.zeros(len(df), dtype=bool)
+    blank[candidates] = True
+    return blank
+
+
+def streaming_threshold_bytes() -> int:
+    # Ab dieser Dateigröße wird blockweise geprüft (Agent und Batch-Modus); erst beim Aufruf gelesen (.env)
+    return int(os.getenv("VALIDATION_STREAMING_THRESHOLD_MB", "512")) * 1024 * 1024
+
+
+def default_product_service(api_url: str, client_id: str, client_secret: str) -> ProductNumberCheckService:
+
+    """
+    Norm-API-Client hinter dem persistenten MLFB-Cache (abschaltbar mit MLFB_CACHE=0). Der Client wird
+    erst beim ersten Cache-Fehltreffer erzeugt, ein warmer Cache braucht also keine Anmeldung.
+    Mit MLFB_API_CONCURRENCY > 1 (Standard 8) laufen die Batches nebenläufig über einen Verbindungs-Pool.
+    Ist MLFB_INDEX_PATH gesetzt, beantwortet zuerst der lokale MLFB-Index (Stammdaten) alle ihm bekannten Nummern.
+    """
+
+    def create_client() -> ProductNumberCheckService:
+        concurrency = int(os.getenv("MLFB_API_CONCURRENCY", "8"))
+        if concurrency <= 1:
+            return ProductNumberCheckServiceImpl(api_url, client_id, client_secret)
+        from imc_norm.async_product_number_check_service_impl import AsyncProductNumberCheckServiceImpl
+        return AsyncProductNumberCheckServiceImpl(api_url, client_id, client_secret, max_concurrency=concurrency)
+
+    if os.getenv("MLFB_CACHE", "1") == "0":
+        fallback = create_client
+    else:
+        fallback = CachedProductNumberCheckService.from_env(create_client)
+    index = LocalProductNumberIndex.from_env(fallback)
+    if index is not None:
+        return index
+    return fallback if isinstance(fallback, ProductNumberCheckService) else fallback()
+
 
 class DataChecker:
 
@@ -10,35 +358,46 @@ class DataChecker:
     Sie nutzt u.a. externe API-Checks (MLFB).
     """
 
-    def __init__(self, api_url: str, client_id: str, client_secret: str):
-        self.product_service = ProductNumberCheckServiceImpl(api_url, client_id, client_secret)
-
+    def __init__(self, api_url: str, client_id: str, client_secret: str,
+                 parse_cache: Optional[ParsedFileCache] = None,
+                 product_service: Optional[ProductNumberCheckService] = None):
+        # product_service ersetzt den API-Client (z. B. für Benchmarks ohne Netzwerkzugriff)
+        if product_service is None:
+            product_service = default_product_service(api_url, client_id, client_secret)
+        self.product_service = InstrumentedProductNumberService(product_service)
+        self.plan = build_default_plan()
+        self.parse_cache = parse_cache
+
+    @instrumented
     def read_csv_file(self, file_path: str) -> pd.DataFrame:
 
         """
-        Liest die CSV-Datei ein (erst UTF-8, fallback ISO-8859-1),
-        entfernt leere Spalten/Zeilen und prüft auf bekannte Fehlermeldungen.
+        Liest die CSV-Datei genau einmal ein. Kodierung (inkl. BOM), Zeilenende und Trennzeichen
+        werden vorab aus einer Stichprobe bestimmt, der erkannte Dialekt steht in df.attrs["dialect"].
+        Bekannte POS-Spalten werden speichersparend typisiert (siehe POS_SCHEMA).
+        Entfernt leere Spalten/Zeilen und prüft auf bekannte Fehlermeldungen.
+        Mit parse_cache wird eine bereits geparste Datei (gleicher Inhalt) direkt aus dem Cache geladen.
         """
 
         try:
-            with open(file_path, "rb") as f:
-                start_bytes = f.read(1024)
-                if b"Wrong File Format" in start_bytes:
-                    raise ValueError("Datei enthält Fehlermeldung: 'Wrong File Format (SFTP only)'")
+            cache_key = None
+            if self.parse_cache is not None:
+                cache_key = self.parse_cache.key(file_path, {"reader": "read_csv_file"})
+                df = self.parse_cache.get(cache_key)
+                if df is not None:
+                    return df
 
-            try:
-                df = pd.read_csv(file_path, delimiter=";", encoding="utf-8-sig", dtype=str)
-            except UnicodeDecodeError:
-                print("[DEBUG] utf-8-sig fehlgeschlagen, versuche ISO-8859-1")
-                df = pd.read_csv(file_path, delimiter=";", encoding="ISO-8859-1", dtype=str)
+            dialect = self._sniff_file(file_path)
 
-            df.columns = [col.upper().strip() for col in df.columns]
-            df = df.loc[:, ~df.columns.str.startswith('UNNAMED')]
+            # Ungültige Bytes hinter der Stichprobe werden beim Dekodieren ersetzt, nicht neu geparst
+            df = pd.read_csv(file_path, **self._ingest_options(file_path, dialect), **dialect.read_csv_kwargs())
 
-            df = df.dropna(how='all')
-            df = df[~(df.astype(str).apply(lambda x: x.str.strip() == '').all(axis=1))]
+            df = self._clean_frame(df)
+            df.attrs["dialect"] = dialect.to_dict()
+            if cache_key is not None:
+                self.parse_cache.put(cache_key, df)
 
-            print(f"[DEBUG] DataFrame geladen, Zeilen: {len(df)} Spalten: {len(df.columns)}")
+            print(f"[DEBUG] DataFrame geladen, Zeilen: {len(df)} Spalten: {len(df.columns)}, Dialekt: {dialect}")
             return df
 
         except Exception as e:
@@ -46,301 +405,555 @@ class DataChecker:
             # Signalisiere Fehler weiter
             raise RuntimeError(f"Dateifehler: {e}")
 
-    def check_general_data(self, df: pd.DataFrame) -> dict:
+    def iter_csv_chunks(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        dialect: Optional[CsvDialect] = None):
 
         """
-        Prüft allgemeine Pflichtspalten und das Format von Rechnungsnummern.
+        Liest die CSV-Datei in Blöcken von höchstens chunk_size Zeilen.
+        Die Index-Labels laufen über alle Blöcke weiter, Zeilennummern bleiben also global.
         """
 
-        results = {}
-
-        # Mandatory-Spalten
-        mandatory_columns = [
-            "DISTRIBUTOR_SENDER_ID", "DISTRIBUTOR_ORDER_TAKING_BRANCH_NAME", "DISTRIBUTOR_ORDER_TAKING_BRANCH_ID",
-            "DISTRIBUTOR_SHIP_DATE", "DISTRIBUTOR_INVOICE_DATE", "DISTRIBUTOR_INVOICE_NUMBER",
-            "DISTRIBUTOR_INVOICE_LINE_ITEM",
-            "BILL_TO_CUSTOMER_DUNS_NUMBER", "BILL_TO_CUSTOMER_NATIONAL_REG_NUMBER", "BILL_TO_CUSTOMER_NAME",
-            "BILL_TO_CUSTOMER_BILLING_ADDRESS1", "BILL_TO_CUSTOMER_BILLING_ADDRESS2", "BILL_TO_CUSTOMER_CITY",
-            "BILL_TO_CUSTOMER_STATE", "BILL_TO_CUSTOMER_ZIP", "BILL_TO_CUSTOMER_COUNTRY",
-            "SHIP_TO_CUSTOMER_DUNS_NUMBER", "SHIP_TO_CUSTOMER_NATIONAL_REG_NUMBER", "SHIP_TO_CUSTOMER_CUSTOMER_NAME",
-            "SHIP_TO_CUSTOMER_ADDRESS1", "SHIP_TO_CUSTOMER_ADDRESS2", "SHIP_TO_CUSTOMER_CITY",
-            "SHIP_TO_CUSTOMER_STATE", "SHIP_TO_CUSTOMER_ZIP", "SHIP_TO_CUSTOMER_COUNTRY",
-            "VENDOR_ITEM_NUMBER", "VENDOR_ITEM_OPTIONS", "ITEM_DESCRIPTION", "PRODUCT_FAMILY",
-            "QUANTITY", "QUANTITY_UNIT_OF_MEASURE", "UNIT_REPLENISHMENT_COST", "EXTENDED_REPLENISHMENT_COST",
-            "UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD", "COST_UNIT_OF_MEASURE", "CURRENCY_CODE", "REBATE_NUMBER"
-        ]
-
-        # Fehlende Spalten prüfen
-        missing_columns = [col for col in mandatory_columns if col not in df.columns]
-        if missing_columns:
-            results["missing_columns"] = missing_columns
-
-        # Leere Werte in vorhandenen Pflichtspalten
-        for col in mandatory_columns:
-            if col in df.columns:
-                missing_rows = df[
-                    df[col].isnull() | (df[col].astype(str).str.strip() == "")
-                    ]
-                if not missing_rows.empty:
-                    if len(missing_rows) == len(df):
-                        # Alle Zeilen betroffen
-                        results[f"missing_values_in_{col}"] = ["Alle Zeilen betroffen (100%)"]
-                    else:
-                        results[f"missing_values_in_{col}"] = [f"{len(missing_rows)} Zeilen betroffen"]
-            else:
-                results[f"missing_values_in_{col}"] = ["Spalte fehlt komplett"]
-
-        # === Invoice Number Pattern Check ===
-        numeric_pattern = re.compile(r"^\d+$")
-        hex_pattern = re.compile(r"^[a-f0-9]{32}$", re.IGNORECASE)
-        prefix_pattern = re.compile(r"^[A-Z]\d+$")
-
-        if "DISTRIBUTOR_INVOICE_NUMBER" in df.columns:
-            invoice_series = df["DISTRIBUTOR_INVOICE_NUMBER"].astype(str).str.strip()
-            invalid_invoices = df[
-                ~(
-                        invoice_series.str.match(numeric_pattern, na=False) |
-                        invoice_series.str.match(hex_pattern, na=False) |
-                        invoice_series.str.match(prefix_pattern, na=False)
-                )
-            ]
-            if not invalid_invoices.empty:
-                results["invalid_invoice_numbers"] = [
-                    f"Zeile {idx + 1}: {val}" for idx, val in
-                    zip(invalid_invoices.index, invalid_invoices["DISTRIBUTOR_INVOICE_NUMBER"])
-                ]
-
-        return results
+        dialect = dialect or self._sniff_file(file_path)
+        options = self._ingest_options(file_path, dialect)
+        with pd.read_csv(file_path, chunksize=chunk_size, **options, **dialect.read_csv_kwargs()) as reader:
+            for chunk in reader:
+                yield self._clean_frame(chunk)
 
-    def check_mlfb_numbers(self, df: pd.DataFrame) -> list:
+    @instrumented
+    def check_file_streaming(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
 
         """
-         Führt API-Check auf alle VENDOR_ITEM_NUMBER-Einträge durch
-         und gibt Liste ungültiger MLFB-Nummern zurück.
-         """
+        Streaming-Modus für sehr große Dateien: liest die Datei blockweise, führt alle Checks
+        (inkl. MLFB) pro Block aus und führt die Ergebnisse inkrementell zusammen.
+        Der Speicherbedarf hängt von der Blockgröße ab, nicht von der Dateigröße.
 
-        if "VENDOR_ITEM_NUMBER" not in df.columns:
-            return ["Fehler: Spalte 'VENDOR_ITEM_NUMBER' nicht gefunden"]
+        :return: Tupel (Ergebnisse je Kategorie wie in check_data_node, Anzahl geprüfter Zeilen)
+        """
 
-        item_series = df["VENDOR_ITEM_NUMBER"].dropna().astype(str).str.strip()
-        all_numbers = item_series.tolist()
-        all_indices = item_series.index.tolist()
+        report = self.validate_file_streaming(file_path, chunk_size)
+        if report is None:
+            return {}, 0
+        return self.report_results(report), report.n_rows
 
-        if not all_numbers:
-            return ["Keine VENDOR_ITEM_NUMBER vorhanden, MLFB-Prüfung übersprungen"]
+    @instrumented
+    def validate_file_streaming(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                max_violations: Optional[int] = None,
+                                max_rows: Optional[int] = None) -> Optional[ValidationReport]:
 
-        api_results = self.product_service.validate_product_numbers_batch(all_numbers)
+        """
+        Wie check_file_streaming, liefert aber den zusammengeführten ValidationReport
+        (None bei einer Datei ohne Datenzeilen).
 
-        invalid_entries = []
-        valid_systems = ["MLFB", "TNS", "SFC", "SSN"]
-        for idx, num, result in zip(all_indices, all_numbers, api_results):
-            output = result.get("output", {})
-            system = output.get("system")
-            if system not in valid_systems :
-                invalid_entries.append(f"Zeile {idx + 1}: {num}")
+        Schnellmodus: Mit max_violations werden je Regel nur die ersten max_violations Zeilen behalten;
+        sind alle zeilenbezogenen Regeln voll (oder max_rows Zeilen gelesen), wird vorzeitig abgebrochen.
+        Regeln, die bereits voll sind, fragen die MLFB-API nicht mehr an.
+        """
 
-        if invalid_entries:
-            return [f"Ungültige MLFB-Nummern:\n" + "\n".join(invalid_entries)]
-        else:
-            return ["Alle MLFB-Nummern sind gültig"]
+        try:
+            dialect = self._sniff_file(file_path)
+            report = self._validate_chunks(self.iter_csv_chunks(file_path, chunk_size, dialect),
+                                           max_violations, max_rows)
+        except Exception as e:
+            print(f"[ERROR] Fehler beim Einlesen der Datei: {e}")
+            raise RuntimeError(f"Dateifehler: {e}")
 
-    def check_distributor_data(self, df: pd.DataFrame) -> dict:
+        if report is not None and report.n_rows:
+            report.metadata["dialect"] = dialect.to_dict()
+        return report
+
+    @instrumented
+    def validate_file_pipelined(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                                mlfb_lookup: Optional[MlfbLookupPipeline] = None) -> Optional[ValidationReport]:
 
         """
-        Prüft Distributoren-bezogene Spalten (z. B. Invoice-Datum, Sender-ID)
-        auf Vollständigkeit und korrektes Format.
+        Vollständige Prüfung als Pipeline: ein Hintergrund-Thread liest die Datei blockweise, die neuen Nummern
+        jedes Blocks gehen sofort an die Norm-API, während die lokalen Prüfungen des Blocks laufen. Die Laufzeit
+        liegt damit nahe max(Einlesen + lokale Prüfungen, MLFB-Anfragen) statt bei deren Summe.
+        Ergebnis wie validate_file_streaming (None bei einer Datei ohne Datenzeilen), workers wie bei validate_frame.
+        Mit parse_cache schreibt der Lese-Thread die Blöcke zugleich in den Cache (gleicher Eintrag wie
+        read_csv_file), ein Treffer wird direkt geprüft.
+        Mit mlfb_lookup gehen die Nummern an diesen statt an die Norm-API, die MLFB-Regel fehlt dann im Report.
         """
 
-        results = {}
+        try:
+            cache_key = None
+            if self.parse_cache is not None:
+                cache_key = self.parse_cache.key(file_path, {"reader": "read_csv_file"})
+                df = self.parse_cache.get(cache_key)
+                if df is not None:
+                    if mlfb_lookup is None:
+                        return self.validate_frame(df, workers=workers) if len(df) else None
+                    mlfb_lookup.add(self.mlfb_items(df))
+                    return self.validate_frame(df, workers=workers, mlfb=False) if len(df) else None
+            dialect = self._sniff_file(file_path)
+            chunks = self.iter_csv_chunks(file_path, chunk_size, dialect)
+            # Größer als der ganze Cache: würde nur alle übrigen Einträge verdrängen
+            if cache_key is not None and os.path.getsize(file_path) <= self.parse_cache.max_bytes:
+                chunks = _cached_chunks(chunks, self.parse_cache, cache_key, {"dialect": dialect.to_dict()})
+            report = self._validate_pipelined(chunks, workers, mlfb_lookup)
+        except Exception as e:
+            print(f"[ERROR] Fehler beim Einlesen der Datei: {e}")
+            raise RuntimeError(f"Dateifehler: {e}")
 
-        if "DISTRIBUTOR_INVOICE_DATE" in df.columns:
-            date_pattern = re.compile(r"\d{4}-\d{2}-\d{2}")
-            invalid_dates = df[
-                ~df["DISTRIBUTOR_INVOICE_DATE"].astype(str).str.match(date_pattern, na=False)
-            ]
-            results["invalid_distributor_invoice_dates"] = [f"Zeile {idx + 1}: {val}" for idx, val in zip(invalid_dates.index, invalid_dates["DISTRIBUTOR_INVOICE_DATE"])]
-        else:
-            results["invalid_distributor_invoice_dates"] = ["Spalte 'DISTRIBUTOR_INVOICE_DATE' fehlt"]
+        if report is not None and report.n_rows:
+            report.metadata["dialect"] = dialect.to_dict()
+        return report
+
+    def _validate_pipelined(self, chunks, workers: int = 1,
+                            lookup: Optional[MlfbLookupPipeline] = None) -> Optional[ValidationReport]:
+        report = None
+        # Ein übergebener lookup gehört dem Aufrufer: der prüft (bzw. sammelt nur) die Nummern selbst
+        owned = lookup is None
+        if owned:
+            lookup = MlfbLookupPipeline(self.product_service.validate_product_numbers_batch)
+        requests_before = getattr(self.product_service, "request_count", None)
+        try:
+            for chunk in prefetch(chunks):
+                lookup.add(self.mlfb_items(chunk))
+                chunk_report = self.validate_frame(chunk, workers=workers, mlfb=False)
+                report = chunk_report if report is None else report.merge(chunk_report).resolve(chunk)
+                print(f"[DEBUG] Chunk geprüft, Zeilen gesamt: {report.n_rows}")
+            if report is not None and owned:
+                report.add(self.plan.rule("mlfb", None), lookup.outcome(report.metadata))
+        finally:
+            if owned:
+                lookup.close()
+
+        # Die Anfragen laufen in einem eigenen Thread (ohne Metrik-Kontext): hier gesammelt zählen
+        if owned and lookup.numbers:
+            requests_after = getattr(self.product_service, "request_count", None)
+            record_external_call(len(lookup.numbers), requests_after - requests_before
+                                 if requests_before is not None else len(lookup.futures))
+        return report
+
+    def _validate_chunks(self, chunks, max_violations: Optional[int] = None,
+                         max_rows: Optional[int] = None) -> Optional[ValidationReport]:
+        report = None
+        mlfb_rule = self.plan.rule("mlfb", None)
+        hits: Dict[tuple, int] = {}
+        # Ergebnisse je Nummer über alle Blöcke: jede Nummer wird je Datei nur einmal angefragt
+        mlfb_seen: Dict[str, Dict[str, Any]] = {}
+        complete = True
+        for chunk in chunks:
+            mlfb_full = report is not None and max_violations is not None \
+                and hits.get(("mlfb", None), 0) >= max_violations
+            chunk_report = self.validate_frame(chunk, mlfb=False)
+            if mlfb_full:
+                # Nicht mehr angefragt: zählt auch nicht als geprüft
+                chunk_report.add(mlfb_rule, RuleOutcome(Violation.empty(), 0))
+            else:
+                chunk_report.add(mlfb_rule, self._mlfb_outcome(chunk, chunk_report.metadata, mlfb_seen))
+            if report is None:
+                report = chunk_report
+            else:
+                mlfb_metadata = {key: merge_mlfb_metadata(report.metadata.get(key), chunk_report.metadata.get(key))
+                                 for key in ("mlfb_unchecked", "mlfb_prefilter")}
+                report = report.merge(chunk_report).resolve(chunk)
+                report.metadata.update({key: value for key, value in mlfb_metadata.items() if value is not None})
+            print(f"[DEBUG] Chunk geprüft, Zeilen gesamt: {report.n_rows}")
+
+            if max_violations is None:
+                continue
+            for category, entries in chunk_report.outcomes.items():
+                for rule, outcome in entries:
+                    if isinstance(outcome, RuleOutcome):
+                        hits[(category, rule.key)] = hits.get((category, rule.key), 0) + len(outcome)
+            all_full = self._cap_report(report, max_violations, hits)
+            if all_full or (max_rows is not None and report.n_rows >= max_rows):
+                complete = False
+                break
+
+        prefilter = report.metadata.get("mlfb_prefilter") if report is not None else None
+        if prefilter is not None and not prefilter["numbers"]:
+            # Wie bei der Prüfung in einem Stück nur vermerkt, wenn Nummern offline verworfen wurden
+            del report.metadata["mlfb_prefilter"]
+        if report is not None and max_violations is not None:
+            report.metadata["validation_mode"] = {
+                "mode": "capped",
+                "max_violations": max_violations,
+                "rows_scanned": report.n_rows,
+                "complete": complete,
+                "capped": {f"{category}.{key}" if key else category: n
+                           for (category, key), n in hits.items() if n > max_violations},
+            }
+        return report
+
+    def _cap_report(self, report: ValidationReport, max_violations: int, hits: Dict[tuple, int]) -> bool:
+
+        """
+        Kürzt alle Regel-Ergebnisse auf max_violations Zeilen. True, wenn jede zeilenbezogene Regel voll ist.
+        """
+
+        all_full = True
+        for category, entries in report.outcomes.items():
+            for i, (rule, outcome) in enumerate(entries):
+                if not isinstance(outcome, RuleOutcome):
+                    continue
+                if len(outcome) > max_violations:
+                    entries[i] = (rule, RuleOutcome(outcome.violation.head(max_violations), outcome.n_rows))
+                all_full = all_full and hits.get((category, rule.key), 0) >= max_violations
+        return all_full
 
-        if "DISTRIBUTOR_SENDER_ID" in df.columns:
-            missing_sender_id = df[
-                df["DISTRIBUTOR_SENDER_ID"].isnull() | (df["DISTRIBUTOR_SENDER_ID"].astype(str).str.strip() == "")
-            ]
-            results["missing_sender_id"] = [f"Zeile {idx + 1}" for idx in missing_sender_id.index]
+    @instrumented
+    def validate_file_sample(self, file_path: str, sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                             seed: Optional[int] = None) -> Optional[ValidationReport]:
+
+        """
+        Stichprobenmodus: prüft ca. sample_rows zufällige Zeilen (Blöcke an zufälligen Byte-Positionen,
+        die Datei wird nicht komplett gelesen). report_results liefert dann hochgerechnete Fehlerquoten
+        mit 95-%-Konfidenzintervall. Kleine Dateien werden vollständig geprüft (exact=True).
+        """
+
+        dialect = self._sniff_file(file_path)
+        terminator = dialect.line_terminator.encode("ascii")
+        header, body, estimated_rows, bounds = sample_csv_lines(file_path, sample_rows, terminator, seed=seed)
+
+        if estimated_rows <= sample_rows:
+            df = self.read_csv_file(file_path)
+            exact, estimated_rows = True, len(df)
         else:
-            results["missing_sender_id"] = ["Spalte 'DISTRIBUTOR_SENDER_ID' fehlt"]
+            df = pd.read_csv(io.BytesIO(header + body), **self._ingest_options(file_path, dialect),
+                             **dialect.read_csv_kwargs())
+            # Blockgrenzen als Zeilen-Labels (weichen nur bei leeren bzw. mehrzeiligen Zeilen von den Zeilen ab)
+            if bounds[-1]:
+                bounds = bounds * len(df) // bounds[-1]
+            df = self._clean_frame(df)
+            exact = False
+        if not len(df):
+            return None
+
+        report = self.validate_frame(df)
+        report.metadata["dialect"] = dialect.to_dict()
+        report.metadata["validation_mode"] = {
+            "mode": "sample",
+            "sample_rows": report.n_rows,
+            "estimated_rows": estimated_rows,
+            "exact": exact,
+        }
+        if not exact:
+            # Für die Konfidenzintervalle: Zeilen eines Blocks sind nicht unabhängig
+            report.metadata["validation_mode"]["block_bounds"] = bounds.tolist()
+        return report
 
-        if "DISTRIBUTOR_INVOICE_NUMBER" in df.columns:
-            missing_invoice_number = df[
-                df["DISTRIBUTOR_INVOICE_NUMBER"].isnull() | (df["DISTRIBUTOR_INVOICE_NUMBER"].astype(str).str.strip() == "")
-            ]
-            results["missing_invoice_number"] = [f"Zeile {idx + 1}" for idx in missing_invoice_number.index]
+    @instrumented
+    def validate_frame(self, df: pd.DataFrame, workers: int = 1, mlfb: bool = True) -> ValidationReport:
+
+        """
+        Führt alle Prüfungen (lokal + MLFB) aus und liefert den kompakten ValidationReport.
+        Der Report kann mit to_state() im State abgelegt und mit revalidate() nachgeführt werden.
+        Mit mlfb=False entfällt der API-Check (z. B. wenn die Nummern gesammelt nachgeschlagen werden).
+        """
+
+        if workers > 1:
+            report = evaluate_parallel(self.plan, df, workers=workers)
         else:
-            results["missing_invoice_number"] = ["Spalte 'DISTRIBUTOR_INVOICE_NUMBER' fehlt"]
+            report = self.plan.evaluate(df)
+        if mlfb:
+            report.add(self.plan.rule("mlfb", None), self._mlfb_outcome(df, report.metadata))
+        if "dialect" in df.attrs:
+            report.metadata["dialect"] = df.attrs["dialect"]
+        return report
 
-        return results
+    @instrumented
+    def revalidate(self, report: ValidationReport, df: pd.DataFrame, touched: Dict[Any, set],
+                   previous: Optional[Dict[Any, Any]] = None) -> ValidationReport:
 
-    def check_customer_data(self, df: pd.DataFrame) -> dict:
+        """
+        Führt den Report nach Korrekturen nach, ohne die ganze Datei neu zu prüfen.
+        Neu ausgewertet werden nur die geänderten Zellen (touched: Zeilen-Label -> geänderte Spalten)
+        sowie davon abhängige Aggregat-Regeln; die MLFB-API wird nur für geänderte Nummern gefragt.
+        previous (Zeilen-Label -> bisherige VENDOR_ITEM_NUMBER) korrigiert die dateiweiten Zähler in
+        mlfb_prefilter/mlfb_unchecked um den Beitrag der geänderten Zeilen.
+        """
+
+        self.plan.revalidate(report, df, touched)
+
+        mlfb_rule = self.plan.rule("mlfb", None)
+        old = report.outcome(mlfb_rule)
+        labels = [label for label, columns in touched.items() if "VENDOR_ITEM_NUMBER" in columns]
+        if labels and isinstance(old, RuleOutcome):
+            # Eigene Metadaten: die Zähler der geänderten Zeilen dürfen die der ganzen Datei nicht überschreiben
+            results: Dict[str, Dict[str, Any]] = {}
+            new = self._mlfb_outcome(df.loc[labels, ["VENDOR_ITEM_NUMBER"]], {}, results)
+            violation = old.violation.remove_rows(RowSet.from_labels(labels)).merge(new.violation)
+            report.replace(mlfb_rule, RuleOutcome(violation, max(old.n_rows, new.n_rows)))
+            if previous is not None:
+                self._update_mlfb_metadata(report.metadata, df, labels, previous, results)
+        return report
+
+    def _update_mlfb_metadata(self, metadata: dict, df: pd.DataFrame, labels: list, previous: Dict[Any, Any],
+                              results: Dict[str, Dict[str, Any]]):
 
         """
-        Prüft Kundendaten: Länder, Staaten (US/MX), Namen, ZIPs,
-        ob sie gültig und vollständig sind.
+        Zieht den Beitrag der alten Nummern (previous) der geänderten Zeilen von mlfb_prefilter/mlfb_unchecked ab
+        und addiert den der neuen (results). Nummern zählen je Datei einmal, ändern die Zähler also nur, wenn sie
+        durch die Korrektur neu in der Datei vorkommen bzw. ganz aus ihr verschwinden. Ob eine alte Nummer nicht
+        prüfbar war, ist nur über die Beispiele in mlfb_unchecked bekannt.
         """
 
-        results = {}
-        known_countries = {"DE", "US", "MX", "GB", "UK", "FR", "IT", "ES", "CN", "JP"}
+        items = self.mlfb_items(df)
+        old_items = pd.Series([previous.get(label) for label in labels], index=labels, dtype=object)
+        old_counts = old_items.dropna().astype(str).str.strip().value_counts()
+        new_counts = items[items.index.isin(labels)].value_counts()
+        affected = old_counts.index.union(new_counts.index)
+        old_counts = old_counts.reindex(affected, fill_value=0)
+        new_counts = new_counts.reindex(affected, fill_value=0)
+        after = items[items.isin(affected)].value_counts().reindex(affected, fill_value=0)
+        before = after - new_counts + old_counts
+        rows = (new_counts - old_counts).to_numpy()
+        presence = ((before == 0) & (after > 0)).to_numpy().astype(int) - ((before > 0) & (after == 0)).to_numpy()
+
+        numbers = [str(number) for number in affected]
+        prefiltered = np.array([reason is not None for reason in mlfb_syntax_errors(numbers)], dtype=bool)
+        unchecked = metadata.get("mlfb_unchecked") or {"numbers": 0, "rows": 0, "statuses": {}, "examples": []}
+        old_examples = set(unchecked["examples"])
+        errors = [results[number].get("error") if number in results
+                  else {"status": None} if number in old_examples else None for number in numbers]
+        failed = np.array([error is not None for error in errors], dtype=bool)
+
+        # Ohne Eintrag wurde nichts offline verworfen: gesendet wurden alle Nummern der Datei vor der Korrektur
+        prefilter = metadata.get("mlfb_prefilter") or {
+            "numbers": 0, "rows": 0, "sent_numbers": int(items.nunique()) - int(presence.sum())}
+        prefilter = {
+            "numbers": prefilter["numbers"] + int(presence[prefiltered].sum()),
+            "rows": prefilter["rows"] + int(rows[prefiltered].sum()),
+            "sent_numbers": prefilter["sent_numbers"] + int(presence[~prefiltered].sum()),
+        }
+        statuses = dict(unchecked["statuses"])
+        examples = list(unchecked["examples"])
+        for number, error, change in zip(numbers, errors, presence):
+            if error is None or not change:
+                continue
+            if change > 0:
+                status = str(error.get("status") or "connection")
+                statuses[status] = statuses.get(status, 0) + 1
+                examples.append(number)
+            elif number in examples:
+                # Der Status alter Nummern ist nicht gespeichert, statuses bleibt deshalb unverändert
+                examples.remove(number)
+        unchecked = {
+            "numbers": unchecked["numbers"] + int(presence[failed].sum()),
+            "rows": unchecked["rows"] + int(rows[failed].sum()),
+            "statuses": {status: n for status, n in statuses.items() if n > 0},
+            "examples": examples[:MLFB_UNCHECKED_EXAMPLES],
+        }
 
-        # BILL_TO checks
-        if "BILL_TO_CUSTOMER_COUNTRY" in df.columns:
-            invalid_countries = df[
-                ~df["BILL_TO_CUSTOMER_COUNTRY"].astype(str).str.upper().isin(known_countries)
-            ]
-            results["invalid_bill_to_countries"] = [f"Zeile {idx + 1}: {val}" for idx, val in
-                                                    zip(invalid_countries.index,
-                                                        invalid_countries["BILL_TO_CUSTOMER_COUNTRY"])]
-        else:
-            results["invalid_bill_to_countries"] = ["Spalte 'BILL_TO_CUSTOMER_COUNTRY' fehlt"]
+        # Wie bei der vollständigen Prüfung nur vermerkt, wenn es solche Nummern gibt
+        for key, value in (("mlfb_prefilter", prefilter), ("mlfb_unchecked", unchecked)):
+            if value["numbers"] > 0:
+                metadata[key] = value
+            else:
+                metadata.pop(key, None)
 
-        if "BILL_TO_CUSTOMER_NAME" in df.columns:
-            missing_names = df[
-                df["BILL_TO_CUSTOMER_NAME"].isnull() | (df["BILL_TO_CUSTOMER_NAME"].astype(str).str.strip() == "")
-                ]
-            results["missing_bill_to_names"] = [f"Zeile {idx + 1}" for idx in missing_names.index]
-        else:
-            results["missing_bill_to_names"] = ["Spalte 'BILL_TO_CUSTOMER_NAME' fehlt"]
+    def report_results(self, report: ValidationReport) -> dict:
 
-        if "BILL_TO_CUSTOMER_ZIP" in df.columns:
-            missing_zip = df[
-                df["BILL_TO_CUSTOMER_ZIP"].isnull() | (df["BILL_TO_CUSTOMER_ZIP"].astype(str).str.strip() == "")
-                ]
-            results["missing_bill_to_zip"] = [f"Zeile {idx + 1}" for idx in missing_zip.index]
-        else:
-            results["missing_bill_to_zip"] = ["Spalte 'BILL_TO_CUSTOMER_ZIP' fehlt"]
-
-        if "SHIP_TO_CUSTOMER_COUNTRY" in df.columns:
-            invalid_countries = df[
-                ~df["SHIP_TO_CUSTOMER_COUNTRY"].astype(str).str.upper().isin(known_countries)
-            ]
-            results["invalid_ship_to_countries"] = [f"Zeile {idx + 1}: {val}" for idx, val in
-                                                    zip(invalid_countries.index,
-                                                        invalid_countries["SHIP_TO_CUSTOMER_COUNTRY"])]
-        else:
-            results["invalid_ship_to_countries"] = ["Spalte 'SHIP_TO_CUSTOMER_COUNTRY' fehlt"]
-
-        if "SHIP_TO_CUSTOMER_CUSTOMER_NAME" in df.columns:
-            missing_ship_names = df[
-                df["SHIP_TO_CUSTOMER_CUSTOMER_NAME"].isnull() | (
-                            df["SHIP_TO_CUSTOMER_CUSTOMER_NAME"].astype(str).str.strip() == "")
-                ]
-            results["missing_ship_to_names"] = [f"Zeile {idx + 1}" for idx in missing_ship_names.index]
-        else:
-            results["missing_ship_to_names"] = ["Spalte 'SHIP_TO_CUSTOMER_CUSTOMER_NAME' fehlt"]
+        """
+        check_results-Form des Reports: Ergebnisse je Kategorie plus Metadaten (z. B. dialect).
+        """
 
-        if "SHIP_TO_CUSTOMER_ZIP" in df.columns:
-            missing_zip = df[
-                df["SHIP_TO_CUSTOMER_ZIP"].isnull() | (df["SHIP_TO_CUSTOMER_ZIP"].astype(str).str.strip() == "")
-                ]
-            results["missing_ship_to_zip"] = [f"Zeile {idx + 1}" for idx in missing_zip.index]
+        mode = report.metadata.get("validation_mode") or {}
+        if mode.get("mode") == "sample" and not mode.get("exact"):
+            all_results = self._sample_results(report)
         else:
-            results["missing_ship_to_zip"] = ["Spalte 'SHIP_TO_CUSTOMER_ZIP' fehlt"]
-
-        valid_us_states = {
-            'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-            'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
-            'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
-            'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
-            'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
-        }
+            all_results = report.all_results()
+        if mode.get("mode") == "capped":
+            for name, n in mode["capped"].items():
+                category, _, key = name.partition(".")
+                results = all_results.get(category, {}).get(key) if key else all_results.get(category)
+                if isinstance(results, list):
+                    results.append(f"… nur die ersten {mode['max_violations']} von mindestens {n} Zeilen angezeigt")
+        all_results.update(report.metadata)
+        return all_results
+
+    def _sample_results(self, report: ValidationReport) -> dict:
+
+        """
+        Ergebnisse des Stichprobenmodus: je Regel Trefferquote in der Stichprobe, 95-%-Konfidenzintervall
+        und hochgerechnete Zeilenzahl. Das Intervall wird über die gezogenen Blöcke geschätzt
+        (clustered_wilson_interval). Aggregat-Regeln (Duplikate, Datumsbereiche) entfallen, weil sie
+        sich aus einer Stichprobe nicht sinnvoll hochrechnen lassen.
+        """
+
+        population = report.metadata["validation_mode"]["estimated_rows"]
+        bounds = report.metadata["validation_mode"].get("block_bounds")
+        bounds = np.asarray(bounds) if bounds else None
+        estimates = {}
+        all_results = {}
+        for category, entries in report.outcomes.items():
+            category_results = {}
+            for rule, outcome in entries:
+                if getattr(rule, "aggregate", False):
+                    continue
+                if not isinstance(outcome, RuleOutcome) or not outcome.n_rows:
+                    formatted = rule.format(outcome)
+                    if rule.key is None:
+                        all_results[category] = formatted
+                    elif formatted is not None:
+                        category_results[rule.key] = formatted
+                    continue
+
+                hits, n = len(outcome), outcome.n_rows
+                if bounds is None:
+                    low, high = wilson_interval(hits, n)
+                else:
+                    # Intervall auf Blockebene; Bezugszeilen der Regel (z. B. nur Zeilen mit Nummer) anteilig je Block
+                    blocks = np.searchsorted(bounds, outcome.violation.rows.labels(), side="right") - 1
+                    block_hits = np.bincount(blocks, minlength=len(bounds) - 1)
+                    low, high = clustered_wilson_interval(block_hits, np.diff(bounds) * n / bounds[-1])
+                # Bezugsgröße hochrechnen (z. B. MLFB: nur Zeilen mit Nummer)
+                scale = population * n / report.n_rows
+                estimate = {"sample_hits": hits, "sample_rows": n, "rate": hits / n,
+                            "ci_low": low, "ci_high": high, "estimated_rows": round(hits / n * scale)}
+                estimates.setdefault(category, {})[rule.key or category] = estimate
+                if not hits:
+                    if rule.key is None:
+                        all_results[category] = rule.format(outcome)
+                    continue
+                line = (f"Stichprobe: {hits} von {n} Zeilen ({hits / n:.2%}, 95-%-KI {low:.2%}–{high:.2%}), "
+                        f"hochgerechnet ca. {estimate['estimated_rows']} von {round(scale)} Zeilen")
+                if rule.key is None:
+                    all_results[category] = [line]
+                else:
+                    category_results[rule.key] = [line]
+            if category not in all_results:
+                all_results[category] = category_results
+        report.metadata["validation_mode"]["estimates"] = estimates
+        return {category: all_results[category] for category in report.all_results()}
+
+    def _sniff_file(self, file_path: str) -> CsvDialect:
+        with open(file_path, "rb") as f:
+            sample = f.read(SNIFF_SAMPLE_BYTES)
+        if b"Wrong File Format" in sample[:1024]:
+            raise ValueError("Datei enthält Fehlermeldung: 'Wrong File Format (SFTP only)'")
+        return sniff_csv_dialect(file_path, sample=sample)
+
+    def _ingest_options(self, file_path: str, dialect: CsvDialect) -> Dict[str, Any]:
 
-        valid_mexican_states = {
-            'AGUASCALIENTES', 'BAJA CALIFORNIA', 'BAJA CALIFORNIA SUR', 'CAMPECHE',
-            'CHIAPAS', 'CHIHUAHUA', 'COAHUILA', 'COLIMA', 'DURANGO', 'GUANAJUATO',
-            'GUERRERO', 'HIDALGO', 'JALISCO', 'MEXICO', 'MICHOACAN', 'MORELOS',
-            'NAYARIT', 'NUEVO LEON', 'OAXACA', 'PUEBLA', 'QUERETARO', 'QUINTANA ROO',
-            'SAN LUIS POTOSI', 'SINALOA', 'SONORA', 'TABASCO', 'TAMAULIPAS',
-            'TLAXCALA', 'VERACRUZ', 'YUCATAN', 'ZACATECAS'
+        """
+        read_csv-Optionen aus dem Header: nur benannte Spalten werden geparst (die leeren 'Unnamed'-Spalten
+        aus ';;;;'-Zeilenenden gar nicht erst), bekannte POS-Spalten speichersparend typisiert (siehe
+        POS_SCHEMA), unbekannte Spalten wie bisher als str.
+        """
+
+        header = pd.read_csv(file_path, nrows=0, **dialect.read_csv_kwargs()).columns
+        usecols = [col for col in header if not str(col).upper().strip().startswith("UNNAMED")]
+        return {
+            "usecols": usecols,
+            "dtype": {col: POS_SCHEMA.get(str(col).upper().strip(), str) for col in usecols},
         }
 
-        valid_states = valid_us_states.union(valid_mexican_states)
+    def _clean_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        df.columns = [col.upper().strip() for col in df.columns]
+        df = df.loc[:, ~df.columns.str.startswith('UNNAMED')]
 
-        # === SHIP_TO ===
-        if "SHIP_TO_CUSTOMER_STATE" in df.columns:
-            state_series = df["SHIP_TO_CUSTOMER_STATE"].astype(str).str.strip().str.upper()
+        blank = _blank_rows(df)
+        return df[~blank] if blank.any() else df
 
-            missing_state = df[state_series == ""]
-            if not missing_state.empty:
-                if len(missing_state) == len(df):
-                    results["missing_ship_to_state"] = ["Alle Zeilen betroffen (100%)"]
-                else:
-                    results["missing_ship_to_state"] = [f"{len(missing_state)} Zeilen betroffen"]
+    @instrumented
+    def check_all(self, df: pd.DataFrame, workers: int = 1) -> dict:
 
-            invalid_mask = ~state_series.isin(valid_states) & (state_series != "")
-            results["invalid_ship_to_state"] = self.summarize_invalid_entries(df, "SHIP_TO_CUSTOMER_STATE",
-                                                                              invalid_mask)
+        """
+        Führt alle lokalen Prüfungen (General, Distributor, Customer, Financial)
+        in einem Durchlauf aus. Jede Spalte wird dabei nur einmal normalisiert.
+        Mit workers > 1 wird der DataFrame nach Zeilenbereichen auf einen Prozess-Pool verteilt.
+        """
 
-        # === BILL_TO ===
-        if "BILL_TO_CUSTOMER_STATE" in df.columns:
-            state_series = df["BILL_TO_CUSTOMER_STATE"].astype(str).str.strip().str.upper()
+        if workers > 1:
+            return evaluate_parallel(self.plan, df, workers=workers).all_results()
+        return self.plan.evaluate(df).all_results()
 
-            missing_state = df[state_series == ""]
-            if not missing_state.empty:
-                if len(missing_state) == len(df):
-                    results["missing_bill_to_state"] = ["Alle Zeilen betroffen (100%)"]
-                else:
-                    results["missing_bill_to_state"] = [f"{len(missing_state)} Zeilen betroffen"]
+    @instrumented
+    def check_general_data(self, df: pd.DataFrame) -> dict:
 
-            invalid_mask = ~state_series.isin(valid_states) & (state_series != "")
-            results["invalid_bill_to_state"] = self.summarize_invalid_entries(df, "BILL_TO_CUSTOMER_STATE",
-                                                                              invalid_mask)
+        """
+        Prüft allgemeine Pflichtspalten und das Format von Rechnungsnummern.
+        """
 
-        return results
+        return self.plan.evaluate(df, ["general"]).results("general")
 
-    def check_financial_data(self, df: pd.DataFrame) -> dict:
+    @instrumented
+    def check_mlfb_numbers(self, df: pd.DataFrame) -> list:
 
         """
-        Prüft Finanzdaten wie Währungen, Kostenfelder und Mengen
-        auf numerische Korrektheit und gültige Codes.
+         Führt API-Check auf alle VENDOR_ITEM_NUMBER-Einträge durch
+         und gibt Liste ungültiger MLFB-Nummern zurück.
+         """
+
+        mlfb_rule = self.plan.rule("mlfb", None)
+        return mlfb_rule.format(self._mlfb_outcome(df))
+
+    def mlfb_items(self, df: pd.DataFrame) -> Optional[pd.Series]:
+
+        """
+        Zu prüfende VENDOR_ITEM_NUMBER-Einträge (ohne leere, getrimmt, Index = Zeilen-Label).
+        None, wenn die Spalte fehlt.
         """
 
-        results = {}
-        known_currencies = {"USD", "EUR", "GBP", "JPY", "MXN", "CAD", "AUD", "CHF"}
+        if "VENDOR_ITEM_NUMBER" not in df.columns:
+            return None
+        return df["VENDOR_ITEM_NUMBER"].dropna().astype(str).str.strip()
 
-        if "CURRENCY_CODE" in df.columns:
-            invalid_currencies = df[
-                ~df["CURRENCY_CODE"].astype(str).str.upper().isin(known_currencies)
-            ]
-            results["invalid_currencies"] = [f"Zeile {idx + 1}: {val}" for idx, val in zip(invalid_currencies.index, invalid_currencies["CURRENCY_CODE"])]
-        else:
-            results["invalid_currencies"] = ["Spalte 'CURRENCY_CODE' fehlt"]
-
-        for col in ["UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD"]:
-            if col in df.columns:
-                invalid_values = df[
-                    pd.to_numeric(df[col], errors="coerce").isnull()
-                ]
-                results[f"invalid_{col.lower()}"] = [f"Zeile {idx + 1}: {val}" for idx, val in zip(invalid_values.index, invalid_values[col])]
-            else:
-                results[f"invalid_{col.lower()}"] = [f"Spalte '{col}' fehlt"]
+    def _mlfb_outcome(self, df: pd.DataFrame, metadata: Optional[dict] = None,
+                      seen: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[RuleOutcome]:
 
-        if "QUANTITY" in df.columns:
-            invalid_quantities = df[
-                pd.to_numeric(df["QUANTITY"], downcast="integer", errors="coerce").isnull()
-            ]
-            results["invalid_quantity"] = [f"Zeile {idx + 1}: {val}" for idx, val in zip(invalid_quantities.index, invalid_quantities["QUANTITY"])]
-        else:
-            results["invalid_quantity"] = ["Spalte 'QUANTITY' fehlt"]
+        """
+        Prüft die VENDOR_ITEM_NUMBER-Einträge per API. Jede unterschiedliche (getrimmte) Nummer wird genau
+        einmal angefragt und das Ergebnis auf alle Zeilen mit dieser Nummer übertragen. Gibt die ungültigen
+        Einträge als kompakte Violation (Nummer -> Zeilen) zurück, n_rows ist die Anzahl geprüfter Zeilen.
+        None, wenn die Spalte fehlt. Nummern, die wegen API-Fehlern nicht geprüft werden konnten, zählen
+        nicht als ungültig und werden in metadata["mlfb_unchecked"] vermerkt.
+        seen (Nummer -> Ergebnis) wird über mehrere Blöcke einer Datei geteilt: bereits geprüfte Nummern
+        werden nicht erneut angefragt und in den Metadaten nicht erneut als Nummer gezählt.
+        """
+
+        item_series = self.mlfb_items(df)
+        if item_series is None:
+            return None
+        if not len(item_series):
+            return RuleOutcome(Violation.empty(), 0)
+
+        codes, uniques = pd.factorize(item_series.to_numpy(dtype=object))
+        numbers = [str(number) for number in uniques]
+        print(f"[DEBUG] MLFB-Prüfung: {len(item_series)} Zeilen, {len(numbers)} unterschiedliche Nummern")
+        labels = item_series.index.to_numpy(dtype=np.int64)
+        if seen is None:
+            results = lookup_mlfb_numbers(numbers, self.product_service.validate_product_numbers_batch)
+            return mlfb_outcome_from_results(labels, codes, numbers, results, metadata)
+
+        new = [number for number in numbers if number not in seen]
+        seen.update(zip(new, lookup_mlfb_numbers(new, self.product_service.validate_product_numbers_batch)
+                        if new else []))
+        new_numbers = set(new)
+        counted = np.array([number in new_numbers for number in numbers], dtype=bool)
+        return mlfb_outcome_from_results(labels, codes, numbers, [seen[number] for number in numbers], metadata, counted)
+
+    @instrumented
+    def check_distributor_data(self, df: pd.DataFrame) -> dict:
 
-        return results
+        """
+        Prüft Distributoren-bezogene Spalten (z. B. Invoice-Datum, Sender-ID)
+        auf Vollständigkeit und korrektes Format. Daten werden echt geparst (unmögliche Daten,
+        Daten in der Zukunft, Versand nach Rechnung).
+        """
 
-    def summarize_invalid_entries(self, df, column, invalid_mask):
-        invalid_entries = df[invalid_mask]
-        unique_values = invalid_entries[column].unique()
+        return self.plan.evaluate(df, ["distributor"]).results("distributor")
 
-        if len(invalid_entries) == len(df):
-            return ["Alle Zeilen betroffen (100%)"]
-        elif len(unique_values) == 1:
-            return [f"Alle Zeilen enthalten nur '{unique_values[0]}' als ungültigen Wert"]
-        else:
-            return [f"Zeile {idx + 1}: {val}" for idx, val in zip(invalid_entries.index, invalid_entries[column])]
+    @instrumented
+    def check_customer_data(self, df: pd.DataFrame) -> dict:
+
+        """
+        Prüft Kundendaten: Länder, Staaten (US/MX), Namen, ZIPs,
+        ob sie gültig und vollständig sind.
+        """
+
+        return self.plan.evaluate(df, ["customer"]).results("customer")
+
+    @instrumented
+    def check_financial_data(self, df: pd.DataFrame) -> dict:
+
+        """
+        Prüft Finanzdaten wie Währungen, Kostenfelder und Mengen
+        auf numerische Korrektheit und gültige Codes sowie Menge × Einzelpreis = Gesamtpreis.
+        """
 
-    
+        return self.plan.evaluate(df, ["financial"]).results("financial")
@@ -0,0 +1,233 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from imc_norm.product_number_check_service import ProductNumberCheckService
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# tracemalloc misst genauer, verlangsamt aber jede Allokation; ohne wird der RSS-Höchststand verwendet
+TRACE_MEMORY = os.getenv("IMC_METRICS_TRACE_MEMORY", "0") == "1"
+# JSON-Lines-Datei für strukturierte Metrik-Logs (leer = kein Export)
+METRICS_LOG_PATH = os.getenv("IMC_METRICS_LOG")
+
+_current_recorder: ContextVar[Optional["MetricsRecorder"]] = ContextVar("imc_metrics_recorder", default=None)
+
+
+def _max_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    # ru_maxrss ist unter Linux in KiB angegeben
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageMetrics:
+
+    """
+    Messwerte einer Stufe (z. B. 'DataChecker.read_csv_file'). Zeiten und Zähler enthalten
+    verschachtelte Stufen (inklusive Werte), parent nennt die umschließende Stufe.
+    """
+
+    def __init__(self, name: str, parent: Optional[str] = None, rows: Optional[int] = None):
+        self.name = name
+        self.parent = parent
+        self.rows = rows
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_memory_delta_bytes = 0
+        self.external_calls = 0
+        self.external_items = 0
+        self.http_requests = 0
+        self.error: Optional[str] = None
+        self._peak_seen = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "rows": self.rows,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "peak_memory_delta_bytes": int(self.peak_memory_delta_bytes),
+            "external_calls": self.external_calls,
+            "external_items": self.external_items,
+            "http_requests": self.http_requests,
+            "error": self.error,
+        }
+
+
+class MetricsRecorder:
+
+    """
+    Sammelt Stufen-Messwerte für einen Prüflauf. Aktiv innerhalb von 'with MetricsRecorder() as metrics:';
+    instrumentierte Funktionen melden sich über eine ContextVar, ohne aktiven Recorder kosten sie fast nichts.
+    """
+
+    def __init__(self, trace_memory: Optional[bool] = None, log_path: Optional[str] = None):
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self.log_path = METRICS_LOG_PATH if log_path is None else log_path
+        self.run_id = uuid.uuid4().hex
+        self.stages: List[StageMetrics] = []
+        self._stack: List[StageMetrics] = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self) -> "MetricsRecorder":
+        self._token = _current_recorder.set(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_recorder.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.export()
+        return False
+
+    def _memory(self) -> tuple:
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()
+        rss = _max_rss_bytes()
+        return rss, rss
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[StageMetrics]:
+        parent = self._stack[-1] if self._stack else None
+        metrics = StageMetrics(name, parent.name if parent else None, rows)
+        self.stages.append(metrics)
+
+        current, peak = self._memory()
+        if tracemalloc.is_tracing():
+            # reset_peak verwirft den bisherigen Höchststand der umschließenden Stufe, daher vorher sichern
+            if parent is not None:
+                parent._peak_seen = max(parent._peak_seen, peak)
+            tracemalloc.reset_peak()
+        metrics._peak_seen = current
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        self._stack.append(metrics)
+        try:
+            yield metrics
+        except BaseException as e:
+            metrics.error = type(e).__name__
+            raise
+        finally:
+            metrics.wall_seconds = time.perf_counter() - start_wall
+            metrics.cpu_seconds = time.process_time() - start_cpu
+            metrics._peak_seen = max(metrics._peak_seen, self._memory()[1])
+            metrics.peak_memory_delta_bytes = max(metrics._peak_seen - current, 0)
+            if parent is not None:
+                parent._peak_seen = max(parent._peak_seen, metrics._peak_seen)
+            self._stack.pop()
+
+    def record_external_call(self, items: int = 0, http_requests: int = 1):
+
+        """
+        Zählt einen Aufruf eines externen Dienstes bei allen gerade offenen Stufen.
+        """
+
+        for metrics in self._stack:
+            metrics.external_calls += 1
+            metrics.external_items += items
+            metrics.http_requests += http_requests
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "memory_source": "tracemalloc" if self.trace_memory else "max_rss",
+            "stages": [metrics.to_dict() for metrics in self.stages],
+        }
+
+    def export(self):
+
+        """
+        Schreibt je Stufe eine JSON-Zeile nach log_path (falls gesetzt).
+        """
+
+        if not self.log_path:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for metrics in self.stages:
+                f.write(json.dumps({"event": "stage_metrics", "run_id": self.run_id, **metrics.to_dict()}) + "\n")
+
+
+def current_recorder() -> Optional[MetricsRecorder]:
+    return _current_recorder.get()
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[Optional[StageMetrics]]:
+    recorder = _current_recorder.get()
+    if recorder is None:
+        yield None
+        return
+    with recorder.stage(name, rows) as metrics:
+        yield metrics
+
+
+def record_external_call(items: int = 0, http_requests: int = 1):
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.record_external_call(items, http_requests)
+
+
+def instrumented(func):
+
+    """
+    Dekorator für Methoden: misst jeden Aufruf als Stufe 'Klasse.methode'. Die Zeilenzahl wird aus dem
+    ersten DataFrame-Argument übernommen, sonst aus dem Ergebnis (DataFrame bzw. Report mit n_rows).
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if _current_recorder.get() is None:
+            return func(self, *args, **kwargs)
+        frames = [arg for arg in args if isinstance(arg, pd.DataFrame)]
+        with stage(f"{type(self).__name__}.{func.__name__}", len(frames[0]) if frames else None) as metrics:
+            result = func(self, *args, **kwargs)
+            if metrics.rows is None:
+                metrics.rows = len(result) if isinstance(result, pd.DataFrame) else getattr(result, "n_rows", None)
+            return result
+
+    return wrapper
+
+
+class InstrumentedProductNumberService(ProductNumberCheckService):
+
+    """
+    Hülle um einen ProductNumberCheckService, die jeden Aufruf als Stufe misst und als externen Aufruf
+    zählt. HTTP-Anfragen werden über request_count des Dienstes gezählt (falls vorhanden).
+    """
+
+    def __init__(self, service: ProductNumberCheckService):
+        self.service = service
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    def _call(self, method: str, numbers: List[str], *args):
+        name = f"{type(self.service).__name__}.{method}"
+        with stage(name, len(numbers)):
+            before = getattr(self.service, "request_count", None)
+            result = getattr(self.service, method)(*args)
+            after = getattr(self.service, "request_count", None)
+            record_external_call(len(numbers), after - before if before is not None else 1)
+        return result
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        return self._call("validate_product_number", [product_number], product_number)
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        return self._call("validate_product_numbers_batch", product_numbers, product_numbers)
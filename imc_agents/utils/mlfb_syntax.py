@@ -0,0 +1,51 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Vollständige MLFB ohne Trennzeichen: 7 + 5 + 4 Stellen, z. B. 6ES7131-4BD01-0AA0, optional mit Z (Optionen)
+MLFB_FULL_SHAPE = r"\d[A-Z]{2}\d{4}[A-Z0-9]{9}Z?"
+MLFB_FULL_PATTERN = r"\d[A-Z]{2}\d{5}[A-Z]{2}\d{3}[A-Z]{2}\dZ?"
+
+# Optionsteil (-Z A01+B20, +M1Y, Leerzeichen), der für die Strukturprüfung abgeschnitten wird
+OPTION_SUFFIX = r"(?:-Z|\+|\s).*$"
+
+MIN_ALNUM_CHARS = 3
+MAX_LENGTH = 64
+
+SYNTAX_TOO_SHORT = "zu kurz"
+SYNTAX_TOO_LONG = "zu lang"
+SYNTAX_NO_DIGIT = "keine Ziffer"
+SYNTAX_MLFB_STRUCTURE = "MLFB-Struktur"
+
+
+def mlfb_syntax_errors(numbers: Iterable[str]) -> np.ndarray:
+
+    """
+    Offline-Vorprüfung für Produktnummern: Grund je Nummer, warum sie sicher ungültig ist, sonst None.
+    Bewusst nur offensichtliche Fälle (kein Produktnummer-Format erlaubt sie), alles andere entscheidet
+    die Norm-API:
+    - weniger als drei Buchstaben/Ziffern (z. B. '0', '6') oder länger als 64 Zeichen,
+    - keine einzige Ziffer (z. B. 'INVALID-MLFB'),
+    - 16-stellige MLFB, deren Stellen nicht zum Schema 1-7 | 8-12 | 13-16 passen
+      (z. B. '6ES7131-4BD0X-0AA0': Stelle 12 muss eine Ziffer sein).
+    Kürzere MLFB, TNS (z. B. 'FDK:087L4213'), Sachnummern (A5E…) und US-Katalognummern werden durchgelassen.
+    """
+
+    values = pd.Series(list(numbers), dtype=object).astype(str).str.strip().str.upper()
+    reasons = np.full(len(values), None, dtype=object)
+    if not len(values):
+        return reasons
+
+    compact = values.str.replace(OPTION_SUFFIX, "", regex=True).str.replace("-", "", regex=False)
+    mlfb_shaped = compact.str.fullmatch(MLFB_FULL_SHAPE).to_numpy(dtype=bool)
+    checks = [
+        (values.str.count(r"[A-Z0-9]").to_numpy() < MIN_ALNUM_CHARS, SYNTAX_TOO_SHORT),
+        (values.str.len().to_numpy() > MAX_LENGTH, SYNTAX_TOO_LONG),
+        (~values.str.contains(r"\d", regex=True).to_numpy(dtype=bool), SYNTAX_NO_DIGIT),
+        (mlfb_shaped & ~compact.str.fullmatch(MLFB_FULL_PATTERN).to_numpy(dtype=bool), SYNTAX_MLFB_STRUCTURE),
+    ]
+    # Erster zutreffender Grund gewinnt
+    for mask, reason in reversed(checks):
+        reasons[mask] = reason
+    return reasons
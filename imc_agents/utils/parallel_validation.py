@@ -0,0 +1,111 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from imc_agents.utils.validation_rules import ValidationPlan, ValidationReport
+
+# Unterhalb dieser Zeilenzahl pro Shard lohnt sich der Prozess-Overhead nicht
+MIN_ROWS_PER_SHARD = 50_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def shard_ranges(n_rows: int, n_shards: int) -> List[Tuple[int, int]]:
+
+    """
+    Teilt n_rows in n_shards zusammenhängende Zeilenbereiche (start, stop) auf.
+    """
+
+    n_shards = max(1, min(n_shards, n_rows))
+    base, extra = divmod(n_rows, n_shards)
+    ranges = []
+    start = 0
+    for i in range(n_shards):
+        stop = start + base + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _evaluate_shard(shard: pd.DataFrame, plan: ValidationPlan, categories: Optional[List[str]]):
+
+    """
+    Worker: wertet den Plan auf dem eigenen Shard aus. Zurückgegeben werden nur die Regel-Ergebnisse
+    (Index-Labels + Werte), nicht der Shard selbst.
+    """
+
+    report = plan.evaluate(shard, categories)
+    return report.n_rows, report.raw_outcomes()
+
+
+def process_context():
+    # Kein fork: der aufrufende Prozess hat Threads (Einlesen, MLFB-Anfragen), geforkte Locks könnten hängen
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def validation_pool(workers: int) -> ProcessPoolExecutor:
+
+    """
+    Gemeinsamer, langlebiger Prozess-Pool für die lokalen Checks (wird nur vergrößert, nie je Aufruf neu
+    gestartet). Ein defekter Pool (z. B. abgestürzter Worker) wird beim nächsten Aufruf ersetzt.
+    """
+
+    global _pool, _pool_workers
+    with _pool_lock:
+        broken = _pool is not None and getattr(_pool, "_broken", False)
+        if _pool is None or broken or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def evaluate_parallel(plan: ValidationPlan, df: pd.DataFrame, workers: Optional[int] = None,
+                      categories: Optional[Iterable[str]] = None,
+                      min_rows_per_shard: int = MIN_ROWS_PER_SHARD) -> ValidationReport:
+
+    """
+    Wertet den Plan parallel über den gemeinsamen Prozess-Pool aus (siehe validation_pool). Der DataFrame
+    wird nach Zeilenbereichen in Shards geteilt, die direkt an die Worker gehen (serialisiert wird jeweils
+    nur der Shard auf dem Weg in den Worker, keine zusätzliche Kopie des ganzen Frames).
+    Die Shard-Ergebnisse werden in Shard-Reihenfolge zusammengeführt (deterministisch).
+    """
+
+    workers = workers or os.cpu_count() or 1
+    categories = list(categories) if categories is not None else None
+    n_shards = min(workers, len(df) // max(1, min_rows_per_shard))
+    if n_shards <= 1:
+        return plan.evaluate(df, categories)
+
+    print(f"[DEBUG] Parallele Prüfung: {n_shards} Shards auf {workers} Prozessen")
+    pool = validation_pool(workers)
+    futures = [pool.submit(_evaluate_shard, df.iloc[start:stop], plan, categories)
+               for start, stop in shard_ranges(len(df), n_shards)]
+    shard_results = [future.result() for future in futures]
+
+    report = None
+    for n_rows, outcomes in shard_results:
+        shard_report = ValidationReport.from_outcomes(plan, n_rows, outcomes)
+        report = shard_report if report is None else report.merge(shard_report)
+    # Schlüssel von Duplikaten über Shard-Grenzen
+    return report.resolve(df)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+# Wird erhöht, sobald sich das Ergebnis von read_csv_file ändert (alte Einträge werden ungültig)
+CACHE_FORMAT_VERSION = 4
+
+_HASH_BLOCK_BYTES = 1024 * 1024
+_ATTRS_METADATA_KEY = b"imc_attrs"
+# Kategorische Spalten, die blockweise als Strings geschrieben wurden (beim Lesen wieder kategorisch)
+_CATEGORICAL_METADATA_KEY = b"imc_categorical"
+
+
+class ParsedFileCache:
+
+    """
+    Festplatten-Cache für bereits eingelesene CSV-Dateien im Feather-Format (Arrow IPC, unkomprimiert).
+
+    Schlüssel ist der Hash des Dateiinhalts plus der Parse-Optionen. Treffer werden per Memory-Mapping
+    gelesen statt erneut als CSV geparst. Die Gesamtgröße ist begrenzt, verdrängt wird der am
+    längsten nicht genutzte Eintrag (LRU über die Änderungszeit der Cache-Datei).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "imc_parse_cache")
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, file_path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+                digest.update(block)
+        options = dict(options or {}, cache_format=CACHE_FORMAT_VERSION)
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+        # Zugriff vermerken (LRU)
+        os.utime(path)
+        metadata = table.schema.metadata or {}
+        categorical = json.loads(metadata.get(_CATEGORICAL_METADATA_KEY, b"[]"))
+        for name in categorical:
+            i = table.schema.get_field_index(name)
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+        df = table.to_pandas()
+        for name in categorical:
+            # Sortierte Kategorien wie bei read_csv(dtype="category")
+            df[name] = df[name].cat.reorder_categories(sorted(df[name].cat.categories))
+        if _ATTRS_METADATA_KEY in metadata:
+            df.attrs.update(json.loads(metadata[_ATTRS_METADATA_KEY]))
+        print(f"[DEBUG] Parse-Cache-Treffer: {key[:12]}")
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_ATTRS_METADATA_KEY] = json.dumps(df.attrs).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+
+        # Erst temporär schreiben, dann atomar umbenennen (parallele Leser sehen nie halbe Dateien)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+
+    def writer(self, key: str, attrs: Optional[Dict[str, Any]] = None) -> "ParsedFileWriter":
+
+        """
+        Schreibt einen Eintrag blockweise (z. B. parallel zum Einlesen großer Dateien), ohne den ganzen
+        DataFrame im Speicher zu halten. Sichtbar wird er erst mit commit().
+        """
+
+        return ParsedFileWriter(self, key, attrs or {})
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".feather"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class ParsedFileWriter:
+
+    """
+    Blockweises Schreiben eines Cache-Eintrags. Das Schema kommt aus dem ersten Block; kategorische Spalten
+    werden als Strings geschrieben (Arrow-IPC-Dateien erlauben nur ein Dictionary je Spalte) und beim Lesen
+    wieder kategorisch. Ohne commit() (z. B. nach einem Fehler) verwirft close() die halbe Datei.
+    """
+
+    def __init__(self, cache: ParsedFileCache, key: str, attrs: Dict[str, Any]):
+        self.cache = cache
+        self.key = key
+        self.attrs = attrs
+        self.schema: Optional[pa.Schema] = None
+        self._writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+        os.close(fd)
+
+    def _schema(self, table: pa.Table, categorical: List[str]) -> pa.Schema:
+        fields = []
+        for field in table.schema:
+            if pa.types.is_dictionary(field.type):
+                field = field.with_type(field.type.value_type)
+            elif pa.types.is_null(field.type):
+                # Im ersten Block leere Spalte: in späteren Blöcken Strings
+                field = field.with_type(pa.string())
+            fields.append(field)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_ATTRS_METADATA_KEY] = json.dumps(self.attrs).encode("utf-8")
+        metadata[_CATEGORICAL_METADATA_KEY] = json.dumps(categorical).encode("utf-8")
+        return pa.schema(fields, metadata=metadata)
+
+    def write(self, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        if self._writer is None:
+            categorical = [name for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)]
+            self.schema = self._schema(table, categorical)
+            self._writer = pa.ipc.new_file(self.tmp_path, self.schema)
+        self._writer.write_table(table.cast(self.schema))
+
+    def commit(self):
+        if self._writer is None:
+            return self.close()
+        self._writer.close()
+        self._writer = None
+        os.replace(self.tmp_path, self.cache._path(self.key))
+        self.cache._evict()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
@@ -0,0 +1,298 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Obergrenzen für die Textdarstellung (der Rest wird zusammengefasst)
+MAX_RENDERED_LINES = 20
+MAX_RANGES_PER_LINE = 10
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _ranges_from_labels(labels) -> Tuple[np.ndarray, np.ndarray]:
+    labels = np.asarray(labels, dtype=np.int64)
+    if len(labels) == 0:
+        return _EMPTY, _EMPTY
+    if np.any(np.diff(labels) <= 0):
+        labels = np.unique(labels)
+    breaks = np.flatnonzero(np.diff(labels) != 1) + 1
+    starts = labels[np.r_[0, breaks]]
+    stops = labels[np.r_[breaks - 1, len(labels) - 1]] + 1
+    return starts, stops
+
+
+def _merge_ranges(starts: np.ndarray, stops: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+
+    """
+    Sortiert halboffene Bereiche [start, stop) und verschmilzt überlappende bzw. angrenzende.
+    """
+
+    if len(starts) == 0:
+        return _EMPTY, _EMPTY
+    order = np.argsort(starts, kind="stable")
+    starts, stops = starts[order], stops[order]
+    run_max = np.maximum.accumulate(stops)
+    new_run = np.ones(len(starts), dtype=bool)
+    new_run[1:] = starts[1:] > run_max[:-1]
+    first = np.flatnonzero(new_run)
+    return starts[first], np.maximum.reduceat(stops, first)
+
+
+def _covered(starts: np.ndarray, stops: np.ndarray, points: np.ndarray) -> np.ndarray:
+    idx = np.searchsorted(starts, points, side="right") - 1
+    inside = idx >= 0
+    inside[inside] = points[inside] < stops[idx[inside]]
+    return inside
+
+
+class RowSet:
+
+    """
+    Kompakte Menge von Zeilen-Labels als sortierte, disjunkte Bereiche [start, stop).
+    Speicherbedarf wächst mit der Anzahl zusammenhängender Bereiche, nicht mit der Zeilenzahl.
+    """
+
+    __slots__ = ("starts", "stops")
+
+    def __init__(self, starts: np.ndarray = _EMPTY, stops: np.ndarray = _EMPTY):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+
+    @classmethod
+    def from_labels(cls, labels) -> "RowSet":
+        return cls(*_ranges_from_labels(labels))
+
+    @classmethod
+    def from_list(cls, ranges: List[List[int]]) -> "RowSet":
+        if not ranges:
+            return cls()
+        arr = np.asarray(ranges, dtype=np.int64)
+        return cls(*_merge_ranges(arr[:, 0], arr[:, 1]))
+
+    def to_list(self) -> List[List[int]]:
+        return [[int(a), int(b)] for a, b in zip(self.starts, self.stops)]
+
+    def __len__(self):
+        return int((self.stops - self.starts).sum())
+
+    @property
+    def n_ranges(self) -> int:
+        return len(self.starts)
+
+    def union(self, other: "RowSet") -> "RowSet":
+        return RowSet(*_merge_ranges(np.concatenate([self.starts, other.starts]),
+                                     np.concatenate([self.stops, other.stops])))
+
+    def difference(self, other: "RowSet") -> "RowSet":
+        if not len(self.starts) or not len(other.starts):
+            return self
+        points = np.unique(np.concatenate([self.starts, self.stops, other.starts, other.stops]))
+        keep = _covered(self.starts, self.stops, points[:-1]) & ~_covered(other.starts, other.stops, points[:-1])
+        return RowSet(*_merge_ranges(points[:-1][keep], points[1:][keep]))
+
+    def contains(self, labels) -> np.ndarray:
+        return _covered(self.starts, self.stops, np.asarray(labels, dtype=np.int64))
+
+    def labels(self) -> np.ndarray:
+        if not len(self.starts):
+            return _EMPTY
+        lengths = self.stops - self.starts
+        offsets = np.repeat(self.starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        return np.arange(lengths.sum(), dtype=np.int64) + offsets
+
+    def format(self, max_ranges: int = MAX_RANGES_PER_LINE) -> str:
+
+        """
+        Zeilennummern (1-basiert) als Text, z. B. '3-5, 9'. Zu viele Bereiche werden gekürzt.
+        """
+
+        parts = [str(a + 1) if b - a == 1 else f"{a + 1}-{b}"
+                 for a, b in zip(self.starts[:max_ranges], self.stops[:max_ranges])]
+        text = ", ".join(parts)
+        if self.n_ranges > max_ranges:
+            text += f", … (insgesamt {len(self)} Zeilen)"
+        return text
+
+
+class Violation:
+
+    """
+    Verstöße einer Regel: Wörterbuch der ungültigen Werte plus Zeilenbereiche je Wert.
+
+    Intern spaltenweise gespeichert (Wert-Code, start, stop je Bereich, sortiert nach Code und start),
+    damit Aufbau, Zusammenführen und Serialisierung vektorisiert bleiben.
+    """
+
+    __slots__ = ("values", "codes", "starts", "stops")
+
+    def __init__(self, values: List[Optional[str]], codes: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+        self.values = list(values)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+
+    @classmethod
+    def empty(cls) -> "Violation":
+        return cls([], _EMPTY, _EMPTY, _EMPTY)
+
+    @classmethod
+    def from_rows(cls, labels, values=None) -> "Violation":
+
+        """
+        Baut die kompakte Darstellung aus Zeilen-Labels und (optional) den zugehörigen Werten.
+        """
+
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(labels) == 0:
+            return cls.empty()
+        if values is None:
+            starts, stops = _ranges_from_labels(labels)
+            return cls([None], np.zeros(len(starts), dtype=np.int64), starts, stops)
+
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+        return cls._normalized([str(v) for v in uniques], codes.astype(np.int64), labels, labels + 1)
+
+    @classmethod
+    def _normalized(cls, values, codes, starts, stops) -> "Violation":
+        if len(starts) == 0:
+            return cls(values, _EMPTY, _EMPTY, _EMPTY)
+        # Codes auf getrennte Zahlenbereiche verschieben, damit nur Bereiche gleichen Werts verschmelzen
+        span = int(stops.max()) + 1
+        merged_starts, merged_stops = _merge_ranges(codes * span + starts, codes * span + stops)
+        merged_codes = merged_starts // span
+        return cls(values, merged_codes, merged_starts - merged_codes * span, merged_stops - merged_codes * span)
+
+    def __len__(self):
+        return int((self.stops - self.starts).sum())
+
+    @property
+    def rows(self) -> RowSet:
+        return RowSet(*_merge_ranges(self.starts, self.stops))
+
+    @property
+    def n_values(self) -> int:
+        return len(np.unique(self.codes))
+
+    def merge(self, other: "Violation") -> "Violation":
+        if not len(other.codes):
+            return self
+        lookup = {value: i for i, value in enumerate(self.values)}
+        values = list(self.values)
+        mapping = np.empty(len(other.values), dtype=np.int64)
+        for i, value in enumerate(other.values):
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+            mapping[i] = lookup[value]
+        return self._normalized(values,
+                                np.concatenate([self.codes, mapping[other.codes]]),
+                                np.concatenate([self.starts, other.starts]),
+                                np.concatenate([self.stops, other.stops]))
+
+    def remove_rows(self, rows: RowSet) -> "Violation":
+
+        """
+        Entfernt die Zeilen rows aus allen Bereichen. Nur getroffene Bereiche werden aufgeteilt.
+        """
+
+        if not len(self.codes) or not rows.n_ranges:
+            return self
+        # Bereich [a, b) ist getroffen, wenn ein Bereich aus rows vor b beginnt und nach a endet
+        first = np.searchsorted(rows.stops, self.starts, side="right")
+        hit = (first < rows.n_ranges) & (rows.starts[np.minimum(first, rows.n_ranges - 1)] < self.stops)
+        if not hit.any():
+            return self
+
+        codes, starts, stops = [self.codes[~hit]], [self.starts[~hit]], [self.stops[~hit]]
+        for i in np.flatnonzero(hit):
+            rest = RowSet(self.starts[i:i + 1], self.stops[i:i + 1]).difference(rows)
+            codes.append(np.full(rest.n_ranges, self.codes[i], dtype=np.int64))
+            starts.append(rest.starts)
+            stops.append(rest.stops)
+        return self._normalized(self.values, np.concatenate(codes), np.concatenate(starts), np.concatenate(stops))
+
+    def head(self, max_rows: int) -> "Violation":
+
+        """
+        Behält nur die ersten max_rows betroffenen Zeilen (nach Zeilen-Label).
+        """
+
+        if len(self) <= max_rows:
+            return self
+        order = np.argsort(self.starts, kind="stable")
+        starts, stops, codes = self.starts[order], self.stops[order], self.codes[order]
+        before = np.r_[0, np.cumsum(stops - starts)[:-1]]
+        keep = before < max_rows
+        stops = np.minimum(stops[keep], starts[keep] + (max_rows - before[keep]))
+        return self._normalized(self.values, codes[keep], starts[keep], stops)
+
+    def relabel(self, labels: np.ndarray) -> "Violation":
+
+        """
+        Ersetzt jedes Label durch seine Position im aufsteigend sortierten Label-Array labels.
+        """
+
+        # Alle Labels eines Bereichs sind vorhanden, also liegen ihre Positionen ebenfalls zusammenhängend
+        starts = np.searchsorted(labels, self.starts)
+        stops = np.searchsorted(labels, self.stops - 1) + 1
+        return self._normalized(self.values, self.codes, starts, stops)
+
+    def groups(self) -> Iterator[Tuple[Optional[str], RowSet]]:
+
+        """
+        Liefert (Wert, Zeilen) je Wert, geordnet nach der ersten betroffenen Zeile.
+        """
+
+        if not len(self.codes):
+            return
+        bounds = np.flatnonzero(np.r_[True, np.diff(self.codes) != 0, True])
+        order = np.argsort(self.starts[bounds[:-1]], kind="stable")
+        for g in order:
+            lo, hi = bounds[g], bounds[g + 1]
+            yield self.values[self.codes[lo]], RowSet(self.starts[lo:hi], self.stops[lo:hi])
+
+    def render_values(self, max_lines: int = MAX_RENDERED_LINES, max_ranges: int = MAX_RANGES_PER_LINE) -> List[str]:
+
+        """
+        Textzeilen 'Zeile N: Wert' bzw. 'Zeilen 3-5, 9: Wert', höchstens max_lines Werte.
+        """
+
+        lines = []
+        rest_values = rest_rows = 0
+        for value, rows in self.groups():
+            if len(lines) < max_lines:
+                label = "Zeile" if len(rows) == 1 else "Zeilen"
+                lines.append(f"{label} {rows.format(max_ranges)}: {value}")
+            else:
+                rest_values += 1
+                rest_rows += len(rows)
+        if rest_values:
+            lines.append(f"… {rest_values} weitere Werte in {rest_rows} Zeilen")
+        return lines
+
+    def render_rows(self, max_lines: int = MAX_RENDERED_LINES) -> List[str]:
+
+        """
+        Textzeilen 'Zeile N' bzw. 'Zeilen 3-5' je zusammenhängendem Bereich, höchstens max_lines.
+        """
+
+        rows = self.rows
+        lines = [f"Zeile {a + 1}" if b - a == 1 else f"Zeilen {a + 1}-{b}"
+                 for a, b in zip(rows.starts[:max_lines], rows.stops[:max_lines])]
+        if rows.n_ranges > max_lines:
+            rest = RowSet(rows.starts[max_lines:], rows.stops[max_lines:])
+            lines.append(f"… {rest.n_ranges} weitere Bereiche mit {len(rest)} Zeilen")
+        return lines
+
+    def to_dict(self) -> Dict[str, list]:
+        return {
+            "values": self.values,
+            "runs": np.column_stack([self.codes, self.starts, self.stops]).tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> "Violation":
+        runs = np.asarray(data.get("runs") or np.empty((0, 3)), dtype=np.int64).reshape(-1, 3)
+        return cls._normalized(data.get("values", []), runs[:, 0], runs[:, 1], runs[:, 2])
+
@@ -0,0 +1,116 @@
+import math
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Zeilen je zufälligem Block: viele kleine Blöcke statt weniger großer (Zeilen in einem Block ähneln sich)
+SAMPLE_BLOCK_ROWS = 20
+
+# z-Wert für das 95-%-Konfidenzintervall
+Z_95 = 1.959963984540054
+
+# Lesegröße bei der Suche nach dem Zeilenende in reinen CR-Dateien
+CR_READ_BYTES = 8 * 1024
+
+
+def wilson_interval(hits: float, n: float, z: float = Z_95) -> Tuple[float, float]:
+
+    """
+    Wilson-Score-Intervall für einen Anteil hits/n (auch bei 0 oder n Treffern sinnvoll).
+    """
+
+    if n <= 0:
+        return 0.0, 1.0
+    p = hits / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def clustered_wilson_interval(block_hits: np.ndarray, block_rows: np.ndarray, z: float = Z_95) -> Tuple[float, float]:
+
+    """
+    Wilson-Intervall für eine Stichprobe aus Blöcken zusammenhängender Zeilen (Treffer und Zeilen je Block).
+    Zeilen eines Blocks sind nicht unabhängig: statt n zählt die effektive Stichprobengröße n / Designeffekt,
+    geschätzt aus der Streuung der Trefferquote zwischen den Blöcken (Verhältnisschätzer). Ohne Treffer bzw.
+    nur mit Treffern ist der Designeffekt nicht schätzbar, dann zählt jeder Block als eine Beobachtung.
+    """
+
+    block_hits = np.asarray(block_hits, dtype=float)
+    block_rows = np.asarray(block_rows, dtype=float)
+    n, k = block_rows.sum(), len(block_rows)
+    if n <= 0:
+        return 0.0, 1.0
+    p = block_hits.sum() / n
+    if 0 < p < 1 and k > 1:
+        variance = k / (k - 1) * np.sum((block_hits - p * block_rows) ** 2) / (n * n)
+        n_effective = min(n, p * (1 - p) / variance) if variance > 0 else n
+    else:
+        n_effective = min(n, k)
+    return wilson_interval(p * n_effective, n_effective, z)
+
+
+def sample_csv_lines(file_path: str, n_rows: int, line_terminator: bytes = b"\n",
+                     block_rows: int = SAMPLE_BLOCK_ROWS,
+                     seed: Optional[int] = None) -> Tuple[bytes, bytes, int, np.ndarray]:
+
+    """
+    Zieht ungefähr n_rows zufällige Datenzeilen, ohne die Datei komplett zu lesen: an zufälligen
+    Byte-Positionen wird bis zum nächsten Zeilenende gesprungen und ein Block von block_rows Zeilen
+    gelesen. Jede Zeile wird höchstens einmal verwendet.
+
+    :return: (Header-Zeile, gezogene Zeilen, geschätzte Anzahl Datenzeilen der Datei,
+              Blockgrenzen als Zeilenpositionen in den gezogenen Zeilen, erste bis Ende)
+    """
+
+    size = os.path.getsize(file_path)
+    rng = np.random.default_rng(seed)
+    with open(file_path, "rb") as f:
+        header = f.readline() if line_terminator != b"\r" else _read_line(f, line_terminator)
+        data_start = f.tell()
+        if data_start >= size:
+            return header, b"", 0, np.zeros(1, dtype=np.int64)
+
+        n_blocks = max(1, math.ceil(n_rows / block_rows))
+        offsets = np.sort(rng.integers(data_start, size, n_blocks))
+        seen = set()
+        lines = []
+        bounds = [0]
+        for offset in offsets:
+            # Rest der angeschnittenen Zeile überspringen (ein Byte davor, damit auch Zeilenanfänge treffen)
+            f.seek(int(offset) - 1)
+            _read_line(f, line_terminator)
+            for _ in range(block_rows):
+                start = f.tell()
+                if start >= size:
+                    break
+                line = _read_line(f, line_terminator)
+                if start not in seen:
+                    seen.add(start)
+                    lines.append(line)
+            if len(lines) > bounds[-1]:
+                bounds.append(len(lines))
+
+    sampled_bytes = sum(len(line) for line in lines)
+    estimated_rows = round((size - data_start) * len(lines) / sampled_bytes) if sampled_bytes else 0
+    return header, b"".join(lines), estimated_rows, np.array(bounds, dtype=np.int64)
+
+
+def _read_line(f, line_terminator: bytes) -> bytes:
+    if line_terminator != b"\r":
+        return f.readline()
+    # Reine CR-Dateien: readline trennt im Binärmodus nur an LF. Blockweise lesen und hinter das CR
+    # zurückspringen, damit f.tell() wie nach readline am nächsten Zeilenanfang steht
+    chunks = []
+    while True:
+        block = f.read(CR_READ_BYTES)
+        if not block:
+            return b"".join(chunks)
+        end = block.find(b"\r")
+        if end >= 0:
+            chunks.append(block[:end + 1])
+            f.seek(end + 1 - len(block), os.SEEK_CUR)
+            return b"".join(chunks)
+        chunks.append(block)
@@ -0,0 +1,1065 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from imc_agents.utils.row_sets import MAX_RENDERED_LINES, RowSet, Violation
+
+# === POS-Stammdaten für die Standardprüfungen ===
+
+MANDATORY_COLUMNS = [
+    "DISTRIBUTOR_SENDER_ID", "DISTRIBUTOR_ORDER_TAKING_BRANCH_NAME", "DISTRIBUTOR_ORDER_TAKING_BRANCH_ID",
+    "DISTRIBUTOR_SHIP_DATE", "DISTRIBUTOR_INVOICE_DATE", "DISTRIBUTOR_INVOICE_NUMBER",
+    "DISTRIBUTOR_INVOICE_LINE_ITEM",
+    "BILL_TO_CUSTOMER_DUNS_NUMBER", "BILL_TO_CUSTOMER_NATIONAL_REG_NUMBER", "BILL_TO_CUSTOMER_NAME",
+    "BILL_TO_CUSTOMER_BILLING_ADDRESS1", "BILL_TO_CUSTOMER_BILLING_ADDRESS2", "BILL_TO_CUSTOMER_CITY",
+    "BILL_TO_CUSTOMER_STATE", "BILL_TO_CUSTOMER_ZIP", "BILL_TO_CUSTOMER_COUNTRY",
+    "SHIP_TO_CUSTOMER_DUNS_NUMBER", "SHIP_TO_CUSTOMER_NATIONAL_REG_NUMBER", "SHIP_TO_CUSTOMER_CUSTOMER_NAME",
+    "SHIP_TO_CUSTOMER_ADDRESS1", "SHIP_TO_CUSTOMER_ADDRESS2", "SHIP_TO_CUSTOMER_CITY",
+    "SHIP_TO_CUSTOMER_STATE", "SHIP_TO_CUSTOMER_ZIP", "SHIP_TO_CUSTOMER_COUNTRY",
+    "VENDOR_ITEM_NUMBER", "VENDOR_ITEM_OPTIONS", "ITEM_DESCRIPTION", "PRODUCT_FAMILY",
+    "QUANTITY", "QUANTITY_UNIT_OF_MEASURE", "UNIT_REPLENISHMENT_COST", "EXTENDED_REPLENISHMENT_COST",
+    "UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD", "COST_UNIT_OF_MEASURE", "CURRENCY_CODE", "REBATE_NUMBER"
+]
+
+# Spalten mit wenigen unterschiedlichen Werten: beim Einlesen kategorial (Codes statt Python-Strings)
+CATEGORICAL_COLUMNS = [
+    "DISTRIBUTOR_SENDER_ID", "DISTRIBUTOR_ORDER_TAKING_BRANCH_NAME", "DISTRIBUTOR_ORDER_TAKING_BRANCH_ID",
+    "DISTRIBUTOR_SHIP_DATE", "DISTRIBUTOR_INVOICE_DATE",
+    "BILL_TO_CUSTOMER_CITY", "BILL_TO_CUSTOMER_STATE", "BILL_TO_CUSTOMER_COUNTRY",
+    "SHIP_TO_CUSTOMER_CITY", "SHIP_TO_CUSTOMER_STATE", "SHIP_TO_CUSTOMER_COUNTRY",
+    "PRODUCT_FAMILY", "QUANTITY_UNIT_OF_MEASURE", "COST_UNIT_OF_MEASURE", "CURRENCY_CODE",
+]
+
+# Einlese-Schema für den bekannten POS-Header; alle übrigen Spalten als Arrow-Strings
+POS_SCHEMA = {col: ("category" if col in CATEGORICAL_COLUMNS else "string[pyarrow]") for col in MANDATORY_COLUMNS}
+
+KNOWN_COUNTRIES = {"DE", "US", "MX", "GB", "UK", "FR", "IT", "ES", "CN", "JP"}
+
+KNOWN_CURRENCIES = {"USD", "EUR", "GBP", "JPY", "MXN", "CAD", "AUD", "CHF"}
+
+VALID_US_STATES = {
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
+}
+
+VALID_MEXICAN_STATES = {
+    'AGUASCALIENTES', 'BAJA CALIFORNIA', 'BAJA CALIFORNIA SUR', 'CAMPECHE',
+    'CHIAPAS', 'CHIHUAHUA', 'COAHUILA', 'COLIMA', 'DURANGO', 'GUANAJUATO',
+    'GUERRERO', 'HIDALGO', 'JALISCO', 'MEXICO', 'MICHOACAN', 'MORELOS',
+    'NAYARIT', 'NUEVO LEON', 'OAXACA', 'PUEBLA', 'QUERETARO', 'QUINTANA ROO',
+    'SAN LUIS POTOSI', 'SINALOA', 'SONORA', 'TABASCO', 'TAMAULIPAS',
+    'TLAXCALA', 'VERACRUZ', 'YUCATAN', 'ZACATECAS'
+}
+
+VALID_STATES = VALID_US_STATES | VALID_MEXICAN_STATES
+
+# Rein numerisch, 32-stelliger Hex-Hash oder Buchstabe + Ziffern
+INVOICE_NUMBER_PATTERN = re.compile(r"^(?:\d+|(?i:[a-f0-9]{32})|[A-Z]\d+)$")
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Nachkommastellen je Währung (Standard 2) und erlaubte Abweichung in Minor-Units (Standard 1)
+CURRENCY_MINOR_UNITS = {"JPY": 0}
+CURRENCY_TOLERANCE_MINOR_UNITS = {"JPY": 1}
+DEFAULT_MINOR_UNITS = 2
+DEFAULT_TOLERANCE_MINOR_UNITS = 1
+
+# Einzelpreise werden in Millionstel (Major-Units) geführt, da sie oft mehr als 2 Nachkommastellen haben
+UNIT_PRICE_SCALE = 1_000_000
+# Größtes Produkt Menge × Einzelpreis (Millionstel), das noch sicher ganzzahlig in int64 gerechnet wird
+MAX_INT64_PRODUCT = 2.0 ** 62
+
+# Größenklassen der Abweichung (Major-Units) für die Gruppierung der Befunde
+DEVIATION_BUCKETS = ["Abweichung < 1", "Abweichung 1–10", "Abweichung 10–100", "Abweichung 100–1.000",
+                     "Abweichung ≥ 1.000"]
+
+# Schlüssel einer Rechnungsposition (mehrfach vorkommend = doppelt eingereichte Zeile)
+DUPLICATE_KEY_COLUMNS = ["DISTRIBUTOR_INVOICE_NUMBER", "DISTRIBUTOR_INVOICE_LINE_ITEM", "DISTRIBUTOR_SENDER_ID"]
+
+# Erlaubter Abstand zwischen Rechnungs- und (späterem) Versanddatum
+MAX_SHIP_AFTER_INVOICE_DAYS = 0
+
+
+class ColumnView:
+
+    """
+    Normalisierte Sicht auf eine Spalte. Jede Normalisierung (Text, strip, upper,
+    Leer-Maske, numerisch) wird höchstens einmal berechnet und von allen Regeln geteilt.
+    """
+
+    def __init__(self, series: pd.Series):
+        self.series = series
+        self._cache = {}
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def is_categorical(self) -> bool:
+        return isinstance(self.series.dtype, pd.CategoricalDtype)
+
+    @property
+    def null(self) -> np.ndarray:
+        return self._cached("null", lambda: self.series.isna().to_numpy())
+
+    @property
+    def text(self) -> pd.Series:
+        # Entspricht astype(str): fehlende Werte werden zu 'nan'
+        return self._cached("text", self._text)
+
+    def _text(self) -> pd.Series:
+        if self.is_categorical:
+            # 'nan' als zusätzliche Kategorie, fehlende Codes (-1) zeigen darauf
+            categorical = self.series.array
+            categories = np.append(categorical.categories.astype(str).to_numpy(dtype=object), "nan")
+            codes = np.where(categorical.codes < 0, len(categories) - 1, categorical.codes)
+            return _categorical_series(categories, codes, self.series.index)
+        if isinstance(self.series.dtype, pd.StringDtype):
+            return self.series.fillna("nan")
+        return self.series.astype(object).where(~self.null, "nan").astype(str)
+
+    def _map_text(self, name: str, transform) -> pd.Series:
+
+        """
+        Wendet eine String-Transformation an; bei kategorialen Spalten nur auf die Kategorien.
+        """
+
+        def compute():
+            text = self.text
+            if isinstance(text.dtype, pd.CategoricalDtype):
+                categories = transform(pd.Series(text.cat.categories.to_numpy(dtype=object)))
+                return _categorical_series(categories.to_numpy(dtype=object), text.cat.codes.to_numpy(), text.index)
+            return transform(text)
+
+        return self._cached(name, compute)
+
+    @property
+    def stripped(self) -> pd.Series:
+        return self._map_text("stripped", lambda s: s.str.strip())
+
+    @property
+    def upper(self) -> pd.Series:
+        return self._map_text("upper", lambda s: s.str.upper())
+
+    @property
+    def stripped_upper(self) -> pd.Series:
+        return self._map_text("stripped_upper", lambda s: s.str.strip().str.upper())
+
+    @property
+    def empty(self) -> np.ndarray:
+        return self._cached("empty", lambda: self.null | (self.stripped == "").to_numpy(dtype=bool))
+
+    @property
+    def numeric(self) -> pd.Series:
+        return self._cached("numeric", self._numeric)
+
+    def _numeric(self) -> pd.Series:
+        if self.is_categorical:
+            categorical = self.series.array
+            values = pd.to_numeric(pd.Series(categorical.categories.to_numpy(dtype=object)), errors="coerce")
+            values = np.append(values.to_numpy(dtype=float, na_value=np.nan), np.nan)
+            return pd.Series(values[categorical.codes], index=self.series.index)
+        return pd.to_numeric(self.series, errors="coerce")
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._cached("dates", self._dates)
+
+    def _dates(self) -> np.ndarray:
+        # Nur eindeutige Werte parsen (bei kategorialen Spalten die Kategorien), dann über die Codes verteilen
+        text = self.text
+        if isinstance(text.dtype, pd.CategoricalDtype):
+            codes, uniques = text.cat.codes.to_numpy(), text.cat.categories.to_numpy(dtype=object)
+        else:
+            codes, uniques = pd.factorize(text.to_numpy(dtype=object))
+        return parse_dates(pd.Series(uniques, dtype=object))[codes]
+
+    def values_at(self, mask: np.ndarray) -> np.ndarray:
+        # Originalwerte der markierten Zeilen als Objekt-Array (fehlende Werte als NaN wie bei dtype=str)
+        return self.series[mask].to_numpy(dtype=object, na_value=np.nan)
+
+
+def parse_dates(values: pd.Series) -> np.ndarray:
+
+    """
+    Parst ISO-Daten (YYYY-MM-DD am Wertanfang, wie DATE_PATTERN) mit festem Format.
+    Nicht passende und unmögliche Daten (z. B. 2025-13-01, 2025-02-30) werden NaT.
+    """
+
+    candidates = values.where(values.str.match(DATE_PATTERN, na=False)).str.slice(0, 10)
+    return pd.to_datetime(candidates, format="%Y-%m-%d", errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+
+def _categorical_series(categories: np.ndarray, codes: np.ndarray, index: pd.Index) -> pd.Series:
+
+    """
+    Kategoriale Series aus (ggf. doppelten) Kategorien und Codes; doppelte Kategorien werden zusammengelegt.
+    """
+
+    unique_codes, uniques = pd.factorize(categories)
+    return pd.Series(pd.Categorical.from_codes(unique_codes[codes], categories=uniques), index=index)
+
+
+class NormalizedFrame:
+
+    """
+    Hält die ColumnViews eines DataFrames, damit alle Regeln eines Plans
+    auf denselben normalisierten Spalten arbeiten.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n_rows = len(df)
+        self._views: Dict[str, ColumnView] = {}
+
+    @property
+    def labels(self) -> np.ndarray:
+        # Zeilen-Labels (Index), bei nicht-ganzzahligem Index die Positionen
+        if pd.api.types.is_integer_dtype(self.df.index):
+            return self.df.index.to_numpy()
+        return np.arange(self.n_rows)
+
+    def has(self, column: str) -> bool:
+        return column in self.df.columns
+
+    def column(self, column: str) -> ColumnView:
+        if column not in self._views:
+            self._views[column] = ColumnView(self.df[column])
+        return self._views[column]
+
+
+class RuleOutcome:
+
+    """
+    Ergebnis einer Regel: betroffene Zeilen als kompakte Violation (Wert -> Zeilenbereiche)
+    sowie die Gesamtzahl geprüfter Zeilen.
+    """
+
+    def __init__(self, violation: Violation, n_rows: int):
+        self.violation = violation
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_mask(cls, frame: NormalizedFrame, column: str, mask: np.ndarray, with_values: bool = True) -> "RuleOutcome":
+        mask = np.asarray(mask, dtype=bool)
+        values = frame.column(column).values_at(mask) if with_values else None
+        return cls(Violation.from_rows(frame.labels[mask], values), frame.n_rows)
+
+    def merge(self, other: "RuleOutcome") -> "RuleOutcome":
+        return RuleOutcome(self.violation.merge(other.violation), self.n_rows + other.n_rows)
+
+    def patch(self, rows: RowSet, other: "RuleOutcome") -> "RuleOutcome":
+
+        """
+        Ersetzt das Ergebnis für die Zeilen rows durch das neu berechnete Ergebnis other.
+        """
+
+        return RuleOutcome(self.violation.remove_rows(rows).merge(other.violation), self.n_rows)
+
+    def relabel(self, labels: np.ndarray) -> "RuleOutcome":
+        return RuleOutcome(self.violation.relabel(labels), self.n_rows)
+
+    def to_state(self) -> dict:
+        return {"violation": self.violation.to_dict(), "n_rows": self.n_rows}
+
+    @classmethod
+    def from_state(cls, data: dict) -> "RuleOutcome":
+        return cls(Violation.from_dict(data["violation"]), data["n_rows"])
+
+    def __len__(self):
+        return len(self.violation)
+
+
+# === Darstellung der Ergebnisse (Text wird erst hier und gekappt erzeugt) ===
+
+def render_count(outcome: RuleOutcome) -> List[str]:
+    if len(outcome) == outcome.n_rows:
+        return ["Alle Zeilen betroffen (100%)"]
+    return [f"{len(outcome)} Zeilen betroffen"]
+
+
+def render_rows(outcome: RuleOutcome) -> List[str]:
+    return outcome.violation.render_rows()
+
+
+def render_row_values(outcome: RuleOutcome) -> List[str]:
+    return outcome.violation.render_values()
+
+
+def render_summary(outcome: RuleOutcome) -> List[str]:
+    if len(outcome) == outcome.n_rows:
+        return ["Alle Zeilen betroffen (100%)"]
+    elif outcome.violation.n_values == 1:
+        return [f"Alle Zeilen enthalten nur '{outcome.violation.values[outcome.violation.codes[0]]}' als ungültigen Wert"]
+    else:
+        return render_row_values(outcome)
+
+
+RENDERERS = {
+    "count": render_count,
+    "rows": render_rows,
+    "row_values": render_row_values,
+    "summary": render_summary,
+}
+
+# Renderer, die keine Werte benötigen (es werden nur Zeilenbereiche gespeichert)
+ROW_ONLY_RENDERERS = {"count", "rows"}
+
+
+class Rule:
+
+    """
+    Eine einzelne Prüfregel auf einer Spalte.
+
+    :param category: Ergebnis-Kategorie (general, distributor, customer, financial).
+    :param key: Schlüssel im Ergebnis-Dict.
+    :param column: Geprüfte Spalte.
+    :param predicate: Funktion ColumnView -> bool-Maske der ungültigen Zeilen.
+    :param render: Name des Renderers (count, rows, row_values, summary).
+    :param missing_message: Meldung bei fehlender Spalte (None = kein Eintrag).
+    :param omit_empty: Kein Eintrag, wenn keine Zeile betroffen ist.
+    """
+
+    def __init__(self, category: str, key: str, column: str, predicate, render: str,
+                 missing_message: Optional[str] = None, omit_empty: bool = False):
+        self.category = category
+        self.key = key
+        self.column = column
+        self.columns = (column,)
+        self.predicate = predicate
+        self.render = render
+        self.missing_message = missing_message
+        self.omit_empty = omit_empty
+
+    def evaluate(self, frame: NormalizedFrame) -> Optional[RuleOutcome]:
+        if not frame.has(self.column):
+            return None
+        mask = self.predicate(frame.column(self.column))
+        return RuleOutcome.from_mask(frame, self.column, mask, with_values=self.render not in ROW_ONLY_RENDERERS)
+
+    def format(self, outcome: Optional[RuleOutcome]) -> Optional[List[str]]:
+        if outcome is None:
+            return [self.missing_message] if self.missing_message is not None else None
+        if self.omit_empty and len(outcome) == 0:
+            return None
+        return RENDERERS[self.render](outcome)
+
+
+class MultiColumnRule:
+
+    """
+    Regel über mehrere Spalten (z. B. Versand- gegen Rechnungsdatum). Als Wert wird die
+    Kombination der Spaltenwerte gespeichert, z. B. '2024-06-26 nach 2024-05-20'.
+    Fehlt eine der Spalten, entfällt der Eintrag (fehlende Spalten meldet missing_columns).
+    """
+
+    def __init__(self, category: str, key: str, columns: List[str], predicate, separator: str = " / ",
+                 omit_empty: bool = True):
+        self.category = category
+        self.key = key
+        self.columns = tuple(columns)
+        self.predicate = predicate
+        self.separator = separator
+        self.omit_empty = omit_empty
+
+    def evaluate(self, frame: NormalizedFrame) -> Optional[RuleOutcome]:
+        if not all(frame.has(col) for col in self.columns):
+            return None
+        views = [frame.column(col) for col in self.columns]
+        mask = np.asarray(self.predicate(*views), dtype=bool)
+        parts = [pd.Series(view.values_at(mask), dtype=object).astype(str) for view in views]
+        values = parts[0].str.cat(parts[1:], sep=self.separator).to_numpy(dtype=object)
+        return RuleOutcome(Violation.from_rows(frame.labels[mask], values), frame.n_rows)
+
+    def format(self, outcome: Optional[RuleOutcome]) -> Optional[List[str]]:
+        if outcome is None or (self.omit_empty and len(outcome) == 0):
+            return None
+        return render_row_values(outcome)
+
+
+class ExtendedCostRule:
+
+    """
+    Prüft QUANTITY × Einzelpreis = Gesamtpreis ganzzahlig in Minor-Units (z. B. Cent) der Zeilenwährung,
+    mit Toleranz je Währung. Gemeldet wird je Zeile die Größenklasse der Abweichung, die Befunde werden
+    also nach Größenordnung gruppiert. Nicht numerische Werte meldet bereits invalid_*.
+    """
+
+    def __init__(self, category: str, key: str, quantity_column: str, unit_column: str, extended_column: str,
+                 currency_column: str = "CURRENCY_CODE"):
+        self.category = category
+        self.key = key
+        self.columns = (quantity_column, unit_column, extended_column, currency_column)
+
+    def evaluate(self, frame: NormalizedFrame) -> Optional[RuleOutcome]:
+        quantity_column, unit_column, extended_column, currency_column = self.columns
+        if not all(frame.has(col) for col in (quantity_column, unit_column, extended_column)):
+            return None
+
+        quantity = frame.column(quantity_column).numeric.to_numpy(dtype=float, na_value=np.nan)
+        unit = frame.column(unit_column).numeric.to_numpy(dtype=float, na_value=np.nan)
+        extended = frame.column(extended_column).numeric.to_numpy(dtype=float, na_value=np.nan)
+        minor_units, tolerance = self._currency_parameters(frame, currency_column)
+
+        # Menge 0 sind Preiskorrekturen ohne Mengenbezug und werden nicht geprüft
+        checked = np.isfinite(quantity) & np.isfinite(unit) & np.isfinite(extended) & (quantity != 0)
+        scale = 10.0 ** minor_units
+        extended_minor = np.rint(np.where(checked, extended, 0) * scale).astype(np.int64)
+        unit_micro = np.rint(np.where(checked, unit, 0) * UNIT_PRICE_SCALE)
+        whole_quantity = np.rint(np.where(checked, quantity, 0))
+
+        # Menge × Einzelpreis ganzzahlig in int64 (Menge ganz bzw. in Millionstel), einmal auf Minor-Units gerundet.
+        # Nur Produkte, die dafür zu groß sind, werden exakt über Decimal gerechnet
+        fractional = whole_quantity != quantity
+        quantity_units = np.where(fractional, np.rint(np.where(checked, quantity, 0) * UNIT_PRICE_SCALE), whole_quantity)
+        exact = checked & (np.abs(quantity_units * unit_micro) >= MAX_INT64_PRODUCT)
+        vectorized = checked & ~exact
+        product = (np.where(vectorized, quantity_units, 0).astype(np.int64)
+                   * np.where(vectorized, unit_micro, 0).astype(np.int64))
+        divisor = UNIT_PRICE_SCALE // 10 ** minor_units * np.where(fractional, UNIT_PRICE_SCALE, 1)
+        # Kaufmännisch runden (halbe Minor-Units vom Nullpunkt weg)
+        expected_minor = np.sign(product) * ((np.abs(product) + divisor // 2) // divisor)
+        for i in np.flatnonzero(exact):
+            expected = Decimal(repr(float(quantity[i]))) * Decimal(int(unit_micro[i])).scaleb(-6)
+            expected_minor[i] = int(expected.scaleb(int(minor_units[i])).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+        # Vorzeichen zählt; nur Gutschriften mit negativer Menge und negativem Preis führen auch den Gesamtpreis negativ
+        credit = (quantity < 0) & (unit < 0) & (extended < 0)
+        deviation = np.abs(extended_minor - np.where(credit, -expected_minor, expected_minor))
+        mask = checked & (deviation > tolerance)
+        magnitude = np.floor(np.log10(np.maximum(deviation[mask] / scale[mask], 1e-12))).astype(np.int64)
+        buckets = np.array(DEVIATION_BUCKETS, dtype=object)[np.clip(magnitude + 1, 0, len(DEVIATION_BUCKETS) - 1)]
+        return RuleOutcome(Violation.from_rows(frame.labels[mask], buckets), frame.n_rows)
+
+    def _currency_parameters(self, frame: NormalizedFrame, currency_column: str):
+        if not frame.has(currency_column):
+            return (np.full(frame.n_rows, DEFAULT_MINOR_UNITS),
+                    np.full(frame.n_rows, DEFAULT_TOLERANCE_MINOR_UNITS))
+        currency = frame.column(currency_column).stripped_upper
+        minor_units = currency.map(CURRENCY_MINOR_UNITS).astype(float).fillna(DEFAULT_MINOR_UNITS)
+        tolerance = currency.map(CURRENCY_TOLERANCE_MINOR_UNITS).astype(float).fillna(DEFAULT_TOLERANCE_MINOR_UNITS)
+        return minor_units.to_numpy(dtype=np.int64), tolerance.to_numpy(dtype=np.int64)
+
+    def format(self, outcome: Optional[RuleOutcome]) -> Optional[List[str]]:
+        if outcome is None or len(outcome) == 0:
+            return None
+        return render_row_values(outcome)
+
+
+class DateRanges:
+
+    """
+    Datumsbereich je Gruppe (z. B. Distributor): erstes Datum, letztes Datum, Anzahl Zeilen.
+    ISO-Daten als Text, damit min/max direkt über Strings zusammengeführt werden können.
+    """
+
+    def __init__(self, ranges: Dict[str, list]):
+        self.ranges = ranges
+
+    def merge(self, other: "DateRanges") -> "DateRanges":
+        ranges = {group: list(values) for group, values in self.ranges.items()}
+        for group, (first, last, n_rows) in other.ranges.items():
+            if group in ranges:
+                current = ranges[group]
+                ranges[group] = [min(current[0], first), max(current[1], last), current[2] + n_rows]
+            else:
+                ranges[group] = [first, last, n_rows]
+        return DateRanges(ranges)
+
+    def to_state(self) -> dict:
+        return {"type": "date_ranges", "ranges": self.ranges}
+
+    @classmethod
+    def from_state(cls, data: dict) -> "DateRanges":
+        return cls(data["ranges"])
+
+
+class DateRangeRule:
+
+    """
+    Aggregat-Regel: Datumsbereich von date_column je Wert in group_column (nur gültige Daten).
+    Hängt von allen Zeilen ab (aggregate), wird bei Korrekturen also komplett neu berechnet.
+    """
+
+    aggregate = True
+
+    def __init__(self, category: str, key: Optional[str], group_column: str, date_column: str):
+        self.category = category
+        self.key = key
+        self.columns = (group_column, date_column)
+
+    def evaluate(self, frame: NormalizedFrame) -> Optional[DateRanges]:
+        if not all(frame.has(col) for col in self.columns):
+            return None
+        group_view, date_view = (frame.column(col) for col in self.columns)
+        dates = date_view.dates
+        valid = ~np.isnat(dates)
+        stats = (pd.DataFrame({"group": group_view.text[valid].to_numpy(), "date": dates[valid]})
+                 .groupby("group", observed=True)["date"].agg(["min", "max", "count"]))
+        first = stats["min"].dt.strftime("%Y-%m-%d").tolist()
+        last = stats["max"].dt.strftime("%Y-%m-%d").tolist()
+        return DateRanges({str(group): [a, b, int(n)] for group, a, b, n
+                           in zip(stats.index, first, last, stats["count"])})
+
+    def format(self, outcome: Optional[DateRanges]) -> Dict[str, dict]:
+        if outcome is None:
+            return {}
+        return {group: {"first": first, "last": last, "rows": n_rows}
+                for group, (first, last, n_rows) in sorted(outcome.ranges.items())}
+
+
+class DuplicateKeys:
+
+    """
+    64-Bit-Hashes der Zeilenschlüssel mit ihren Zeilen-Labels. Duplikate werden erst beim
+    Formatieren bestimmt, damit auch Duplikate über Chunk- bzw. Shard-Grenzen hinweg gefunden werden.
+    texts enthält den lesbaren Schlüssel (Hash als Hex -> Text) nur für mehrfach vorkommende Hashes:
+    innerhalb eines Chunks aus evaluate, chunkübergreifende Gruppen nach dem Zusammenführen aus
+    DuplicateKeyRule.resolve (die zweite Zeile einer neuen Gruppe steckt immer im neuen Chunk).
+    """
+
+    def __init__(self, hashes: np.ndarray, labels: np.ndarray, texts: Dict[str, str], n_rows: int):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.texts = texts
+        self.n_rows = n_rows
+
+    def merge(self, other: "DuplicateKeys") -> "DuplicateKeys":
+        return DuplicateKeys(np.concatenate([self.hashes, other.hashes]),
+                             np.concatenate([self.labels, other.labels]),
+                             {**other.texts, **self.texts}, self.n_rows + other.n_rows)
+
+    def duplicates(self) -> Violation:
+
+        """
+        Zeilen mit mehrfach vorkommendem Schlüssel, gruppiert nach Schlüssel-Hash (Hash-Tabelle, linear).
+        """
+
+        duplicated = pd.Series(self.hashes).duplicated(keep=False).to_numpy()
+        codes, uniques = pd.factorize(self.hashes[duplicated])
+        hexes = np.array([f"{h:016x}" for h in uniques], dtype=object)
+        return Violation.from_rows(self.labels[duplicated], hexes[codes] if len(codes) else [])
+
+    def untexted(self) -> Tuple[np.ndarray, np.ndarray]:
+
+        """
+        Duplikatgruppen ohne lesbaren Schlüssel: Hash und Labels ihrer Zeilen (je Zeile ein Eintrag).
+        """
+
+        duplicated = pd.Series(self.hashes).duplicated(keep=False).to_numpy()
+        hexes = np.array([f"{h:016x}" for h in self.hashes[duplicated]], dtype=object)
+        missing = np.array([h not in self.texts for h in hexes], dtype=bool)
+        return hexes[missing], self.labels[duplicated][missing]
+
+    def relabel(self, labels: np.ndarray) -> "DuplicateKeys":
+        return DuplicateKeys(self.hashes, np.searchsorted(labels, self.labels), self.texts, self.n_rows)
+
+    def __len__(self):
+        return len(self.duplicates())
+
+    def to_state(self) -> dict:
+        # Im State genügen die Zeilen der Duplikatgruppen (Nachprüfung rechnet Aggregate neu)
+        duplicated = pd.Series(self.hashes).duplicated(keep=False).to_numpy()
+        return {
+            "type": "duplicate_keys",
+            "hashes": [f"{h:016x}" for h in self.hashes[duplicated]],
+            "labels": self.labels[duplicated].tolist(),
+            "texts": self.texts,
+            "n_rows": self.n_rows,
+        }
+
+    @classmethod
+    def from_state(cls, data: dict) -> "DuplicateKeys":
+        hashes = np.array([int(h, 16) for h in data["hashes"]], dtype=np.uint64)
+        return cls(hashes, data["labels"], data["texts"], data["n_rows"])
+
+
+class DuplicateKeyRule:
+
+    """
+    Aggregat-Regel: Zeilen mit gleichem Schlüssel (z. B. Rechnungsnummer + Position + Sender).
+    Je Zeile wird ein 64-Bit-Hash der normalisierten (gestrippten) Schlüsselspalten gebildet;
+    Zeilen mit leerem Schlüsselteil werden ausgelassen (die meldet missing_values_in_*).
+    """
+
+    aggregate = True
+
+    def __init__(self, category: str, key: str, columns: List[str], max_samples: int = 5):
+        self.category = category
+        self.key = key
+        self.columns = tuple(columns)
+        self.max_samples = max_samples
+
+    def evaluate(self, frame: NormalizedFrame) -> Optional[DuplicateKeys]:
+        if not all(frame.has(col) for col in self.columns):
+            return None
+        views = [frame.column(col) for col in self.columns]
+        present = ~np.logical_or.reduce([view.empty for view in views])
+        keys = pd.DataFrame({col: view.stripped.array for col, view in zip(self.columns, views)})
+        keys = keys[present].reset_index(drop=True)
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+        # Lesbarer Schlüssel nur für die (wenigen) innerhalb dieses Frames mehrfach vorkommenden Hashes
+        duplicated = pd.Series(hashes).duplicated(keep="first").to_numpy()
+        first = keys[~duplicated & pd.Series(hashes).duplicated(keep=False).to_numpy()]
+        texts = dict(zip((f"{h:016x}" for h in hashes[first.index.to_numpy()]), self._texts(first)))
+        return DuplicateKeys(hashes, frame.labels[present], texts, frame.n_rows)
+
+    def resolve(self, outcome: Optional[DuplicateKeys], df: pd.DataFrame):
+
+        """
+        Ergänzt nach dem Zusammenführen den lesbaren Schlüssel von Gruppen, die erst über Chunk- bzw.
+        Shard-Grenzen entstanden sind, aus den Zeilen von df (dem zuletzt hinzugekommenen Chunk bzw.
+        dem ganzen DataFrame). Gelesen werden nur die betroffenen Zeilen.
+        """
+
+        if outcome is None:
+            return
+        hexes, labels = outcome.untexted()
+        found = np.isin(labels, NormalizedFrame(df).labels)
+        if not found.any():
+            return
+        # Eine Zeile je Gruppe genügt (alle Zeilen einer Gruppe haben denselben Schlüssel)
+        hexes, first = np.unique(hexes[found], return_index=True)
+        labels = labels[found][first]
+        columns = list(self.columns)
+        rows = df.loc[labels, columns] if pd.api.types.is_integer_dtype(df.index) else df.iloc[labels][columns]
+        frame = NormalizedFrame(rows)
+        keys = pd.DataFrame({col: frame.column(col).stripped.array for col in columns})
+        outcome.texts.update(zip(hexes.tolist(), self._texts(keys)))
+
+    @staticmethod
+    def _texts(keys: pd.DataFrame) -> List[str]:
+        return keys.iloc[:, 0].astype(str).str.cat([keys[col].astype(str) for col in keys.columns[1:]],
+                                                   sep=" / ").tolist()
+
+    def format(self, outcome: Optional[DuplicateKeys]) -> Optional[List[str]]:
+        if outcome is None:
+            return None
+        lines = []
+        rest_groups = rest_rows = 0
+        for value, rows in outcome.duplicates().groups():
+            if len(lines) < MAX_RENDERED_LINES:
+                key = outcome.texts.get(value, f"Schlüssel-Hash {value}")
+                lines.append(f"{key}: {len(rows)}× (Zeilen {rows.format(self.max_samples)})")
+            else:
+                rest_groups += 1
+                rest_rows += len(rows)
+        if rest_groups:
+            lines.append(f"… {rest_groups} weitere Duplikatgruppen mit {rest_rows} Zeilen")
+        return lines or None
+
+
+class RequiredColumnsRule:
+
+    """
+    Meldet alle Pflichtspalten, die im DataFrame fehlen.
+    """
+
+    def __init__(self, category: str, key: str, columns: List[str]):
+        self.category = category
+        self.key = key
+        self.columns = tuple(columns)
+
+    def evaluate(self, frame: NormalizedFrame) -> List[str]:
+        return [col for col in self.columns if not frame.has(col)]
+
+    def format(self, outcome: List[str]) -> Optional[List[str]]:
+        return outcome or None
+
+
+class MlfbRule:
+
+    """
+    MLFB-Prüfung gegen die Norm-API. Wird nicht vom Plan selbst ausgewertet (external),
+    sondern vom DataChecker mit dem Produktnummern-Service; n_rows zählt die geprüften Nummern.
+    Das Ergebnis der Kategorie ist direkt die Liste (kein Dict).
+    """
+
+    category = "mlfb"
+    key = None
+    columns = ("VENDOR_ITEM_NUMBER",)
+    external = True
+
+    def format(self, outcome: Optional[RuleOutcome]) -> List[str]:
+        if outcome is None:
+            return ["Fehler: Spalte 'VENDOR_ITEM_NUMBER' nicht gefunden"]
+        if outcome.n_rows == 0:
+            return ["Keine VENDOR_ITEM_NUMBER vorhanden, MLFB-Prüfung übersprungen"]
+        if len(outcome):
+            return ["Ungültige MLFB-Nummern:\n" + "\n".join(outcome.violation.render_values())]
+        return ["Alle MLFB-Nummern sind gültig"]
+
+
+# Reihenfolge der Kategorien in check_results
+CATEGORY_ORDER = ["general", "mlfb", "distributor", "customer", "financial", "date_ranges"]
+
+
+def _outcome_to_state(outcome):
+    return outcome.to_state() if hasattr(outcome, "to_state") else outcome
+
+
+def _outcome_from_state(data):
+    if not isinstance(data, dict):
+        return data
+    if data.get("type") == "date_ranges":
+        return DateRanges.from_state(data)
+    if data.get("type") == "duplicate_keys":
+        return DuplicateKeys.from_state(data)
+    return RuleOutcome.from_state(data)
+
+
+class ValidationReport:
+
+    """
+    Ergebnisse eines Plan-Durchlaufs, gruppiert nach Kategorie in Regelreihenfolge.
+    """
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self.outcomes: Dict[str, list] = {}
+        # Zusatzinformationen, die neben den Prüfergebnissen in check_results landen (z. B. Dialekt)
+        self.metadata: Dict[str, Any] = {}
+
+    def add(self, rule, outcome):
+        self.outcomes.setdefault(rule.category, []).append((rule, outcome))
+
+    @classmethod
+    def from_outcomes(cls, plan: "ValidationPlan", n_rows: int, outcomes: Dict[str, list]) -> "ValidationReport":
+
+        """
+        Baut einen Report aus reinen Regel-Ergebnissen (z. B. aus einem Worker-Prozess)
+        und den Regeln des lokalen Plans.
+        """
+
+        report = cls(n_rows)
+        for category, category_outcomes in outcomes.items():
+            rules = [rule for rule in plan.rules if rule.category == category]
+            report.outcomes[category] = list(zip(rules, category_outcomes))
+        return report
+
+    def raw_outcomes(self) -> Dict[str, list]:
+        return {category: [outcome for _, outcome in entries] for category, entries in self.outcomes.items()}
+
+    def merge(self, other: "ValidationReport") -> "ValidationReport":
+
+        """
+        Führt den Report eines weiteren Chunks (gleicher Plan, gleicher Header) hinzu.
+        Zeilen-Labels bleiben global, die Zeilenzahl wird aufsummiert.
+        """
+
+        merged = ValidationReport(self.n_rows + other.n_rows)
+        merged.metadata = dict(self.metadata)
+        for category, entries in self.outcomes.items():
+            merged.outcomes[category] = [
+                (rule, outcome.merge(other_outcome) if hasattr(outcome, "merge") else outcome)
+                for (rule, outcome), (_, other_outcome) in zip(entries, other.outcomes[category])
+            ]
+        return merged
+
+    def resolve(self, df: pd.DataFrame) -> "ValidationReport":
+
+        """
+        Nach merge: ergänzt Angaben, die nur aus den Zeilen selbst kommen (lesbare Schlüssel
+        chunkübergreifender Duplikate). df sind die zuletzt hinzugekommenen Zeilen.
+        """
+
+        for entries in self.outcomes.values():
+            for rule, outcome in entries:
+                if hasattr(rule, "resolve"):
+                    rule.resolve(outcome, df)
+        return self
+
+    def results(self, category: str):
+        results = {}
+        for rule, outcome in self.outcomes.get(category, []):
+            formatted = rule.format(outcome)
+            if rule.key is None:
+                return formatted
+            if formatted is not None:
+                results[rule.key] = formatted
+        return results
+
+    def all_results(self) -> Dict[str, Any]:
+        categories = sorted(self.outcomes, key=lambda c: CATEGORY_ORDER.index(c) if c in CATEGORY_ORDER else len(CATEGORY_ORDER))
+        return {category: self.results(category) for category in categories}
+
+    def to_state(self) -> dict:
+
+        """
+        JSON-fähige, kompakte Form für den Graph-State (Zeilenbereiche statt Zeilen).
+        """
+
+        return {
+            "n_rows": self.n_rows,
+            "outcomes": [[category, rule.key, _outcome_to_state(outcome)]
+                         for category, entries in self.outcomes.items() for rule, outcome in entries],
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_state(cls, plan: "ValidationPlan", data: dict) -> "ValidationReport":
+        report = cls(data["n_rows"])
+        report.metadata = dict(data.get("metadata") or {})
+        for category, key, outcome in data["outcomes"]:
+            rule = plan.rule(category, key)
+            if rule is not None:
+                report.add(rule, _outcome_from_state(outcome))
+        return report
+
+    def replace(self, rule, outcome):
+        entries = self.outcomes[rule.category]
+        for i, (existing, _) in enumerate(entries):
+            if existing is rule:
+                entries[i] = (rule, outcome)
+                return
+        entries.append((rule, outcome))
+
+    def outcome(self, rule):
+        for existing, outcome in self.outcomes.get(rule.category, []):
+            if existing is rule:
+                return outcome
+        return None
+
+    def relabel(self, index: pd.Index) -> "ValidationReport":
+
+        """
+        Überträgt die Zeilen-Labels auf Positionen in index (z. B. wenn eine Datei ohne
+        Leerzeilen neu geschrieben wird und die Zeilen danach fortlaufend nummeriert sind).
+        """
+
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            return self
+        labels = index.to_numpy()
+        relabeled = ValidationReport(self.n_rows)
+        relabeled.metadata = dict(self.metadata)
+        for category, entries in self.outcomes.items():
+            relabeled.outcomes[category] = [
+                (rule, outcome.relabel(labels) if hasattr(outcome, "relabel") else outcome)
+                for rule, outcome in entries
+            ]
+        return relabeled
+
+
+class ValidationPlan:
+
+    """
+    Kompilierter Prüfplan: alle Regeln werden in einem Durchlauf über einen
+    gemeinsamen NormalizedFrame ausgewertet.
+    """
+
+    def __init__(self, rules: Iterable, external_rules: Iterable = ()):
+        self.rules = list(rules)
+        self.external_rules = list(external_rules)
+
+    def rule(self, category: str, key: Optional[str]):
+        for rule in self.rules + self.external_rules:
+            if rule.category == category and rule.key == key:
+                return rule
+        return None
+
+    @property
+    def categories(self) -> List[str]:
+        return list(dict.fromkeys(rule.category for rule in self.rules))
+
+    def evaluate(self, df: pd.DataFrame, categories: Optional[Iterable[str]] = None) -> ValidationReport:
+        selected = set(categories) if categories is not None else None
+        frame = NormalizedFrame(df)
+        report = ValidationReport(frame.n_rows)
+        for category in self.categories:
+            if selected is None or category in selected:
+                report.outcomes[category] = []
+        for rule in self.rules:
+            if selected is None or rule.category in selected:
+                report.add(rule, rule.evaluate(frame))
+        return report
+
+    def revalidate(self, report: ValidationReport, df: pd.DataFrame, touched: Dict[Any, set]) -> ValidationReport:
+
+        """
+        Inkrementelle Nachprüfung nach Korrekturen: nur Regeln auf geänderten Spalten werden neu
+        ausgewertet, und zwar nur für die geänderten Zeilen. Regeln mit aggregate=True hängen von
+        anderen Zeilen ab und werden (nur wenn eine ihrer Spalten betroffen ist) komplett neu ausgewertet.
+
+        :param report: Bisheriger Report (Labels passend zu df.index).
+        :param df: DataFrame nach den Korrekturen.
+        :param touched: Zeilen-Label -> Menge geänderter Spalten.
+        """
+
+        touched_columns = set().union(*touched.values()) if touched else set()
+        affected = [rule for rule in self.rules if touched_columns.intersection(rule.columns)]
+        needed = set().union(*(rule.columns for rule in affected)) if affected else set()
+        # Nur die geänderten Zeilen und benötigten Spalten herauslösen, der Rest arbeitet auf diesem Ausschnitt
+        touched_frame = df.loc[list(touched), [column for column in df.columns if column in needed]]
+        full_frame = None
+        for rule in affected:
+            old = report.outcome(rule)
+            if getattr(rule, "aggregate", False) or not isinstance(old, RuleOutcome):
+                if full_frame is None:
+                    full_frame = NormalizedFrame(df)
+                report.replace(rule, rule.evaluate(full_frame))
+                continue
+            labels = [label for label, columns in touched.items() if columns.intersection(rule.columns)]
+            columns = [column for column in touched_frame.columns if column in rule.columns]
+            new = rule.evaluate(NormalizedFrame(touched_frame.loc[labels, columns]))
+            report.replace(rule, old.patch(RowSet.from_labels(labels), new))
+        return report
+
+
+# === Prädikate ===
+
+def is_empty(view: ColumnView) -> np.ndarray:
+    return view.empty
+
+
+class NotIn:
+
+    """
+    Prädikat: Wert (upper) ist nicht in der erlaubten Menge. Als Klasse statt Closure,
+    damit der Plan an Worker-Prozesse übergeben (gepickelt) werden kann.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __call__(self, view: ColumnView) -> np.ndarray:
+        return ~view.upper.isin(self.values).to_numpy(dtype=bool)
+
+
+def not_in(values) -> Callable[[ColumnView], np.ndarray]:
+    return NotIn(values)
+
+
+def state_missing(view: ColumnView) -> np.ndarray:
+    return (view.stripped_upper == "").to_numpy(dtype=bool)
+
+
+def state_invalid(view: ColumnView) -> np.ndarray:
+    state_series = view.stripped_upper
+    return (~state_series.isin(VALID_STATES) & (state_series != "")).to_numpy(dtype=bool)
+
+
+def invoice_number_invalid(view: ColumnView) -> np.ndarray:
+    return ~view.stripped.str.match(INVOICE_NUMBER_PATTERN, na=False).to_numpy(dtype=bool)
+
+
+def date_invalid(view: ColumnView) -> np.ndarray:
+    return np.isnat(view.dates)
+
+
+def date_invalid_if_present(view: ColumnView) -> np.ndarray:
+    return np.isnat(view.dates) & ~view.empty
+
+
+class FutureDate:
+
+    """
+    Prädikat: Datum liegt nach dem Stichtag (Standard: heute bei der Auswertung).
+    """
+
+    def __init__(self, reference: Optional[pd.Timestamp] = None):
+        self.reference = reference
+
+    def __call__(self, view: ColumnView) -> np.ndarray:
+        reference = self.reference if self.reference is not None else pd.Timestamp.today().normalize()
+        return view.dates > np.datetime64(pd.Timestamp(reference).normalize(), "ns")
+
+
+class ShippedAfterInvoice:
+
+    """
+    Prädikat über (Versanddatum, Rechnungsdatum): Versand mehr als max_days Tage nach der Rechnung.
+    Zeilen mit fehlendem oder ungültigem Datum werden hier nicht gemeldet.
+    """
+
+    def __init__(self, max_days: int = 0):
+        self.max_days = max_days
+
+    def __call__(self, ship: ColumnView, invoice: ColumnView) -> np.ndarray:
+        return (ship.dates - invoice.dates) > np.timedelta64(self.max_days, "D")
+
+
+def not_numeric(view: ColumnView) -> np.ndarray:
+    return view.numeric.isnull().to_numpy(dtype=bool)
+
+
+def build_default_plan() -> ValidationPlan:
+
+    """
+    Baut den Standard-Prüfplan für POS-Dateien (entspricht den bisherigen check_*-Methoden).
+    """
+
+    rules = [RequiredColumnsRule("general", "missing_columns", MANDATORY_COLUMNS)]
+
+    # Leere Werte in Pflichtspalten
+    for col in MANDATORY_COLUMNS:
+        rules.append(Rule("general", f"missing_values_in_{col}", col, is_empty, "count",
+                          missing_message="Spalte fehlt komplett", omit_empty=True))
+    rules.append(Rule("general", "invalid_invoice_numbers", "DISTRIBUTOR_INVOICE_NUMBER",
+                      invoice_number_invalid, "row_values", omit_empty=True))
+    rules.append(DuplicateKeyRule("general", "duplicate_invoice_lines", DUPLICATE_KEY_COLUMNS))
+
+    # Distributor
+    rules += [
+        Rule("distributor", "invalid_distributor_invoice_dates", "DISTRIBUTOR_INVOICE_DATE", date_invalid,
+             "row_values", missing_message="Spalte 'DISTRIBUTOR_INVOICE_DATE' fehlt"),
+        Rule("distributor", "missing_sender_id", "DISTRIBUTOR_SENDER_ID", is_empty,
+             "rows", missing_message="Spalte 'DISTRIBUTOR_SENDER_ID' fehlt"),
+        Rule("distributor", "missing_invoice_number", "DISTRIBUTOR_INVOICE_NUMBER", is_empty,
+             "rows", missing_message="Spalte 'DISTRIBUTOR_INVOICE_NUMBER' fehlt"),
+        Rule("distributor", "invalid_distributor_ship_dates", "DISTRIBUTOR_SHIP_DATE", date_invalid_if_present,
+             "row_values", omit_empty=True),
+        Rule("distributor", "future_invoice_dates", "DISTRIBUTOR_INVOICE_DATE", FutureDate(),
+             "row_values", omit_empty=True),
+        Rule("distributor", "future_ship_dates", "DISTRIBUTOR_SHIP_DATE", FutureDate(),
+             "row_values", omit_empty=True),
+        MultiColumnRule("distributor", "ship_date_after_invoice_date",
+                        ["DISTRIBUTOR_SHIP_DATE", "DISTRIBUTOR_INVOICE_DATE"],
+                        ShippedAfterInvoice(MAX_SHIP_AFTER_INVOICE_DAYS), separator=" nach "),
+    ]
+
+    # Rechnungszeitraum je Distributor (Statistik, keine Prüfung)
+    rules.append(DateRangeRule("date_ranges", None, "DISTRIBUTOR_SENDER_ID", "DISTRIBUTOR_INVOICE_DATE"))
+
+    # Customer
+    for prefix, name_col in (("bill_to", "BILL_TO_CUSTOMER_NAME"), ("ship_to", "SHIP_TO_CUSTOMER_CUSTOMER_NAME")):
+        country_col = f"{prefix.upper()}_CUSTOMER_COUNTRY"
+        zip_col = f"{prefix.upper()}_CUSTOMER_ZIP"
+        rules += [
+            Rule("customer", f"invalid_{prefix}_countries", country_col, not_in(KNOWN_COUNTRIES),
+                 "row_values", missing_message=f"Spalte '{country_col}' fehlt"),
+            Rule("customer", f"missing_{prefix}_names", name_col, is_empty,
+                 "rows", missing_message=f"Spalte '{name_col}' fehlt"),
+            Rule("customer", f"missing_{prefix}_zip", zip_col, is_empty,
+                 "rows", missing_message=f"Spalte '{zip_col}' fehlt"),
+        ]
+    for prefix in ("ship_to", "bill_to"):
+        state_col = f"{prefix.upper()}_CUSTOMER_STATE"
+        rules += [
+            Rule("customer", f"missing_{prefix}_state", state_col, state_missing, "count", omit_empty=True),
+            Rule("customer", f"invalid_{prefix}_state", state_col, state_invalid, "summary"),
+        ]
+
+    # Financial
+    rules.append(Rule("financial", "invalid_currencies", "CURRENCY_CODE", not_in(KNOWN_CURRENCIES),
+                      "row_values", missing_message="Spalte 'CURRENCY_CODE' fehlt"))
+    for col in ["UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD", "QUANTITY"]:
+        key = "invalid_quantity" if col == "QUANTITY" else f"invalid_{col.lower()}"
+        rules.append(Rule("financial", key, col, not_numeric, "row_values",
+                          missing_message=f"Spalte '{col}' fehlt"))
+    rules += [
+        ExtendedCostRule("financial", "inconsistent_extended_cost_of_goods_sold",
+                         "QUANTITY", "UNIT_COST", "EXTENDED_COST_OF_GOODS_SOLD"),
+        ExtendedCostRule("financial", "inconsistent_extended_replenishment_cost",
+                         "QUANTITY", "UNIT_REPLENISHMENT_COST", "EXTENDED_REPLENISHMENT_COST"),
+    ]
+
+    return ValidationPlan(rules, external_rules=[MlfbRule()])
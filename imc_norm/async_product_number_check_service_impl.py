@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.product_number_check_service_impl import BATCH_SIZE, request_timeout
+from imc_norm.resilient_batching import AdaptiveBatchSizer, BatchError, RetryPolicy, adispatch_batches
+from imc_norm.token_manager import OidcTokenManager
+
+# Gleichzeitige Anfragen an die Norm-API (zugleich Größe des Verbindungs-Pools)
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class AsyncProductNumberCheckServiceImpl(ProductNumberCheckService):
+    """
+    Norm-API-Client auf einem gepoolten httpx.AsyncClient (Keep-Alive).
+
+    Batches à 100 Nummern werden nebenläufig gesendet (höchstens max_concurrency gleichzeitig),
+    die Ergebnisse kommen in Eingabereihenfolge zurück. Der Client lebt in einer eigenen Event-Loop
+    in einem Hintergrund-Thread, damit Verbindungen über Aufrufe hinweg wiederverwendet werden; die
+    synchronen Methoden des Interfaces können daher auch aus mehreren Threads aufgerufen werden.
+    Aus async-Code direkt die a*-Methoden verwenden (je Instanz nicht mit den synchronen mischen).
+    """
+
+    def __init__(self, api_url: str, client_id: str, client_secret: str,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, batch_size: int = BATCH_SIZE,
+                 timeout: Optional[float] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 token_manager: Optional[OidcTokenManager] = None, retry_policy: Optional[RetryPolicy] = None):
+        self.api_url = api_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.timeout = request_timeout(timeout)
+        # transport ersetzt die Netzwerkschicht (z. B. httpx.MockTransport in Tests)
+        self.transport = transport
+        # Das Token wird erst bei der ersten Anfrage geholt (kein Netzwerkzugriff beim Erzeugen)
+        self.token_manager = token_manager or OidcTokenManager(client_id, client_secret)
+        self.api_request_count = 0
+        # Batch-Größe passt sich über Aufrufe hinweg an die beobachteten Antwortzeiten an
+        self.batch_sizer = AdaptiveBatchSizer(max_size=batch_size)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def request_count(self) -> int:
+        # Anzahl gesendeter HTTP-Anfragen (inkl. Authentifizierung), z. B. für Metriken
+        return self.api_request_count + self.token_manager.request_count
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="norm-api-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # Client und Semaphore gehören zur Event-Loop, in der sie erstmals gebraucht werden
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=self.transport)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _post(self, payload: List[str]) -> Any:
+        """
+        POST an die Norm-API; bei 401 (Token abgelaufen/widerrufen) einmal mit neuem Token wiederholen.
+        """
+        client = self._ensure_client()
+        async with self._semaphore:
+            for attempt in range(2):
+                token = await self.token_manager.aget_token()
+                headers = {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {token}"
+                }
+                self.api_request_count += 1
+                try:
+                    response = await client.post(self.api_url, json=payload, headers=headers)
+                except httpx.TransportError as e:
+                    raise BatchError(None, str(e) or type(e).__name__)
+                if response.status_code != 401 or attempt:
+                    break
+                print("[DEBUG] Token abgelehnt (401), hole neues Token")
+                self.token_manager.invalidate(token)
+        if response.status_code >= 400:
+            print(f"Fehlerantwort ({response.status_code}): {response.text}")
+            raise BatchError(response.status_code, response.text)
+        try:
+            return response.json()
+        except ValueError:
+            # z. B. HTML-Seite eines Proxys mit Status 200: wie eine fehlerhafte Gateway-Antwort behandeln
+            print(f"Antwort ist kein JSON: {response.text[:200]}")
+            raise BatchError(502, f"Antwort ist kein JSON: {response.text[:200]}")
+
+    async def avalidate_product_number(self, product_number: str) -> Dict[str, Any]:
+        """
+        Validate a single product number (MLFB).
+        """
+        return await self._post([product_number])
+
+    async def avalidate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of product numbers (MLFBs) — in adaptiv bemessenen Batches nebenläufig gesendet.
+        Fehlgeschlagene Batches werden wiederholt bzw. halbiert; Nummern, die trotzdem nicht geprüft
+        werden konnten, erhalten ein Ergebnis mit 'error' statt die ganze Prüfung abzubrechen.
+        """
+        if not product_numbers:
+            print("Keine Produktnummern übergeben, API-Call wird übersprungen.")
+            return []
+
+        print(f"→ Sende {len(product_numbers)} Nummern (bis zu {self.max_concurrency} Batches gleichzeitig)")
+        return await adispatch_batches(product_numbers, self._post, self.batch_sizer, self.retry_policy,
+                                       self.max_concurrency)
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        """
+        Validate a single product number (MLFB).
+        """
+        return self._run(self.avalidate_product_number(product_number))
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of product numbers (MLFBs) — nebenläufig über den Verbindungs-Pool.
+        """
+        return self._run(self.avalidate_product_numbers_batch(product_numbers))
+
+    def close(self):
+        """
+        Schließt den Verbindungs-Pool und beendet die Hintergrund-Loop.
+        """
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self._run(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
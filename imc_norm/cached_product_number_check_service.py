@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.resilient_batching import is_error_result
+
+# Systeme, unter denen eine Nummer als gültig gilt (bestimmt die TTL-Klasse eines Eintrags)
+VALID_SYSTEMS = ("MLFB", "TNS", "SFC", "SSN")
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "imc_mlfb_cache.sqlite")
+DEFAULT_VALID_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_INVALID_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# SQLite begrenzt die Anzahl Parameter je Anweisung
+_SQL_BATCH = 500
+
+
+class CachedProductNumberCheckService(ProductNumberCheckService):
+    """
+    Persistenter Cache (SQLite) vor einem ProductNumberCheckService.
+
+    Mehrere Prozesse können dieselbe Datenbank nutzen (WAL-Modus, Sperren übernimmt SQLite).
+    Gültige und ungültige Ergebnisse haben getrennte TTLs, die Größe ist auf max_entries begrenzt
+    (verdrängt wird der am längsten nicht genutzte Eintrag). Der eigentliche Dienst kann als Fabrik
+    übergeben werden und wird dann erst beim ersten Cache-Fehltreffer erzeugt (inkl. Authentifizierung).
+    """
+
+    def __init__(self, service: Union[ProductNumberCheckService, Callable[[], ProductNumberCheckService]],
+                 db_path: str = DEFAULT_DB_PATH,
+                 valid_ttl_seconds: float = DEFAULT_VALID_TTL_SECONDS,
+                 invalid_ttl_seconds: float = DEFAULT_INVALID_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 valid_systems: Iterable[str] = VALID_SYSTEMS):
+        self._service = service if isinstance(service, ProductNumberCheckService) else None
+        self._factory = None if self._service is not None else service
+        self.db_path = db_path
+        self.valid_ttl_seconds = valid_ttl_seconds
+        self.invalid_ttl_seconds = invalid_ttl_seconds
+        self.max_entries = max_entries
+        self.valid_systems = set(valid_systems)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._init_db()
+
+    @classmethod
+    def from_env(cls, service: Union[ProductNumberCheckService, Callable[[], ProductNumberCheckService]]
+                 ) -> "CachedProductNumberCheckService":
+        """
+        Konfiguration über MLFB_CACHE_PATH, MLFB_CACHE_TTL_VALID_HOURS, MLFB_CACHE_TTL_INVALID_HOURS
+        und MLFB_CACHE_MAX_ENTRIES.
+        """
+        return cls(
+            service,
+            db_path=os.getenv("MLFB_CACHE_PATH") or DEFAULT_DB_PATH,
+            valid_ttl_seconds=float(os.getenv("MLFB_CACHE_TTL_VALID_HOURS") or DEFAULT_VALID_TTL_SECONDS / 3600) * 3600,
+            invalid_ttl_seconds=float(os.getenv("MLFB_CACHE_TTL_INVALID_HOURS") or DEFAULT_INVALID_TTL_SECONDS / 3600) * 3600,
+            max_entries=int(os.getenv("MLFB_CACHE_MAX_ENTRIES") or DEFAULT_MAX_ENTRIES),
+        )
+
+    @property
+    def service(self) -> ProductNumberCheckService:
+        with self._lock:
+            if self._service is None:
+                self._service = self._factory()
+            return self._service
+
+    @property
+    def request_count(self) -> int:
+        # HTTP-Anfragen des eigentlichen Dienstes (0, solange er nicht gebraucht wurde)
+        return getattr(self._service, "request_count", 0) if self._service is not None else 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Eine Verbindung je Thread (sqlite3-Verbindungen sind nicht threadsicher)
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _init_db(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS mlfb_cache ("
+            " number TEXT PRIMARY KEY, result TEXT NOT NULL, valid INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS mlfb_cache_last_used ON mlfb_cache (last_used)")
+
+    def _is_valid(self, result: Dict[str, Any]) -> bool:
+        return (result.get("output") or {}).get("system") in self.valid_systems
+
+    def _load(self, numbers: List[str], now: float) -> Dict[str, Dict[str, Any]]:
+        connection = self._connection()
+        found = {}
+        expired = []
+        for i in range(0, len(numbers), _SQL_BATCH):
+            batch = numbers[i:i + _SQL_BATCH]
+            rows = connection.execute(
+                f"SELECT number, result, expires_at FROM mlfb_cache WHERE number IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            for number, result, expires_at in rows:
+                if expires_at > now:
+                    found[number] = json.loads(result)
+                else:
+                    expired.append(number)
+
+        # Zugriffszeit für LRU vermerken
+        hit_numbers = list(found)
+        for i in range(0, len(hit_numbers), _SQL_BATCH):
+            batch = hit_numbers[i:i + _SQL_BATCH]
+            connection.execute(
+                f"UPDATE mlfb_cache SET last_used = ? WHERE number IN ({','.join('?' * len(batch))})",
+                [now, *batch],
+            )
+        with self._lock:
+            self.expired += len(expired)
+        return found
+
+    def _store(self, results: Dict[str, Dict[str, Any]], now: float):
+        rows = []
+        for number, result in results.items():
+            # Nicht prüfbare Nummern (API-Fehler) beim nächsten Mal erneut anfragen
+            if is_error_result(result):
+                continue
+            valid = self._is_valid(result)
+            ttl = self.valid_ttl_seconds if valid else self.invalid_ttl_seconds
+            rows.append((number, json.dumps(result), int(valid), now + ttl, now))
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO mlfb_cache (number, result, valid, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            excess = connection.execute("SELECT COUNT(*) FROM mlfb_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM mlfb_cache WHERE number IN (SELECT number FROM mlfb_cache ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                with self._lock:
+                    self.evicted += excess
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        """
+        Validate a single product number (MLFB) — über den Cache.
+        """
+        return self.validate_product_numbers_batch([product_number])[0]
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of product numbers (MLFBs). Nur nicht (mehr) gecachte Nummern werden an den
+        eigentlichen Dienst weitergegeben, jede höchstens einmal. Reihenfolge wie product_numbers.
+        """
+        if not product_numbers:
+            return []
+
+        now = time.time()
+        distinct = list(dict.fromkeys(product_numbers))
+        results = self._load(distinct, now)
+        missing = [number for number in distinct if number not in results]
+        with self._lock:
+            self.hits += len(distinct) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = dict(zip(missing, self.service.validate_product_numbers_batch(missing)))
+            self._store(fetched, now)
+            results.update(fetched)
+
+        return [results[number] for number in product_numbers]
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._connection().execute("SELECT COUNT(*) FROM mlfb_cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired,
+                "evicted": self.evicted, "entries": entries}
+
+    def clear(self):
+        self._connection().execute("DELETE FROM mlfb_cache")
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.resilient_batching import is_error_result
+
+# Systeme, unter denen eine Nummer als gültig gilt (nur diese stehen im Index)
+VALID_SYSTEMS = ("MLFB", "TNS", "SFC", "SSN")
+
+# Spaltennamen für Nummer und System in CSV-Exporten der Norm-API (Groß-/Kleinschreibung egal)
+NUMBER_COLUMNS = ("input", "product_number", "number", "mlfb")
+SYSTEM_COLUMN = "system"
+
+
+def _encode(numbers: Iterable[str]) -> np.ndarray:
+    return np.array([str(number).encode("utf-8") for number in numbers], dtype=bytes)
+
+
+def read_export(path: str) -> Dict[str, Optional[str]]:
+    """
+    Liest einen Export der Norm-API: JSON/JSONL mit Ergebnissen wie von validate_product_numbers_batch
+    ({"input": ..., "output": {"system": ...}}) oder CSV mit Nummer und System. Ergebnis: Nummer -> System
+    (None = ungültig, API-Fehler werden übersprungen).
+    """
+    if path.endswith((".json", ".jsonl")):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if path.endswith(".json"):
+            results = json.loads(text)
+        else:
+            results = [json.loads(line) for line in text.splitlines() if line.strip()]
+        return {str(result["input"]): (result.get("output") or {}).get("system")
+                for result in results if not is_error_result(result)}
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, sep=None, engine="python")
+    columns = {col.strip().lower(): col for col in df.columns}
+    number_column = next((columns[name] for name in NUMBER_COLUMNS if name in columns), None)
+    if number_column is None or SYSTEM_COLUMN not in columns:
+        raise ValueError(f"{path}: Spalten für Nummer ({'/'.join(NUMBER_COLUMNS)}) und '{SYSTEM_COLUMN}' erwartet")
+    systems = df[columns[SYSTEM_COLUMN]].str.strip()
+    return dict(zip(df[number_column].str.strip(), systems.where(systems != "", None)))
+
+
+class LocalProductNumberIndex(ProductNumberCheckService):
+    """
+    Lokaler Index bekannter gültiger Produktnummern mit ihrem System (MLFB/TNS/SFC/SSN), z. B. aus
+    Exporten der Norm-API. Gespeichert als sortiertes Byte-Array plus System-Code je Nummer (kompakt,
+    Nachschlagen vektorisiert per Binärsuche), Datei im .npz-Format.
+
+    Nummern, die nicht im Index stehen, gehen an den Fallback-Dienst (z. B. Cache + Norm-API), der
+    als Fabrik übergeben werden kann und dann erst bei Bedarf erzeugt wird. Mit complete=True gilt der
+    Index als vollständig: unbekannte Nummern sind ungültig, die Prüfung läuft komplett lokal.
+    """
+
+    def __init__(self, numbers: np.ndarray, systems: np.ndarray, system_names: Iterable[str],
+                 fallback: Union[ProductNumberCheckService, Callable[[], ProductNumberCheckService], None] = None,
+                 complete: bool = False, created_at: Optional[float] = None):
+        order = np.argsort(numbers, kind="stable")
+        self.numbers = numbers[order]
+        self.systems = systems[order].astype(np.uint8)
+        self.system_names = list(system_names)
+        self.complete = complete
+        self.created_at = created_at if created_at is not None else time.time()
+        self._service = fallback if isinstance(fallback, ProductNumberCheckService) else None
+        self._factory = None if self._service is not None else fallback
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_systems(cls, systems: Dict[str, Optional[str]], **kwargs) -> "LocalProductNumberIndex":
+        """
+        Index aus Nummer -> System; Nummern ohne gültiges System werden nicht aufgenommen.
+        """
+        valid = {number: system for number, system in systems.items() if system in VALID_SYSTEMS}
+        system_names = sorted(set(valid.values()))
+        codes = {name: code for code, name in enumerate(system_names)}
+        return cls(_encode(valid), np.array([codes[system] for system in valid.values()], dtype=np.uint8),
+                   system_names, **kwargs)
+
+    @classmethod
+    def build(cls, export_paths: Iterable[str], base: Optional["LocalProductNumberIndex"] = None,
+              **kwargs) -> "LocalProductNumberIndex":
+        """
+        Baut bzw. aktualisiert den Index aus Norm-API-Exporten (siehe read_export). Spätere Exporte haben
+        Vorrang: eine dort ungültige Nummer wird aus dem Index entfernt.
+        """
+        systems = base.to_systems() if base is not None else {}
+        for path in export_paths:
+            systems.update(read_export(path))
+        return cls.from_systems(systems, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LocalProductNumberIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["numbers"], data["systems"], [str(name) for name in data["system_names"]],
+                       created_at=float(data["created_at"]), **kwargs)
+
+    @classmethod
+    def from_env(cls, fallback: Union[ProductNumberCheckService, Callable[[], ProductNumberCheckService]]
+                 ) -> Optional["LocalProductNumberIndex"]:
+        """
+        Index aus MLFB_INDEX_PATH (None, falls nicht gesetzt), MLFB_INDEX_COMPLETE=1 für einen vollständigen Index.
+        """
+        path = os.getenv("MLFB_INDEX_PATH")
+        if not path:
+            return None
+        index = cls.load(path, fallback=fallback, complete=os.getenv("MLFB_INDEX_COMPLETE", "0") == "1")
+        print(f"[DEBUG] Lokaler MLFB-Index geladen: {len(index)} Nummern aus {path}")
+        return index
+
+    def save(self, path: str):
+        # np.savez hängt sonst ".npz" an
+        with open(path, "wb") as f:
+            np.savez_compressed(f, numbers=self.numbers, systems=self.systems,
+                                system_names=np.array(self.system_names, dtype=str),
+                                created_at=np.array(self.created_at))
+
+    def to_systems(self) -> Dict[str, str]:
+        return {number.decode("utf-8"): self.system_names[code] for number, code in zip(self.numbers, self.systems)}
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    @property
+    def service(self) -> Optional[ProductNumberCheckService]:
+        with self._lock:
+            if self._service is None and self._factory is not None:
+                self._service = self._factory()
+            return self._service
+
+    @property
+    def request_count(self) -> int:
+        # HTTP-Anfragen des Fallback-Dienstes (0, solange er nicht gebraucht wurde)
+        return getattr(self._service, "request_count", 0) if self._service is not None else 0
+
+    def lookup(self, product_numbers: List[str]) -> List[Optional[str]]:
+        """
+        System je Nummer laut Index, None für nicht enthaltene Nummern (ohne Fallback).
+        """
+        if not product_numbers or not len(self.numbers):
+            return [None] * len(product_numbers)
+        query = _encode(product_numbers)
+        positions = np.minimum(np.searchsorted(self.numbers, query), len(self.numbers) - 1)
+        found = self.numbers[positions] == query
+        # Code len(system_names) steht für "nicht enthalten"
+        names = self.system_names + [None]
+        return [names[code] for code in np.where(found, self.systems[positions], len(self.system_names)).tolist()]
+
+    def validate_product_number(self, product_number: str) -> Dict[str, Any]:
+        """
+        Validate a single product number (MLFB) — über den lokalen Index.
+        """
+        return self.validate_product_numbers_batch([product_number])[0]
+
+    def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of product numbers (MLFBs). Im Index enthaltene Nummern werden lokal beantwortet,
+        nur die übrigen (jede höchstens einmal) gehen an den Fallback-Dienst. Reihenfolge wie product_numbers.
+        """
+        if not product_numbers:
+            return []
+
+        distinct = list(dict.fromkeys(product_numbers))
+        systems = self.lookup(distinct)
+        results = {number: {"input": number, "output": {"system": system}} for number, system in zip(distinct, systems)}
+        missing = [number for number, system in zip(distinct, systems) if system is None]
+        with self._lock:
+            self.hits += len(distinct) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            service = None if self.complete else self.service
+            if service is None:
+                results.update({number: {"input": number, "output": {"system": None}} for number in missing})
+            else:
+                results.update(zip(missing, service.validate_product_numbers_batch(missing)))
+
+        return [results[number] for number in product_numbers]
+
+    def stats(self) -> Dict[str, Any]:
+        # Zähler des Fallback-Dienstes (z. B. persistenter Cache) plus die des Index
+        fallback_stats = getattr(self._service, "stats", None)
+        stats = dict(fallback_stats()) if callable(fallback_stats) else {}
+        stats.update({"index_entries": len(self), "index_hits": self.hits, "index_misses": self.misses})
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Baut/aktualisiert den lokalen MLFB-Index aus Norm-API-Exporten")
+    parser.add_argument("exports", nargs="+", help="Exporte (.csv mit Nummer/System oder .json/.jsonl mit API-Ergebnissen)")
+    parser.add_argument("-o", "--output", required=True, help="Index-Datei (.npz)")
+    parser.add_argument("--update", action="store_true", help="Bestehenden Index in --output fortschreiben")
+    args = parser.parse_args(argv)
+
+    base = LocalProductNumberIndex.load(args.output) if args.update and os.path.exists(args.output) else None
+    index = LocalProductNumberIndex.build(args.exports, base=base)
+    index.save(args.output)
+    counts = {name: int((index.systems == code).sum()) for code, name in enumerate(index.system_names)}
+    print(f"[DEBUG] MLFB-Index geschrieben: {args.output} ({len(index)} Nummern, {counts})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,98 @@
 from imc_norm.product_number_check_service import ProductNumberCheckService
+from imc_norm.resilient_batching import AdaptiveBatchSizer, BatchError, RetryPolicy, dispatch_batches
+from imc_norm.token_manager import OidcTokenManager
 
+import os
+import threading
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# Nummern je Anfrage an die Norm-API
+BATCH_SIZE = 100
+# Zeitlimit je Anfrage (überschreibbar mit NORM_API_TIMEOUT_SECONDS); eine hängende Verbindung zählt wie ein Timeout
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+
+def request_timeout(timeout: Optional[float] = None) -> float:
+    return timeout if timeout is not None else float(os.getenv("NORM_API_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+
 
 class ProductNumberCheckServiceImpl(ProductNumberCheckService):
-    def __init__(self, api_url: str, client_id: str, client_secret: str):
+    def __init__(self, api_url: str, client_id: str, client_secret: str,
+                 token_manager: Optional[OidcTokenManager] = None, retry_policy: Optional[RetryPolicy] = None,
+                 batch_size: int = BATCH_SIZE, timeout: Optional[float] = None):
         self.api_url = api_url
         self.client_id = client_id
         self.client_secret = client_secret
-        self.access_token = self._authenticate()
+        self.timeout = request_timeout(timeout)
+        # Das Token wird erst bei der ersten Anfrage geholt (kein Netzwerkzugriff beim Erzeugen)
+        self.token_manager = token_manager or OidcTokenManager(client_id, client_secret)
+        self.api_request_count = 0
+        # Der Client wird auch aus mehreren Threads genutzt (z. B. Batch-Modus): Zähler nur unter Lock erhöhen
+        self._count_lock = threading.Lock()
+        # Batch-Größe passt sich über Aufrufe hinweg an die beobachteten Antwortzeiten an
+        self.batch_sizer = AdaptiveBatchSizer(max_size=batch_size)
+        self.retry_policy = retry_policy or RetryPolicy()
 
-    def _authenticate(self) -> str:
+    @property
+    def request_count(self) -> int:
+        # Anzahl gesendeter HTTP-Anfragen (inkl. Authentifizierung), z. B. für Metriken
+        return self.api_request_count + self.token_manager.request_count
+
+    @property
+    def access_token(self) -> str:
+        return self.token_manager.get_token()
+
+    def _post(self, payload: List[str]) -> requests.Response:
         """
-        Authenticate with the Siemens Identity Provider (OIDC) and retrieve an access token.
+        POST an die Norm-API; bei 401 (Token abgelaufen/widerrufen) einmal mit neuem Token wiederholen.
         """
-        token_url = "https://login.microsoftonline.com/38ae3bcd-9579-4fd4-adda-b42e1495d55a/oauth2/v2.0/token"  # OIDC endpoint
-        payload = {
-            'grant_type': 'client_credentials',
-            'client_id': self.client_id,
-            'client_secret': self.client_secret,
-            'scope': '2a4a9891-2f4d-4565-9b3c-d5dfe14ee5f5/.default'
-        }
-        response = requests.post(token_url, data=payload)
-        print("Response Status Code:", response.status_code)
-        #print("Response Headers:", response.headers)
-        #print("Response Body:", response.text)
-        response.raise_for_status()
-        return response.json().get("access_token")
+        for attempt in range(2):
+            token = self.token_manager.get_token()
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}"
+            }
+            with self._count_lock:
+                self.api_request_count += 1
+            response = requests.post(self.api_url, json=payload, headers=headers, timeout=self.timeout)
+            if response.status_code != 401 or attempt:
+                return response
+            print("[DEBUG] Token abgelehnt (401), hole neues Token")
+            self.token_manager.invalidate(token)
 
     def validate_product_number(self, product_number: str) -> Dict[str, Any]:
         """
         Validate a single product number (MLFB).
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.access_token}"
-        }
-
-        payload = [product_number]
-
-        response = requests.post(self.api_url, json=payload, headers=headers)
+        response = self._post([product_number])
         response.raise_for_status()
         return response.json()
 
+    def _send_batch(self, batch: List[str]) -> List[Dict[str, Any]]:
+        print(f"→ Sende Batch mit {len(batch)} Nummern")
+        try:
+            response = self._post(batch)
+        except requests.RequestException as e:
+            raise BatchError(None, str(e))
+        if response.status_code >= 400:
+            print(f"Fehlerantwort ({response.status_code}): {response.text}")
+            raise BatchError(response.status_code, response.text)
+        try:
+            return response.json()
+        except ValueError:
+            # z. B. HTML-Seite eines Proxys mit Status 200: wie eine fehlerhafte Gateway-Antwort behandeln
+            print(f"Antwort ist kein JSON: {response.text[:200]}")
+            raise BatchError(502, f"Antwort ist kein JSON: {response.text[:200]}")
+
     def validate_product_numbers_batch(self, product_numbers: List[str]) -> List[Dict[str, Any]]:
         """
-        Validate a batch of product numbers (MLFBs) — automatisch in kleinere Batches gesplittet.
+        Validate a batch of product numbers (MLFBs) — in adaptiv bemessenen Batches. Fehlgeschlagene
+        Batches werden wiederholt bzw. halbiert; Nummern, die trotzdem nicht geprüft werden konnten,
+        erhalten ein Ergebnis mit 'error' statt die ganze Prüfung abzubrechen.
         """
         if not product_numbers:
             print("Keine Produktnummern übergeben, API-Call wird übersprungen.")
             return []
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.access_token}"
-        }
-
-        batch_size = 100
-        all_results = []
-
-        for i in range(0, len(product_numbers), batch_size):
-            batch = product_numbers[i:i + batch_size]
-            print(f"→ Sende Batch {i // batch_size + 1} mit {len(batch)} Nummern")
-
-            response = requests.post(self.api_url, json=batch, headers=headers)
-            if response.status_code >= 400:
-                print(f"Fehlerantwort ({response.status_code}): {response.text}")
-            response.raise_for_status()
-
-            all_results.extend(response.json())
-
-        return all_results
+        return dispatch_batches(product_numbers, self._send_batch, self.batch_sizer, self.retry_policy)
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Obergrenzen je Anfrage an die Norm-API (Anzahl Nummern bzw. Größe des JSON-Bodys)
+MAX_BATCH_SIZE = 100
+MAX_PAYLOAD_BYTES = 64 * 1024
+# Ziel-Antwortzeit je Batch; langsamere Antworten verkleinern die Batches
+TARGET_BATCH_SECONDS = 2.0
+
+# Vorübergehende Fehler: werden mit Backoff wiederholt
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Fehler, die am Inhalt des Batches liegen (einzelne Eingaben, Größe): der Batch wird halbiert, um sie zu
+# isolieren. 500 gehört nicht dazu: ein Serverfehler würde sonst bei einem Ausfall jeden Batch in Einzelanfragen zerlegen
+BISECT_STATUSES = frozenset({400, 413, 422})
+
+
+class BatchError(Exception):
+    """
+    Fehlgeschlagene Batch-Anfrage. status ist None bei Verbindungsfehlern/Timeouts.
+    """
+
+    def __init__(self, status: Optional[int], message: str):
+        super().__init__(f"{status}: {message}" if status else message)
+        self.status = status
+        self.message = message
+
+
+def error_result(product_number: str, status: Optional[int], message: str) -> Dict[str, Any]:
+    """
+    Ergebnis für eine Nummer, die nicht geprüft werden konnte (gleiche Form wie die API-Antwort plus 'error').
+    """
+    return {"input": product_number, "output": {"system": None},
+            "error": {"status": status, "message": message[:500]}}
+
+
+def is_error_result(result: Dict[str, Any]) -> bool:
+    return bool(result.get("error"))
+
+
+class AdaptiveBatchSizer:
+    """
+    Batch-Größe nach beobachteter Antwortzeit: schnelle Antworten vergrößern den Batch schrittweise
+    bis max_size, langsame oder fehlgeschlagene halbieren ihn (AIMD). Zusätzlich wird die
+    JSON-Größe je Anfrage auf max_payload_bytes begrenzt. Threadsicher (ein Client, mehrere aufrufende Threads).
+    """
+
+    def __init__(self, max_size: int = MAX_BATCH_SIZE, min_size: int = 1,
+                 target_seconds: float = TARGET_BATCH_SECONDS, max_payload_bytes: int = MAX_PAYLOAD_BYTES):
+        self.max_size = max_size
+        self.min_size = min_size
+        self.target_seconds = target_seconds
+        self.max_payload_bytes = max_payload_bytes
+        self.size = max_size
+        self._lock = threading.Lock()
+
+    def next_end(self, numbers: List[str], start: int) -> int:
+        end = min(start + self.size, len(numbers))
+        payload = 2
+        for i in range(start, end):
+            # Nummer in Anführungszeichen plus Komma
+            payload += len(json.dumps(numbers[i])) + 1
+            if payload > self.max_payload_bytes and i > start:
+                return i
+        return end
+
+    def record(self, n_items: int, seconds: float):
+        if seconds > self.target_seconds:
+            self.shrink(n_items)
+            return
+        with self._lock:
+            if n_items >= self.size:
+                self.size = min(self.max_size, self.size + max(1, self.size // 4))
+
+    def shrink(self, n_items: Optional[int] = None):
+        # Nur Batches mit der aktuellen Größe halbieren: noch mit der alten Größe zugeschnittene (z. B. parallel
+        # laufende) Batches halbieren nicht ein zweites Mal
+        with self._lock:
+            if n_items is None or n_items >= self.size:
+                self.size = max(self.min_size, self.size // 2)
+
+
+class RetryPolicy:
+    """
+    Wiederholung vorübergehender Fehler mit exponentiellem Backoff und zufälligem Jitter
+    (verhindert, dass parallele Anfragen gleichzeitig erneut anklopfen).
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 10.0,
+                 bisect_attempts: int = 2, max_failed_batches: int = 3):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Versuche je Teil-Batch beim Halbieren (der ganze Batch hat seine Versuche schon verbraucht)
+        self.bisect_attempts = bisect_attempts
+        # Nach so vielen Batches in Folge, die trotz Wiederholung scheitern, gilt die API als ausgefallen
+        self.max_failed_batches = max_failed_batches
+
+    def retryable(self, error: BatchError) -> bool:
+        return error.status is None or error.status in RETRYABLE_STATUSES
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Ausfallschutz je Aufruf: scheitern max_failures Batches in Folge an vorübergehenden Fehlern (trotz
+    Wiederholung), werden die übrigen Batches nicht mehr gesendet, sondern sofort als nicht prüfbar
+    beantwortet. Ein erfolgreicher Batch setzt den Zähler zurück; Fehler einzelner Eingaben (400/422)
+    zählen nicht.
+    """
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.failures = 0
+        self.error: Optional[BatchError] = None
+
+    @property
+    def open(self) -> bool:
+        return self.failures >= self.policy.max_failed_batches
+
+    def check(self):
+        if self.open:
+            raise BatchError(self.error.status, f"nicht gesendet nach {self.failures} gescheiterten Batches "
+                                                f"in Folge: {self.error.message}")
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error: BatchError):
+        if self.policy.retryable(error) and not self.open:
+            self.failures += 1
+            self.error = error
+            if self.open:
+                print(f"[ERROR] Norm-API nicht erreichbar ({error}), übrige Batches werden nicht gesendet")
+
+
+def dispatch_batches(numbers: List[str], send: Callable[[List[str]], List[Dict[str, Any]]],
+                     sizer: AdaptiveBatchSizer, policy: RetryPolicy,
+                     sleep: Callable[[float], None] = time.sleep) -> List[Dict[str, Any]]:
+    """
+    Sendet numbers in adaptiv bemessenen Batches über send (liefert die Ergebnisse oder wirft BatchError).
+    Fehlgeschlagene Batches werden wiederholt und bei Fehlern einzelner Eingaben halbiert; was dann noch
+    scheitert, erhält ein Fehler-Ergebnis (error_result). Fällt die API aus (siehe CircuitBreaker), werden die
+    übrigen Batches nicht mehr gesendet. Ein Ergebnis je Nummer, in Eingabereihenfolge.
+    """
+
+    breaker = CircuitBreaker(policy)
+
+    def send_with_retry(batch: List[str], attempts: int) -> List[Dict[str, Any]]:
+        for attempt in range(attempts):
+            breaker.check()
+            start = time.monotonic()
+            try:
+                results = send(batch)
+                if len(results) != len(batch):
+                    raise BatchError(502, f"{len(results)} Ergebnisse für {len(batch)} Nummern")
+            except BatchError as e:
+                error = e
+                if not policy.retryable(e) or attempt == attempts - 1:
+                    break
+                sleep(policy.delay(attempt))
+            else:
+                sizer.record(len(batch), time.monotonic() - start)
+                breaker.record_success()
+                return results
+        breaker.record_failure(error)
+        raise error
+
+    def isolate(batch: List[str], error: BatchError) -> List[Dict[str, Any]]:
+        if len(batch) > 1 and error.status in BISECT_STATUSES:
+            middle = len(batch) // 2
+            return retry_part(batch[:middle]) + retry_part(batch[middle:])
+        print(f"[DEBUG] {len(batch)} Nummern nicht prüfbar: {error}")
+        return [error_result(number, error.status, error.message) for number in batch]
+
+    def retry_part(batch: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return send_with_retry(batch, policy.bisect_attempts)
+        except BatchError as e:
+            return isolate(batch, e)
+
+    def resolve(batch: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return send_with_retry(batch, policy.max_attempts)
+        except BatchError as e:
+            # Einmal je gescheitertem Batch verkleinern, nicht für jeden Teil-Batch beim Halbieren
+            # (und nicht für Batches, die wegen eines Ausfalls gar nicht gesendet wurden)
+            if not breaker.open:
+                sizer.shrink(len(batch))
+            return isolate(batch, e)
+
+    results = []
+    start = 0
+    while start < len(numbers):
+        end = sizer.next_end(numbers, start)
+        results.extend(resolve(numbers[start:end]))
+        start = end
+    return results
+
+
+async def adispatch_batches(numbers: List[str], send: Callable[[List[str]], Awaitable[List[Dict[str, Any]]]],
+                            sizer: AdaptiveBatchSizer, policy: RetryPolicy,
+                            concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Wie dispatch_batches, aber mit bis zu concurrency Batches gleichzeitig. Jeder Batch wird erst
+    zugeschnitten, wenn ein Platz frei ist, damit er die zuletzt beobachtete Batch-Größe nutzt.
+    """
+
+    breaker = CircuitBreaker(policy)
+
+    async def send_with_retry(batch: List[str], attempts: int) -> List[Dict[str, Any]]:
+        for attempt in range(attempts):
+            breaker.check()
+            start = time.monotonic()
+            try:
+                results = await send(batch)
+                if len(results) != len(batch):
+                    raise BatchError(502, f"{len(results)} Ergebnisse für {len(batch)} Nummern")
+            except BatchError as e:
+                error = e
+                if not policy.retryable(e) or attempt == attempts - 1:
+                    break
+                await asyncio.sleep(policy.delay(attempt))
+            else:
+                sizer.record(len(batch), time.monotonic() - start)
+                breaker.record_success()
+                return results
+        breaker.record_failure(error)
+        raise error
+
+    async def isolate(batch: List[str], error: BatchError) -> List[Dict[str, Any]]:
+        if len(batch) > 1 and error.status in BISECT_STATUSES:
+            middle = len(batch) // 2
+            first, second = await asyncio.gather(retry_part(batch[:middle]), retry_part(batch[middle:]))
+            return first + second
+        print(f"[DEBUG] {len(batch)} Nummern nicht prüfbar: {error}")
+        return [error_result(number, error.status, error.message) for number in batch]
+
+    async def retry_part(batch: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return await send_with_retry(batch, policy.bisect_attempts)
+        except BatchError as e:
+            return await isolate(batch, e)
+
+    async def resolve(batch: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return await send_with_retry(batch, policy.max_attempts)
+        except BatchError as e:
+            # Einmal je gescheitertem Batch verkleinern, nicht für jeden Teil-Batch beim Halbieren
+            # (und nicht für Batches, die wegen eines Ausfalls gar nicht gesendet wurden)
+            if not breaker.open:
+                sizer.shrink(len(batch))
+            return await isolate(batch, e)
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(batch: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return await resolve(batch)
+        finally:
+            slots.release()
+
+    tasks = []
+    start = 0
+    while start < len(numbers):
+        await slots.acquire()
+        end = sizer.next_end(numbers, start)
+        tasks.append(asyncio.ensure_future(run(numbers[start:end])))
+        start = end
+    results = await asyncio.gather(*tasks)
+    return [result for batch_results in results for result in batch_results]
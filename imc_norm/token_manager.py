@@ -0,0 +1,91 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+# OIDC-Endpunkt des Siemens Identity Providers und Scope der Norm-API. NORM_TOKEN_URL (z. B. für den lokalen
+# Stand-in) wird erst beim Anlegen des OidcTokenManager gelesen, damit auch Werte aus einer später geladenen .env greifen
+TOKEN_URL = "https://login.microsoftonline.com/38ae3bcd-9579-4fd4-adda-b42e1495d55a/oauth2/v2.0/token"
+TOKEN_SCOPE = "2a4a9891-2f4d-4565-9b3c-d5dfe14ee5f5/.default"
+
+# So lange vor Ablauf wird das Token bereits erneuert
+DEFAULT_REFRESH_MARGIN_SECONDS = 120
+# Gültigkeit, falls der Identity Provider kein expires_in liefert
+DEFAULT_EXPIRES_IN_SECONDS = 3600
+
+
+def _request_token(token_url: str, payload: Dict[str, str]) -> Dict[str, Any]:
+    response = requests.post(token_url, data=payload)
+    print("Response Status Code:", response.status_code)
+    response.raise_for_status()
+    return response.json()
+
+
+class OidcTokenManager:
+    """
+    Access-Token (Client Credentials) für die Norm-API: wird erst bei Bedarf geholt, bis kurz vor
+    Ablauf (expires_in) wiederverwendet und dann erneuert. Greifen mehrere Threads gleichzeitig zu,
+    holt nur einer ein neues Token, die anderen warten darauf.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, scope: str = TOKEN_SCOPE, token_url: Optional[str] = None,
+                 refresh_margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+                 fetch_token: Optional[Callable[[Dict[str, str]], Dict[str, Any]]] = None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.token_url = token_url or os.getenv("NORM_TOKEN_URL") or TOKEN_URL
+        self.refresh_margin_seconds = refresh_margin_seconds
+        # fetch_token ersetzt die Anfrage an den Identity Provider (z. B. in Tests)
+        self.fetch_token = fetch_token or (lambda payload: _request_token(self.token_url, payload))
+        # Anzahl Token-Anfragen, z. B. für Metriken
+        self.request_count = 0
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin_seconds
+
+    def get_token(self) -> str:
+        """
+        Gültiges Access-Token (aus dem Cache oder neu angefordert).
+        """
+        if self._is_fresh():
+            return self._token
+        with self._lock:
+            # Ein anderer Thread hat das Token eventuell schon erneuert
+            if self._is_fresh():
+                return self._token
+            payload = {
+                'grant_type': 'client_credentials',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'scope': self.scope
+            }
+            self.request_count += 1
+            data = self.fetch_token(payload)
+            self._token = data.get("access_token")
+            self._expires_at = time.time() + float(data.get("expires_in") or DEFAULT_EXPIRES_IN_SECONDS)
+            return self._token
+
+    async def aget_token(self) -> str:
+        """
+        Wie get_token, blockiert aber die Event-Loop nicht, wenn ein neues Token nötig ist.
+        """
+        if self._is_fresh():
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, token: Optional[str] = None):
+        """
+        Verwirft das Token (z. B. nach 401). Mit token nur, wenn es noch das aktuelle ist, damit
+        mehrere gleichzeitig abgewiesene Anfragen nur eine Erneuerung auslösen.
+        """
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = None
+                self._expires_at = 0.0